@@ -1,6 +1,9 @@
 from typing import Annotated
 
 from fastapi import Path
+from pydantic import BeforeValidator
+
+from app.utils import split_comma_separated
 
 ID_PATH_ANNOTATION = Annotated[
     int,
@@ -12,3 +15,8 @@ ID_PATH_ANNOTATION = Annotated[
         le=9223372036854775807,  # 8 bytes int max value
     ),
 ]
+
+
+def comma_separated(item_type: type) -> type:
+    """List query parameter accepting ?x=1,2 as well as ?x=1&x=2"""
+    return Annotated[list[item_type], BeforeValidator(split_comma_separated)]
@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import Engine, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import sync_schema
+from app.existence import load_indexes
+from app.src.search.controllers import create_search_index
+
+logger = logging.getLogger(__name__)
+
+
+# Create a default role if none exists
+def create_default_role(engine: Engine) -> None:
+    db = Session(engine)
+    try:
+        # Check if any roles exist
+        existing_roles = db.query(models.Role).first()
+        if not existing_roles:
+            # Create a default role
+            default_role = models.Role(name="User", description="Default user role")
+            db.add(default_role)
+            db.commit()
+            logger.info("Default role created")
+    except Exception:
+        logger.exception("Error creating default role")
+    finally:
+        db.close()
+
+
+def backfill_updated_at(engine: Engine) -> None:
+    # Rows from before updated_at existed sync as changed at migration time
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            if "updated_at" in table.c:
+                conn.execute(
+                    update(table)
+                    .where(table.c.updated_at == None)  # noqa: E711
+                    .values(updated_at=now)
+                )
+
+
+def init_database(engine: Engine) -> None:
+    """Create or migrate one database, safe to run again on every start."""
+    models.Base.metadata.create_all(bind=engine)
+    sync_schema(engine, models.Base.metadata)
+    backfill_updated_at(engine)
+    create_search_index(engine)
+    create_default_role(engine)
+    # Active ids for foreign key validation
+    load_indexes(engine)
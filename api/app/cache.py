@@ -0,0 +1,153 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+from sqlalchemy import Engine, select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import get_session_engine
+
+T = TypeVar("T")
+
+
+class CacheRegion:
+    """Size-bounded LRU of read-mostly values, shared by all sessions.
+
+    Values are response schemas, never ORM rows, so nothing in here is bound
+    to a session. Every invalidation bumps ``version`` and a load only stores
+    its result when nothing was invalidated while it was reading, so a commit
+    racing with a read can't leave the old row cached.
+
+    ``shared_version`` is the region's row in cache_versions as last seen.
+    When a request reads a newer one, some worker committed a write to the
+    region and every entry is dropped.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.shared_version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(
+        self, key: Hashable, load: Callable[[], T], shared_version: int = 0
+    ) -> T:
+        now = time.monotonic()
+        with self._lock:
+            if shared_version > self.shared_version:
+                self.version += 1
+                self.shared_version = shared_version
+                self._entries.clear()
+            entry = self._entries.get(key)
+            # Writes that skip invalidate, like raw SQL, still age out
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self.version
+
+        value = load()
+
+        with self._lock:
+            # A request behind on the shared version may have read old rows
+            if self.version == version and self.shared_version == shared_version:
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            self.version += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "region": self.name,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_regions: weakref.WeakKeyDictionary[Engine, dict[str, CacheRegion]] = (
+    weakref.WeakKeyDictionary()
+)
+_regions_lock = threading.Lock()
+
+
+def _get_region(engine: Engine, name: str) -> CacheRegion:
+    with _regions_lock:
+        regions = _regions.setdefault(engine, {})
+        if name not in regions:
+            regions[name] = CacheRegion(
+                name, settings.cache.max_entries, settings.cache.ttl_seconds
+            )
+        return regions[name]
+
+
+def _shared_versions(sql: Session) -> dict[str, int]:
+    # Read once per session, that is once per request
+    if "cache_versions" not in sql.info:
+        sql.info["cache_versions"] = dict(
+            sql.execute(
+                select(models.CacheVersion.region, models.CacheVersion.version)
+            ).all()
+        )
+    return sql.info["cache_versions"]
+
+
+def cached(sql: Session, region: str, key: Hashable, load: Callable[[], T]) -> T:
+    """Read-through lookup, ``load`` runs on a miss and its result is kept."""
+    if not settings.cache.enabled:
+        return load()
+    return _get_region(get_session_engine(sql), region).get_or_load(
+        key, load, _shared_versions(sql).get(region, 0)
+    )
+
+
+def invalidate(sql: Session, region: str, *keys: Hashable) -> None:
+    """Drop entries written by the session's transaction, call it before commit.
+
+    Bumps the region's shared version in the same transaction, so every
+    worker drops its entries once the write is visible.
+    """
+    if not settings.cache.enabled or not keys:
+        return
+    sql.execute(
+        insert(models.CacheVersion)
+        .values(region=region, version=1)
+        .on_conflict_do_update(
+            index_elements=[models.CacheVersion.region],
+            set_={"version": models.CacheVersion.version + 1},
+        )
+    )
+    sql.info.pop("cache_versions", None)
+    _get_region(get_session_engine(sql), region).invalidate(*keys)
+
+
+def region_stats(engine: Engine) -> list[dict[str, Any]]:
+    with _regions_lock:
+        regions = list(_regions.get(engine, {}).values())
+    return [region.stats() for region in regions]
@@ -0,0 +1,186 @@
+"""Maintenance commands, run as ``python -m app.cli <command>`` from api/."""
+
+import argparse
+from pathlib import Path
+
+from fastapi import HTTPException
+
+from app.bootstrap import init_database
+from app.database import get_engine, get_session_factory, list_tenants
+from app.src.archive.controllers import archive_inactive
+from app.src.backups.controllers import backup_database, verify_backup
+from app.src.events.controllers import prune_events
+from app.src.imports.controllers import import_csv
+from app.src.jobs.controllers import run_worker
+
+
+def _targets(args: argparse.Namespace) -> list[str | None]:
+    # No --tenant means the default database, --all-tenants adds every shard
+    targets: list[str | None] = list(args.tenant or [])
+    if args.all_tenants:
+        targets = [None, *list_tenants()]
+    return targets or [None]
+
+
+def archive(args: argparse.Namespace) -> None:
+    for tenant in _targets(args):
+        init_database(get_engine(tenant))
+        with get_session_factory(tenant)() as sql:
+            result = archive_inactive(sql, args.retention_days, args.batch_size)
+        print(tenant or "default", result.model_dump_json())
+
+
+def backup(args: argparse.Namespace) -> None:
+    failed = False
+    for tenant in _targets(args):
+        with get_session_factory(tenant)() as sql:
+            result = backup_database(sql, verify=not args.no_verify)
+        print(tenant or "default", result.model_dump_json())
+        failed |= result.verification is not None and not result.verification.ok
+    if failed:
+        raise SystemExit(1)
+
+
+def backup_verify(args: argparse.Namespace) -> None:
+    if not Path(args.file).is_file():
+        raise SystemExit(f"No backup at {args.file}")
+    verification = verify_backup(args.file)
+    print(verification.model_dump_json(indent=2))
+    if not verification.ok:
+        raise SystemExit(1)
+
+
+def events_prune(args: argparse.Namespace) -> None:
+    for tenant in _targets(args):
+        with get_session_factory(tenant)() as sql:
+            result = prune_events(sql, args.retention_days, args.batch_size)
+        print(tenant or "default", result.model_dump_json())
+
+
+def run_import(args: argparse.Namespace) -> None:
+    with Path(args.file).open(encoding="utf-8-sig", newline="") as lines:
+        with get_session_factory(args.tenant)() as sql:
+            report = import_csv(sql, args.entity, lines, args.chunk_size)
+    print(report.model_dump_json(indent=2))
+    if report.failed:
+        raise SystemExit(1)
+
+
+def jobs_work(args: argparse.Namespace) -> None:
+    targets = _targets(args)
+    for tenant in targets:
+        init_database(get_engine(tenant))
+    finished = run_worker(targets, args.executor, args.concurrency, args.once)
+    print(f"Ran {finished} jobs")
+
+
+def shards_create(args: argparse.Namespace) -> None:
+    existing = set(list_tenants())
+    for tenant in args.names:
+        if tenant in existing:
+            raise SystemExit(f"Tenant {tenant} already exists")
+        init_database(get_engine(tenant, create=True))
+        print(f"Created {tenant}")
+
+
+def shards_migrate(args: argparse.Namespace) -> None:
+    for tenant in _targets(args):
+        init_database(get_engine(tenant))
+        print(f"Migrated {tenant or 'default'}")
+
+
+def shards_list(args: argparse.Namespace) -> None:
+    for tenant in list_tenants():
+        print(tenant)
+
+
+def _add_target_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--tenant", action="append")
+    parser.add_argument("--all-tenants", action="store_true")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(required=True)
+
+    archive_parser = commands.add_parser(
+        "archive", help="Move long inactive rows to the *_archive tables"
+    )
+    archive_parser.add_argument("--retention-days", type=int)
+    archive_parser.add_argument("--batch-size", type=int)
+    _add_target_arguments(archive_parser)
+    archive_parser.set_defaults(handler=archive)
+
+    backup_parser = commands.add_parser(
+        "backup", help="Copy databases while they serve, page by page"
+    )
+    backup_parser.add_argument(
+        "--no-verify", action="store_true", help="Skip the integrity check"
+    )
+    _add_target_arguments(backup_parser)
+    backup_parser.set_defaults(handler=backup)
+    backup_commands = backup_parser.add_subparsers()
+
+    verify_parser = backup_commands.add_parser(
+        "verify", help="Check a backup's integrity and count its rows"
+    )
+    verify_parser.add_argument("file")
+    verify_parser.set_defaults(handler=backup_verify)
+
+    events_parser = commands.add_parser("events", help="Maintain the event outbox")
+    event_commands = events_parser.add_subparsers(required=True)
+
+    prune_parser = event_commands.add_parser(
+        "prune", help="Delete events older than the retention window"
+    )
+    prune_parser.add_argument("--retention-days", type=int)
+    prune_parser.add_argument("--batch-size", type=int)
+    _add_target_arguments(prune_parser)
+    prune_parser.set_defaults(handler=events_prune)
+
+    import_parser = commands.add_parser("import", help="Import rows from a CSV file")
+    import_parser.add_argument("entity", choices=["users", "courses", "enrollments"])
+    import_parser.add_argument("file")
+    import_parser.add_argument("--tenant")
+    import_parser.add_argument("--chunk-size", type=int)
+    import_parser.set_defaults(handler=run_import)
+
+    jobs_parser = commands.add_parser("jobs", help="Run background jobs")
+    job_commands = jobs_parser.add_subparsers(required=True)
+
+    work_parser = job_commands.add_parser(
+        "work", help="Claim and run queued jobs until interrupted"
+    )
+    work_parser.add_argument("--executor", choices=["thread", "process"])
+    work_parser.add_argument("--concurrency", type=int)
+    work_parser.add_argument(
+        "--once", action="store_true", help="Stop once no job is due"
+    )
+    _add_target_arguments(work_parser)
+    work_parser.set_defaults(handler=jobs_work)
+
+    shards_parser = commands.add_parser("shards", help="Manage tenant databases")
+    shard_commands = shards_parser.add_subparsers(required=True)
+
+    create_parser = shard_commands.add_parser("create", help="Create tenant databases")
+    create_parser.add_argument("names", nargs="+")
+    create_parser.set_defaults(handler=shards_create)
+
+    migrate_parser = shard_commands.add_parser(
+        "migrate", help="Add new tables, columns and indexes to existing databases"
+    )
+    _add_target_arguments(migrate_parser)
+    migrate_parser.set_defaults(handler=shards_migrate)
+
+    list_parser = shard_commands.add_parser("list", help="List tenant databases")
+    list_parser.set_defaults(handler=shards_list)
+
+    args = parser.parse_args(argv)
+    try:
+        args.handler(args)
+    except HTTPException as e:
+        raise SystemExit(e.detail) from e
+
+
+if __name__ == "__main__":
+    main()
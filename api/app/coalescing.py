@@ -0,0 +1,203 @@
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Annotated, Any
+
+from fastapi import Depends, Request
+from fastapi.responses import Response
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.src.auth.controllers import get_current_user
+from app.src.users.schemas import UserResponse
+from app.tenancy import get_tenant
+
+# Request state entry of a request computing the response others wait for
+STATE_KEY = "coalescing_flight"
+
+
+@dataclass
+class Flight:
+    key: tuple
+    done: bool = False
+    status_code: int | None = None
+    content_type: str | None = None
+    body: bytes | None = None
+    # Futures of waiting followers, each bound to the loop it waits in
+    waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = field(
+        default_factory=list
+    )
+
+
+class CoalescedError(Exception):
+    """Raised by a follower to answer with the leader's response."""
+
+    def __init__(self, flight: Flight):
+        self.flight = flight
+
+
+class Coalescer:
+    """In-flight GETs of one worker, keyed by route, params and scope.
+
+    The first request of a key leads and runs the endpoint, identical
+    requests arriving before it finishes wait and get its serialized
+    response. Nothing is kept once the leader finishes, this is not a cache.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._flights: dict[tuple, Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: tuple) -> tuple[Flight, asyncio.Future | None]:
+        """Flight of a key and the future a follower waits on, None leads it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight(key)
+                self.leaders += 1
+                return flight, None
+            loop = asyncio.get_running_loop()
+            landed = loop.create_future()
+            flight.waiters.append((loop, landed))
+            return flight, landed
+
+    def land(
+        self,
+        flight: Flight,
+        status_code: int | None,
+        content_type: str | None,
+        body: bytes | None,
+    ) -> None:
+        # Followers fall back to running the endpoint when body is None
+        with self._lock:
+            self._flights.pop(flight.key, None)
+            flight.status_code = status_code
+            flight.content_type = content_type
+            flight.body = body
+            flight.done = True
+            waiters, flight.waiters = flight.waiters, []
+        for loop, landed in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, landed)
+            except RuntimeError:
+                # The follower's loop is gone, nobody is waiting
+                pass
+
+    def count(self, coalesced: bool) -> None:
+        with self._lock:
+            if coalesced:
+                self.coalesced += 1
+            else:
+                self.timeouts += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "timeouts": self.timeouts,
+                "in_flight": len(self._flights),
+            }
+
+
+def _resolve(landed: asyncio.Future) -> None:
+    if not landed.done():
+        landed.set_result(None)
+
+
+coalescer = Coalescer()
+
+
+async def coalesce(
+    request: Request,
+    tenant: Annotated[str | None, Depends(get_tenant)],
+    user: Annotated[UserResponse, Depends(get_current_user)],
+) -> None:
+    """Route dependency sharing one computation between identical GETs.
+
+    Runs after authentication. Responses don't depend on who asks, only on
+    the role, so requests of one school and role with the same path and query
+    share a response. Followers wait on the event loop, not in the threadpool
+    the leader needs to finish, and without a database slot: only the
+    endpoint's session takes one.
+    """
+    if not settings.coalescing.enabled:
+        return
+
+    key = (
+        tenant,
+        user.role.role_id,
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+    )
+    flight, landed = coalescer.join(key)
+    if landed is None:
+        setattr(request.state, STATE_KEY, flight)
+        return
+
+    try:
+        await asyncio.wait_for(landed, settings.coalescing.wait_seconds)
+    except TimeoutError:
+        pass
+    if flight.done and flight.body is not None:
+        coalescer.count(True)
+        raise CoalescedError(flight)
+    # The leader failed or is too slow, run the endpoint
+    coalescer.count(False)
+
+
+async def coalesced_handler(request: Request, exc: CoalescedError) -> Response:
+    flight = exc.flight
+    return Response(
+        flight.body,
+        status_code=flight.status_code,
+        headers={
+            "Content-Type": flight.content_type or "application/json",
+            "X-Coalesced": "true",
+        },
+    )
+
+
+class CoalescingMiddleware:
+    """Hands the serialized response of a leading GET to its followers."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        # Shared with request.state, coalesce() leaves its flight in there
+        state = scope.setdefault("state", {})
+        status_code: int | None = None
+        content_type: str | None = None
+        chunks: list[bytes] = []
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code, content_type
+            if STATE_KEY in state:
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    content_type = Headers(raw=message["headers"]).get("content-type")
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture_send)
+        finally:
+            flight = state.get(STATE_KEY)
+            if flight is not None:
+                failed = status_code is None or status_code >= 500
+                coalescer.land(
+                    flight,
+                    status_code,
+                    content_type,
+                    None if failed else b"".join(chunks),
+                )
@@ -1,3 +1,6 @@
+from pathlib import Path
+from typing import Literal
+
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -6,18 +9,179 @@ class AuthSettings(BaseModel):
     secret_key: str
     algorithm: str
     access_token_expire_minutes: int
+    admin_role: str = "Admin"
 
 
 class SqlSettings(BaseModel):
     name: str
+    # One <tenant>.db per school, requests without a tenant use name
+    tenant_dir: str = "tenants"
+    tenant_header: str = "X-Tenant"
+    max_open_engines: int = 32
+
+    def get_path(self, tenant: str | None = None) -> str:
+        if tenant is not None:
+            return str(Path(self.tenant_dir) / f"{tenant}.db")
+        return f"{self.name}.db"
+
+    def get_url(self, tenant: str | None = None):
+        return f"sqlite:///{self.get_path(tenant)}"
+
+
+class EventSettings(BaseModel):
+    poll_interval_seconds: float = 1.0
+    keepalive_seconds: float = 15.0
+    batch_size: int = 100
+    # Older events are pruned, a client reconnecting with an older cursor
+    # continues from the oldest event kept
+    retention_days: int = 7
+    prune_batch_size: int = 1000
+
+
+class ExistenceSettings(BaseModel):
+    enabled: bool = True
+    refresh_seconds: float = 60.0
+
+
+class CacheSettings(BaseModel):
+    enabled: bool = True
+    max_entries: int = 10000
+    ttl_seconds: float = 60.0
+
+
+class ArchiveSettings(BaseModel):
+    retention_days: int = 365
+    batch_size: int = 500
+
+
+class ImportSettings(BaseModel):
+    chunk_size: int = 500
+    max_errors: int = 1000
+
+
+class IdempotencySettings(BaseModel):
+    ttl_seconds: float = 86400.0
+    # How long a repeat waits for the first request before giving up with 409
+    wait_seconds: float = 10.0
+    # A first request running longer than this is considered abandoned
+    lock_seconds: float = 60.0
+    poll_interval_seconds: float = 0.05
+
+
+class RateLimitGroup(BaseModel):
+    # Tokens refilled per second and bucket size. Schools share NAT
+    # addresses, per IP limits are the looser ones
+    user_rate: float = 5.0
+    user_burst: int = 20
+    ip_rate: float = 20.0
+    ip_burst: int = 60
+
+
+class PrivateRateLimitGroup(RateLimitGroup):
+    user_rate: float = 10.0
+    user_burst: int = 40
+    ip_rate: float = 50.0
+    ip_burst: int = 150
+
+
+class RateLimitSettings(BaseModel):
+    enabled: bool = True
+    public: RateLimitGroup = RateLimitGroup()
+    private: RateLimitGroup = PrivateRateLimitGroup()
+    # Buckets kept per worker, the least recently used are dropped
+    max_buckets: int = 100000
+    # Requests holding a database session at once per worker
+    max_concurrent_requests: int = 32
+    # How long a request waits for a session slot before 503
+    queue_timeout_seconds: float = 0.5
+    retry_after_seconds: int = 1
+
+
+class CoalescingSettings(BaseModel):
+    enabled: bool = True
+    # How long a request waits for an identical one before running itself
+    wait_seconds: float = 5.0
+
+
+class JobSettings(BaseModel):
+    executor: Literal["thread", "process"] = "thread"
+    concurrency: int = 4
+    batch_size: int = 10
+    poll_interval_seconds: float = 1.0
+    max_attempts: int = 5
+    # Retries wait backoff_seconds * 2 ** (attempt - 1), capped
+    backoff_seconds: float = 10.0
+    max_backoff_seconds: float = 3600.0
+    # A job running longer than this is assumed lost with its worker
+    lock_seconds: float = 600.0
+    # Finished jobs are purged after this, dead ones are kept
+    done_retention_days: int = 7
+
+
+class LoggingSettings(BaseModel):
+    level: str = "INFO"
+    # Share of requests with an access log line, errors and slow ones always
+    access_sample_rate: float = 0.1
+    slow_request_ms: float = 1000.0
+    # Records waiting for the listener thread, more are dropped
+    queue_size: int = 10000
+
+
+class SlowQuerySettings(BaseModel):
+    enabled: bool = True
+    threshold_ms: float = 100.0
+    # Capture EXPLAIN QUERY PLAN the first time a statement is slow
+    explain: bool = True
+    # Distinct statements kept per database, least recently slow dropped
+    max_statements: int = 500
+
+
+class BackupSettings(BaseModel):
+    # One subdirectory per database
+    directory: str = "backups"
+    pages_per_step: int = 256
+    # Pause between steps, lets the writer's checkpoints and requests through
+    step_sleep_seconds: float = 0.01
+    # Newest backups kept per database, older ones are deleted
+    keep: int = 7
+
+
+class SyncSettings(BaseModel):
+    # Rows per response across all entities, the rest is paged
+    max_rows: int = 1000
+    # Tokens reach back this far, a write transaction that began before a
+    # sync and committed after it is picked up by the next one
+    overlap_seconds: float = 5.0
+
 
-    def get_url(self):
-        return f"sqlite:///{self.name}.db"
+class GroupCommitSettings(BaseModel):
+    # Off: every task completion commits on its own
+    enabled: bool = False
+    # A batch is committed after this many writes or this long after its first.
+    # Longer delays make bigger batches, worth it where fsyncs are slow
+    max_batch: int = 100
+    max_delay_ms: float = 2.0
+    # Longest a request waits for its batch
+    timeout_seconds: float = 10.0
 
 
 class Settings(BaseSettings):
     sql: SqlSettings
     auth: AuthSettings
+    events: EventSettings = EventSettings()
+    existence: ExistenceSettings = ExistenceSettings()
+    archive: ArchiveSettings = ArchiveSettings()
+    cache: CacheSettings = CacheSettings()
+    imports: ImportSettings = ImportSettings()
+    idempotency: IdempotencySettings = IdempotencySettings()
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    coalescing: CoalescingSettings = CoalescingSettings()
+    jobs: JobSettings = JobSettings()
+    logging: LoggingSettings = LoggingSettings()
+    slow_queries: SlowQuerySettings = SlowQuerySettings()
+    backups: BackupSettings = BackupSettings()
+    sync: SyncSettings = SyncSettings()
+    group_commit: GroupCommitSettings = GroupCommitSettings()
 
     model_config = SettingsConfigDict(
         env_file="../.env",
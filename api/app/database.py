@@ -1,5 +1,17 @@
-from typing import Any
-from sqlalchemy import Engine, create_engine
+import asyncio
+import functools
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Annotated, Any
+from fastapi import Depends, HTTPException, Request
+from fastapi.routing import APIRoute
+from sqlalchemy import Engine, MetaData, create_engine, event, inspect
+from sqlalchemy.schema import CreateColumn
 
 from collections.abc import Generator
 
@@ -11,24 +23,336 @@ from sqlalchemy.ext.declarative import declarative_base
 
 from sqlalchemy.orm.session import Session
 from app.config import settings
+from app.ratelimit import acquire_db_slot
+from app.slow_queries import track_slow_queries
+from app.tenancy import get_tenant, validate_tenant
 
 
 # SQLite specific settings 
 connect_args: dict[str, bool] = {"check_same_thread": False}
 
 
-engine: Engine = create_engine(settings.sql.get_url(), connect_args=connect_args)
+class PoolStats:
+    """How many connections an engine handed out and how long they were held."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checked_out = 0
+        self.total_hold_seconds = 0.0
+        self.max_hold_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+
+    def checkin(self, held: float) -> None:
+        with self._lock:
+            self.checked_out -= 1
+            self.total_hold_seconds += held
+            self.max_hold_seconds = max(self.max_hold_seconds, held)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            returned = self.checkouts - self.checked_out
+            return {
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "mean_hold_ms": (
+                    self.total_hold_seconds / returned * 1000 if returned else 0.0
+                ),
+                "max_hold_ms": self.max_hold_seconds * 1000,
+            }
+
+
+_pool_stats: weakref.WeakKeyDictionary[Engine, PoolStats] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _track_pool(bind: Engine) -> None:
+    stats = _pool_stats[bind] = PoolStats()
+
+    @event.listens_for(bind, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        stats.checkout()
+
+    @event.listens_for(bind, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is not None:
+            stats.checkin(time.perf_counter() - checked_out_at)
+
+
+def pool_stats(bind: Engine) -> dict[str, Any]:
+    return _pool_stats[bind].stats()
+
+
+def _create_writer(url: str) -> Engine:
+    writer = create_engine(url, connect_args=connect_args)
+    _track_pool(writer)
+
+    @event.listens_for(writer, "connect")
+    def _connect(dbapi_connection, connection_record):
+        # Readers run next to the writer in WAL mode. pysqlite's own BEGIN
+        # handling is disabled, write transactions take the lock up front so
+        # they never fail upgrading a read lock halfway through
+        dbapi_connection.isolation_level = None
+        dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+    @event.listens_for(writer, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return writer
+
+
+def _create_reader(path: str) -> Engine:
+    reader = create_engine(
+        f"sqlite:///file:{path}?mode=ro&uri=true", connect_args=connect_args
+    )
+    _track_pool(reader)
+
+    @event.listens_for(reader, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.execute("PRAGMA query_only=ON")
+
+    return reader
+
+
+@dataclass(frozen=True)
+class Database:
+    """Read-write and read-only engine of one database file.
+
+    Sessions of both carry the writer in ``info``, state kept per database
+    (active ids, cache regions) is keyed by it.
+    """
+
+    writer: Engine
+    reader: Engine
+    write_sessions: sessionmaker
+    read_sessions: sessionmaker
+
+
+def _open_database(tenant: str | None) -> Database:
+    writer = _create_writer(settings.sql.get_url(tenant))
+    reader = _create_reader(settings.sql.get_path(tenant))
+    database = Database(
+        writer,
+        reader,
+        sessionmaker(
+            autocommit=False, autoflush=False, bind=writer, info={"engine": writer}
+        ),
+        sessionmaker(
+            autocommit=False, autoflush=False, bind=reader, info={"engine": writer}
+        ),
+    )
+    _readers[writer] = reader
+    track_slow_queries(writer, writer)
+    track_slow_queries(reader, writer)
+    return database
+
+
+_readers: weakref.WeakKeyDictionary[Engine, Engine] = weakref.WeakKeyDictionary()
+
+default_database = _open_database(None)
+
+engine: Engine = default_database.writer
 
 Base = declarative_base()
 
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = default_database.write_sessions
 
 
-# Dependency
-def get_sql() -> Generator[Session, Any, None]:
-    session: Session = SessionLocal()
+# Tenant databases opened so far, least recently used first
+_tenants: OrderedDict[str, Database] = OrderedDict()
+_tenants_lock = threading.Lock()
+
+
+def get_database(tenant: str | None, create: bool = False) -> Database:
+    """Engines and session factories of a tenant database, None is the default.
+
+    Every tenant has its own file, so its own engines, pools and SQLite write
+    lock. Databases are opened lazily and the least recently used one is
+    disposed above sql.max_open_engines. Only the CLI creates new files.
+    """
+    if tenant is None:
+        return default_database
+
+    with _tenants_lock:
+        if tenant in _tenants:
+            _tenants.move_to_end(tenant)
+            return _tenants[tenant]
+
+        path = Path(settings.sql.get_path(validate_tenant(tenant)))
+        if not create and not path.exists():
+            raise HTTPException(status_code=404, detail="Tenant not found")
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        database = _open_database(tenant)
+        _tenants[tenant] = database
+
+        while len(_tenants) > settings.sql.max_open_engines:
+            _, evicted = _tenants.popitem(last=False)
+            # Checked out connections are closed when they are returned
+            evicted.writer.dispose()
+            evicted.reader.dispose()
+        return database
+
+
+def get_engine(tenant: str | None, create: bool = False) -> Engine:
+    return get_database(tenant, create).writer
+
+
+def get_session_factory(tenant: str | None, create: bool = False) -> sessionmaker:
+    return get_database(tenant, create).write_sessions
+
+
+def get_reader(writer: Engine) -> Engine:
+    """Read-only engine of the database a writer belongs to."""
+    return _readers.get(writer, writer)
+
+
+def get_session_engine(sql: Session) -> Engine:
+    """Writer of the database a session reads or writes."""
+    return sql.info.get("engine") or sql.get_bind()
+
+
+def begin_read_snapshot(sql: Session) -> None:
+    # pysqlite doesn't BEGIN before SELECTs, open the read transaction
+    # explicitly so every following query sees the same snapshot
+    connection = sql.connection()
+    if not connection.connection.dbapi_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN")
+
+
+def list_tenants() -> list[str]:
+    try:
+        names = [entry.name for entry in Path(settings.sql.tenant_dir).iterdir()]
+    except FileNotFoundError:
+        return []
+    return sorted(name.removesuffix(".db") for name in names if name.endswith(".db"))
+
+
+def get_tenant_database(
+    tenant: Annotated[str | None, Depends(get_tenant)],
+) -> Database:
+    return get_database(tenant)
+
+
+def get_sessions(
+    request: Request, database: Annotated[Database, Depends(get_tenant_database)]
+) -> sessionmaker:
+    # Reads never hold the write lock, mutating routes get short IMMEDIATE
+    # transactions on the writer
+    if request.method in ("GET", "HEAD"):
+        return database.read_sessions
+    return database.write_sessions
+
+
+def release_connection(sql: Session) -> None:
+    """End the session's transaction and return its connection to the pool.
+
+    The session stays usable and checks a connection out again on its next
+    query. Whatever wasn't committed is rolled back, like on close.
+    """
+    sql.close()
+
+
+def _release_sessions(values: dict[str, Any]) -> None:
+    for value in values.values():
+        if isinstance(value, Session):
+            release_connection(value)
+
+
+def _releasing(call: Callable) -> Callable:
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def endpoint(**values: Any) -> Any:
+            try:
+                return await call(**values)
+            finally:
+                _release_sessions(values)
+
+    else:
+
+        @functools.wraps(call)
+        def endpoint(**values: Any) -> Any:
+            try:
+                return call(**values)
+            finally:
+                _release_sessions(values)
+
+    return endpoint
+
+
+class SessionRoute(APIRoute):
+    """Route releasing the connections of its sessions once the endpoint returns.
+
+    Controllers return response schemas, so nothing reads from the database
+    while FastAPI serializes them. Without this the connection (and for
+    writes the SQLite lock) is held until get_sql exits after serialization.
+    """
+
+    def get_route_handler(self) -> Callable:
+        self.dependant.call = _releasing(self.dependant.call)
+        return super().get_route_handler()
+
+
+def _session(sessions: sessionmaker) -> Generator[Session, Any, None]:
+    session: Session = sessions()
     try:
         yield session
     finally:
         session.close()
+
+
+# Dependency
+def get_sql(
+    sessions: Annotated[sessionmaker, Depends(get_sessions)],
+    _slot: Annotated[None, Depends(acquire_db_slot)],
+) -> Generator[Session, Any, None]:
+    yield from _session(sessions)
+
+
+def get_read_sql(
+    database: Annotated[Database, Depends(get_tenant_database)],
+    _slot: Annotated[None, Depends(acquire_db_slot)],
+) -> Generator[Session, Any, None]:
+    """Read-only session for routes that only read but aren't GETs."""
+    yield from _session(database.read_sessions)
+
+
+def get_auth_read_sql(
+    database: Annotated[Database, Depends(get_tenant_database)],
+) -> Generator[Session, Any, None]:
+    """Read-only session outside the database slots, for authentication.
+
+    Every request looks its user up before it is known whether the request
+    runs its endpoint at all. A request answered by a coalesced response
+    never takes a slot, the endpoint's own session does.
+    """
+    yield from _session(database.read_sessions)
+
+
+def sync_schema(bind: Engine, metadata: MetaData) -> None:
+    # create_all skips existing tables, nullable columns and indexes added to
+    # models later are created here
+    with bind.begin() as conn:
+        inspector = inspect(conn)
+        for table in metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"
+                    )
+
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
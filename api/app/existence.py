@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+import weakref
+
+from sqlalchemy import Engine, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import get_reader, get_session_engine
+
+logger = logging.getLogger(__name__)
+
+# Models referenced by foreign keys, roles have no is_active and all exist
+TRACKED_MODELS: tuple[type, ...] = (
+    models.Role,
+    models.User,
+    models.Category,
+    models.Course,
+    models.Task,
+    models.Enrollment,
+)
+
+# Ids above this always go to the database instead of growing the bitmap
+MAX_TRACKED_ID = 1 << 26
+
+
+class ActiveIdIndex:
+    """Bitmap of active primary keys of one table in one database.
+
+    Every mutation bumps ``version``. A reload replays mutations made while it
+    was reading, and a fallback lookup only stores its result when nothing
+    changed in between, so a concurrent deactivation can't be overwritten by
+    a stale read. ``high_water`` is the largest id loaded or marked, rows
+    created by other workers since have larger ids.
+    """
+
+    def __init__(self, model: type):
+        self.model = model
+        self.version = 0
+        self.loaded_at = 0.0
+        self.high_water = -1
+        self._bits = bytearray()
+        self._lock = threading.Lock()
+        self._loading = False
+        self._pending: list[tuple[int, bool]] = []
+
+    def __contains__(self, id_: int) -> bool:
+        byte = id_ >> 3
+        return 0 <= byte < len(self._bits) and bool(self._bits[byte] & (1 << (id_ & 7)))
+
+    def _set(self, id_: int, active: bool) -> None:
+        if id_ < 0 or id_ > MAX_TRACKED_ID:
+            return
+        self.high_water = max(self.high_water, id_)
+        byte = id_ >> 3
+        if active:
+            if byte >= len(self._bits):
+                size = max(byte + 1, len(self._bits) * 2)
+                self._bits.extend(bytes(size - len(self._bits)))
+            self._bits[byte] |= 1 << (id_ & 7)
+        elif byte < len(self._bits):
+            self._bits[byte] &= ~(1 << (id_ & 7))
+
+    def mark(self, id_: int, active: bool) -> None:
+        with self._lock:
+            self.version += 1
+            self._set(id_, active)
+            if self._loading:
+                self._pending.append((id_, active))
+
+    def add_if_unchanged(self, id_: int, version: int) -> None:
+        with self._lock:
+            if self.version == version:
+                self._set(id_, True)
+
+    def reload(self, engine: Engine) -> None:
+        with self._lock:
+            if self._loading:
+                # Someone else is reloading, until then misses go to the database
+                return
+            self._loading = True
+            self._pending = []
+
+        primary_key = self.model.__mapper__.primary_key[0]
+        query = select(primary_key)
+        if hasattr(self.model, "is_active"):
+            query = query.where(self.model.is_active == True)  # noqa: E712
+
+        bits = bytearray()
+        try:
+            with get_reader(engine).connect() as connection:
+                ids = connection.execute(query).scalars().all()
+        except Exception:
+            with self._lock:
+                self._loading = False
+            raise
+
+        if ids:
+            bits = bytearray((min(max(ids), MAX_TRACKED_ID) >> 3) + 1)
+            for id_ in ids:
+                if 0 <= id_ <= MAX_TRACKED_ID:
+                    bits[id_ >> 3] |= 1 << (id_ & 7)
+
+        with self._lock:
+            self._bits = bits
+            self.high_water = min(max(ids, default=-1), MAX_TRACKED_ID)
+            for id_, active in self._pending:
+                self._set(id_, active)
+            self._pending = []
+            self._loading = False
+            self.version += 1
+            self.loaded_at = time.monotonic()
+
+
+_indexes: weakref.WeakKeyDictionary[Engine, dict[type, ActiveIdIndex]] = (
+    weakref.WeakKeyDictionary()
+)
+_indexes_lock = threading.Lock()
+
+
+def _reload_in_background(index: ActiveIdIndex, engine: Engine) -> None:
+    try:
+        index.reload(engine)
+    except Exception:
+        logger.exception("Reloading the active ids of %s failed", index.model.__name__)
+
+
+def _get_index(engine: Engine, model: type) -> ActiveIdIndex:
+    with _indexes_lock:
+        indexes = _indexes.setdefault(engine, {})
+        if model not in indexes:
+            indexes[model] = ActiveIdIndex(model)
+        index = indexes[model]
+
+    # Other workers don't notify us about their writes, reload periodically.
+    # Requests keep using the current bitmap meanwhile
+    if (
+        time.monotonic() - index.loaded_at > settings.existence.refresh_seconds
+        and not index._loading
+    ):
+        threading.Thread(
+            target=_reload_in_background,
+            args=(index, engine),
+            name="existence-reload",
+            daemon=True,
+        ).start()
+    return index
+
+
+def load_indexes(engine: Engine) -> None:
+    with _indexes_lock:
+        indexes = _indexes.setdefault(engine, {})
+        for model in TRACKED_MODELS:
+            indexes.setdefault(model, ActiveIdIndex(model))
+    for model in TRACKED_MODELS:
+        indexes[model].reload(engine)
+
+
+def is_active(sql: Session, model: type, id_: int) -> bool:
+    """Check that a referenced row exists and is active.
+
+    Only a negative answer comes from the in-memory index: an id it has seen
+    that isn't active. Another worker may have deactivated an indexed row
+    since, so hits are checked against the database in the caller's
+    transaction, like newer ids. Writers hold the write lock there, the
+    answer holds until they commit.
+    """
+    if not settings.existence.enabled:
+        row = sql.get(model, id_)
+        return row is not None and getattr(row, "is_active", True)
+
+    index = _get_index(get_session_engine(sql), model)
+    if id_ not in index and 0 <= id_ <= min(index.high_water, MAX_TRACKED_ID):
+        return False
+
+    version = index.version
+    row = sql.get(model, id_)
+    active = row is not None and getattr(row, "is_active", True)
+    if active:
+        index.add_if_unchanged(id_, version)
+    return active
+
+
+def mark_active(sql: Session, model: type, id_: int, active: bool = True) -> None:
+    """Record a committed create, update or soft delete in the index."""
+    if settings.existence.enabled:
+        _get_index(get_session_engine(sql), model).mark(id_, active)
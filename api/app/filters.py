@@ -0,0 +1,58 @@
+import operator
+from typing import Annotated
+
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import ColumnCollection, Select
+
+from app.annotations import comma_separated
+
+# Filter fields named <column>_from / <column>_to compile into a range on <column>
+_RANGE_SUFFIXES = {"_from": operator.ge, "_to": operator.le}
+
+
+class ListQuery(BaseModel):
+    """Base of the whitelisted query parameters of list endpoints.
+
+    Subclasses declare only fields whose columns are indexed and a ``sort``
+    Literal of indexed columns (``-`` prefix for descending), so every allowed
+    combination is answered by an index lookup plus a residual filter.
+    ``expand`` lists relations to embed and ``include_archived`` (declared by
+    archivable lists) selects the table, neither is a filter.
+    """
+
+    ids: Annotated[comma_separated(int) | None, Field(max_length=100)] = None
+    sort: str | None = None
+    expand: comma_separated(str) = []
+
+    model_config = ConfigDict(extra="forbid")
+
+
+def apply_list_query(
+    query: Select, columns: ColumnCollection, params: ListQuery | None
+) -> Select:
+    if params is None:
+        return query
+
+    if params.ids is not None:
+        primary_key = next(column for column in columns if column.primary_key)
+        query = query.where(primary_key.in_(params.ids))
+
+    filters = params.model_dump(
+        exclude_none=True, exclude={"ids", "sort", "expand", "include_archived"}
+    )
+    for name, value in filters.items():
+        for suffix, compare in _RANGE_SUFFIXES.items():
+            column_name = name.removesuffix(suffix)
+            if name.endswith(suffix) and column_name in columns:
+                query = query.where(compare(columns[column_name], value))
+                break
+        else:
+            query = query.where(columns[name] == value)
+
+    if params.sort:
+        column = columns[params.sort.lstrip("-")]
+        query = query.order_by(
+            column.desc() if params.sort.startswith("-") else column.asc()
+        )
+
+    return query
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import get_session_engine
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# A write run by the writer, it may add and flush but never commits
+Operation = Callable[[Session], Any]
+
+# A writer without work for this long stops its thread
+_IDLE_SECONDS = 60.0
+
+
+class GroupCommitWriter:
+    """Writer thread of one database, committing queued writes in batches.
+
+    Waits for the first operation, then collects more for up to
+    group_commit.max_delay_ms or max_batch operations and runs them all in
+    one transaction, so one lock acquisition and one fsync serve the batch.
+    The delay only applies while writes come in together, a lone write
+    doesn't wait for company that isn't coming.
+    Every operation of a larger batch runs in its own savepoint, a failing
+    one is rolled back alone and its future gets the error. If the commit
+    itself fails every future of the batch does.
+    """
+
+    def __init__(self, writer: Engine):
+        self._writer = writer
+        self._sessions = sessionmaker(
+            autocommit=False, autoflush=False, bind=writer, info={"engine": writer}
+        )
+        self._queue: queue.SimpleQueue[tuple[Operation, Future]] = (
+            queue.SimpleQueue()
+        )
+        self.batches = 0
+        self.operations = 0
+        self._last_batch = 0
+        self._thread = threading.Thread(
+            target=self._run, name="group-commit", daemon=True
+        )
+        self._thread.start()
+
+    def _collect(self) -> list[tuple[Operation, Future]] | None:
+        while True:
+            try:
+                batch = [self._queue.get(timeout=_IDLE_SECONDS)]
+                break
+            except queue.Empty:
+                # Submissions hold the lock, none can slip in after this
+                with _writers_lock:
+                    if self._queue.empty():
+                        _writers.pop(self._writer, None)
+                        return None
+
+        # Whatever queued up during the last commit goes in without waiting
+        delay = settings.group_commit.max_delay_ms if self._last_batch > 1 else 0
+        deadline = time.monotonic() + delay / 1000
+        while len(batch) < settings.group_commit.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        self._last_batch = len(batch)
+        return batch
+
+    def _run(self) -> None:
+        while (batch := self._collect()) is not None:
+            try:
+                self._commit(batch)
+            except Exception:
+                logger.exception("Unexpected error")
+
+    def _commit(self, batch: list[tuple[Operation, Future]]) -> None:
+        done: list[tuple[Future, Any]] = []
+        with self._sessions() as sql:
+            for operation, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # Alone in its batch the transaction is as good as a savepoint
+                savepoint = sql.begin_nested() if len(batch) > 1 else None
+                try:
+                    result = operation(sql)
+                    if savepoint is not None:
+                        savepoint.commit()
+                except Exception as e:
+                    (savepoint or sql).rollback()
+                    future.set_exception(e)
+                else:
+                    done.append((future, result))
+            try:
+                sql.commit()
+            except Exception as e:
+                sql.rollback()
+                for future, _ in done:
+                    future.set_exception(e)
+                raise
+
+        self.batches += 1
+        self.operations += len(done)
+        for future, result in done:
+            future.set_result(result)
+
+
+# Writers with a running thread, idle ones remove themselves
+_writers: dict[Engine, GroupCommitWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def submit(writer: Engine, operation: Operation) -> Future:
+    """Queue a write for the group writer of a database, started on demand."""
+    future: Future = Future()
+    with _writers_lock:
+        group_writer = _writers.get(writer)
+        if group_writer is None:
+            group_writer = _writers[writer] = GroupCommitWriter(writer)
+        group_writer._queue.put((operation, future))
+    return future
+
+
+async def group_commit(sql: Session, operation: Callable[[Session], T]) -> T:
+    """Run a write in the next batch of the session's database and await it.
+
+    The request session only picks the database. Raises what the operation
+    raised, or TimeoutError after group_commit.timeout_seconds.
+    """
+    future = submit(get_session_engine(sql), operation)
+    return await asyncio.wait_for(
+        asyncio.wrap_future(future), settings.group_commit.timeout_seconds
+    )
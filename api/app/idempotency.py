@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Annotated
+
+from fastapi import Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import models
+from app.config import settings
+from app.database import get_database
+from app.src.auth.controllers import get_current_user
+from app.src.users.schemas import UserResponse
+from app.tenancy import get_tenant
+
+MAX_KEY_LENGTH = 255
+
+# Request state entry of a request that claimed its key
+STATE_KEY = "idempotency_claim"
+
+# Responses that depend on who asks or when rather than on the request
+NOT_STORED = {401, 403, 429}
+
+
+@dataclass(frozen=True)
+class StoredKey:
+    idempotency_key_id: int
+    request_hash: str
+    status_code: int | None
+    content_type: str | None
+    body: bytes | None
+
+
+def _snapshot(row: models.IdempotencyKey) -> StoredKey:
+    return StoredKey(
+        row.idempotency_key_id,
+        row.request_hash,
+        row.status_code,
+        row.content_type,
+        row.body,
+    )
+
+
+def _claim(
+    sessions: sessionmaker,
+    principal: str,
+    endpoint: str,
+    key: str,
+    request_hash: str,
+) -> tuple[StoredKey, bool]:
+    """Insert the in-progress row of a key, or return the row already there.
+
+    Runs in one IMMEDIATE transaction, so two workers can't both claim a key.
+    """
+    now = datetime.utcnow()
+    with sessions() as sql:
+        sql.execute(
+            delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at < now)
+        )
+        row = sql.execute(
+            select(models.IdempotencyKey).where(
+                models.IdempotencyKey.principal == principal,
+                models.IdempotencyKey.endpoint == endpoint,
+                models.IdempotencyKey.key == key,
+            )
+        ).scalar_one_or_none()
+        if row is not None:
+            abandoned = row.status_code is None and row.created_at < now - timedelta(
+                seconds=settings.idempotency.lock_seconds
+            )
+            if not abandoned:
+                return _snapshot(row), False
+            sql.delete(row)
+            sql.flush()
+
+        row = models.IdempotencyKey(
+            principal=principal,
+            endpoint=endpoint,
+            key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=now + timedelta(seconds=settings.idempotency.ttl_seconds),
+        )
+        sql.add(row)
+        sql.flush()
+        stored = _snapshot(row)
+        sql.commit()
+        return stored, True
+
+
+def _complete(
+    sessions: sessionmaker,
+    idempotency_key_id: int,
+    status_code: int,
+    content_type: str | None,
+    body: bytes,
+) -> None:
+    with sessions() as sql:
+        sql.execute(
+            update(models.IdempotencyKey)
+            .where(models.IdempotencyKey.idempotency_key_id == idempotency_key_id)
+            .values(status_code=status_code, content_type=content_type, body=body)
+        )
+        sql.commit()
+
+
+def _release(sessions: sessionmaker, idempotency_key_id: int) -> None:
+    # Failed requests may be retried with the same key
+    with sessions() as sql:
+        sql.execute(
+            delete(models.IdempotencyKey).where(
+                models.IdempotencyKey.idempotency_key_id == idempotency_key_id
+            )
+        )
+        sql.commit()
+
+
+@dataclass
+class Claim:
+    flight: tuple
+    sessions: sessionmaker
+    idempotency_key_id: int
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+class ReplayError(Exception):
+    """Raised by idempotent() to answer with the stored response."""
+
+    def __init__(self, stored: StoredKey):
+        self.stored = stored
+
+
+# Requests claiming a key in this worker, repeats wait on them without
+# polling. Threading events, the app may serve requests from several loops
+_in_flight: dict[tuple, Claim] = {}
+
+
+async def _wait(flight: tuple, deadline: float) -> None:
+    claim = _in_flight.get(flight)
+    if claim is None:
+        # The first request runs in another worker, poll its row
+        await asyncio.sleep(settings.idempotency.poll_interval_seconds)
+        return
+    await run_in_threadpool(claim.done.wait, max(deadline - time.monotonic(), 0))
+
+
+async def idempotent(
+    request: Request,
+    tenant: Annotated[str | None, Depends(get_tenant)],
+    user: Annotated[UserResponse, Depends(get_current_user)],
+    key: Annotated[str | None, Header(alias="Idempotency-Key")] = None,
+) -> None:
+    """Route dependency replaying the stored response of a repeated create.
+
+    Runs after rate limiting and authentication, keys are scoped to the
+    tenant, the user and the route and live in the tenant's database for
+    idempotency.ttl_seconds. A repeat of a request that is still running
+    waits for it instead of running the controller again. Only for routes
+    with JSON bodies, FastAPI has read those already.
+    """
+    if key is None:
+        return
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail="Invalid Idempotency-Key")
+
+    sessions = get_database(tenant).write_sessions
+    principal = f"{tenant or ''}:{user.user_id}"
+    endpoint = f"POST {request.url.path}"
+    request_hash = hashlib.sha256(
+        request.scope["query_string"] + b"\0" + await request.body()
+    ).hexdigest()
+    flight = (tenant, principal, endpoint, key)
+
+    deadline = time.monotonic() + settings.idempotency.wait_seconds
+    while True:
+        stored, claimed = await run_in_threadpool(
+            _claim, sessions, principal, endpoint, key, request_hash
+        )
+        if claimed:
+            break
+        if stored.request_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if stored.status_code is not None:
+            raise ReplayError(stored)
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=409,
+                detail="A request with this Idempotency-Key is still in progress",
+            )
+        await _wait(flight, deadline)
+
+    claim = Claim(flight, sessions, stored.idempotency_key_id)
+    _in_flight[flight] = claim
+    setattr(request.state, STATE_KEY, claim)
+
+
+async def replay_handler(request: Request, exc: ReplayError) -> Response:
+    stored = exc.stored
+    return Response(
+        stored.body,
+        status_code=stored.status_code,
+        headers={
+            "Content-Type": stored.content_type or "application/json",
+            "Idempotent-Replayed": "true",
+        },
+    )
+
+
+class IdempotencyMiddleware:
+    """Stores the response of a POST whose key idempotent() claimed.
+
+    Other requests pass through untouched. 5xx, 401, 403 and 429 responses
+    release the key instead, so the request can be retried.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        # Shared with request.state, idempotent() leaves its claim in there
+        state = scope.setdefault("state", {})
+        status_code = 500
+        content_type: str | None = None
+        chunks: list[bytes] = []
+
+        async def capture_send(message: Message) -> None:
+            nonlocal status_code, content_type
+            if STATE_KEY in state:
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    content_type = Headers(raw=message["headers"]).get("content-type")
+                elif message["type"] == "http.response.body":
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        failed = True
+        try:
+            await self.app(scope, receive, capture_send)
+            failed = False
+        finally:
+            claim = state.get(STATE_KEY)
+            if claim is not None:
+                await self._finish(claim, failed, status_code, content_type, chunks)
+
+    async def _finish(
+        self,
+        claim: Claim,
+        failed: bool,
+        status_code: int,
+        content_type: str | None,
+        chunks: list[bytes],
+    ) -> None:
+        try:
+            if failed or status_code >= 500 or status_code in NOT_STORED:
+                await run_in_threadpool(
+                    _release, claim.sessions, claim.idempotency_key_id
+                )
+            else:
+                await run_in_threadpool(
+                    _complete,
+                    claim.sessions,
+                    claim.idempotency_key_id,
+                    status_code,
+                    content_type,
+                    b"".join(chunks),
+                )
+        finally:
+            claim.done.set()
+            _in_flight.pop(claim.flight, None)
@@ -0,0 +1,79 @@
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+
+@dataclass(frozen=True)
+class Relation:
+    model: type
+    foreign_key: str
+    # (model, foreign key) pairs of the loaded rows that their schema embeds too
+    prime: tuple[tuple[type, str], ...] = ()
+
+
+class BatchLoader:
+    """Per-request loader, resolves ids with one IN query per model and batch.
+
+    Loaded rows are kept here as well, the session identity map only holds weak
+    references and lazy loads of already primed rows must not hit the database.
+    """
+
+    def __init__(self, sql: Session):
+        self.sql = sql
+        self._rows: dict[type, dict[int, Any]] = defaultdict(dict)
+
+    def load_many(self, model: type, ids: Iterable[int | None]) -> dict[int, Any]:
+        cache = self._rows[model]
+        wanted = {id_ for id_ in ids if id_ is not None}
+        missing = wanted - cache.keys()
+        if missing:
+            primary_key = model.__mapper__.primary_key[0]
+            for row in self.sql.execute(
+                select(model).where(primary_key.in_(missing))
+            ).scalars():
+                cache[getattr(row, primary_key.key)] = row
+        return {id_: cache[id_] for id_ in wanted if id_ in cache}
+
+    def load_relation(self, relation: Relation, rows: Sequence[Any]) -> dict[int, Any]:
+        loaded = self.load_many(
+            relation.model, (getattr(row, relation.foreign_key) for row in rows)
+        )
+        for model, foreign_key in relation.prime:
+            self.load_many(model, (getattr(row, foreign_key) for row in loaded.values()))
+        return loaded
+
+
+def expand_rows(
+    sql: Session,
+    rows: Sequence[Any],
+    schema: type[BaseModel],
+    expanded_schema: type[BaseModel],
+    relations: dict[str, Relation],
+    expand: Iterable[str] | None,
+) -> list[BaseModel]:
+    """Validate rows into schema, embedding the requested relations.
+
+    Relations that are not requested are never touched, so they can't trigger
+    a lazy load per row.
+    """
+    expand = set(expand or ())
+    if not expand:
+        return [schema.model_validate(row) for row in rows]
+
+    loader = BatchLoader(sql)
+    loaded = {name: loader.load_relation(relations[name], rows) for name in expand}
+    return [
+        expanded_schema.model_validate(
+            schema.model_validate(row).model_dump()
+            | {
+                name: loaded[name].get(getattr(row, relations[name].foreign_key))
+                for name in expand
+            }
+        )
+        for row in rows
+    ]
@@ -0,0 +1,169 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from logging.handlers import QueueHandler, QueueListener
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+access_logger = logging.getLogger("app.access")
+
+# Scope and id of the request being handled, controllers run in copies of
+# the middleware's context so they see them too
+_request: ContextVar[tuple[Scope, str] | None] = ContextVar("request", default=None)
+
+# Record attributes every record has, the rest came in through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def _operation_id(scope: Scope) -> str | None:
+    # FastAPI puts the matched route into the scope once routing is done
+    route = scope.get("route")
+    return getattr(route, "operation_id", None) or getattr(route, "name", None)
+
+
+def get_request_context() -> tuple[str | None, str | None]:
+    """Request id and operation id of the request being handled, if any."""
+    current = _request.get()
+    if current is None:
+        return None, None
+    scope, request_id = current
+    return request_id, _operation_id(scope)
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id, operation_id = get_request_context()
+        if request_id is not None:
+            record.request_id = request_id
+            record.operation_id = operation_id
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "function": record.funcName,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread, dropping them when it lags behind.
+
+    Records keep their exc_info, tracebacks are formatted by the listener
+    instead of the request's thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging() -> None:
+    """Send the app's records as JSON lines to stdout from a listener thread."""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    handler = NonBlockingQueueHandler(queue.Queue(settings.logging.queue_size))
+    handler.addFilter(RequestContextFilter())
+
+    logger = logging.getLogger("app")
+    logger.setLevel(settings.logging.level)
+    logger.addHandler(handler)
+    logger.propagate = False
+
+    _listener = QueueListener(handler.queue, stream)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestLoggingMiddleware:
+    """Tags records with a request id and writes sampled access logs.
+
+    The id comes from the X-Request-ID header or is generated, and is sent
+    back in the response. Server errors and slow requests are always logged,
+    the rest with probability logging.access_sample_rate.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+        token = _request.set((scope, request_id))
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            if (
+                status_code >= 500
+                or duration_ms >= settings.logging.slow_request_ms
+                or random.random() < settings.logging.access_sample_rate
+            ):
+                access_logger.info(
+                    "%s %s %s",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(duration_ms, 3),
+                    },
+                )
+            _request.reset(token)
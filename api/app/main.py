@@ -1,34 +1,21 @@
 from fastapi import FastAPI
 from app import models
-from app.database import engine, SessionLocal
+from app.bootstrap import init_database
+from app.database import engine
 from sqlalchemy_schemadisplay import create_schema_graph
 from fastapi.middleware.cors import CORSMiddleware
+from app.idempotency import IdempotencyMiddleware, ReplayError, replay_handler
+from app.coalescing import CoalescedError, CoalescingMiddleware, coalesced_handler
+from app.log import RequestLoggingMiddleware, configure_logging
 
 from app.src.routers import router as api_router
 from app.src.auth.routes import router as auth_router
 
-# Create the database tables
-models.Base.metadata.create_all(bind=engine)
-
-# Create a default role if none exists
-def create_default_role():
-    db = SessionLocal()
-    try:
-        # Check if any roles exist
-        existing_roles = db.query(models.Role).first()
-        if not existing_roles:
-            # Create a default role
-            default_role = models.Role(name="User", description="Default user role")
-            db.add(default_role)
-            db.commit()
-            print("Default role created")
-    except Exception as e:
-        print(f"Error creating default role: {e}")
-    finally:
-        db.close()
-
-# Create default role
-create_default_role()
+configure_logging()
+
+# Create the database tables of the default database, tenant databases are
+# created and migrated by python -m app.cli shards
+init_database(engine)
 
 graph = create_schema_graph(
     metadata=models.Base.metadata,
@@ -46,6 +33,10 @@ app = FastAPI(docs_url="/", redoc_url=None)
 origins: list[str] = ["*"]
 
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_exception_handler(ReplayError, replay_handler)
+app.add_middleware(CoalescingMiddleware)
+app.add_exception_handler(CoalescedError, coalesced_handler)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -53,6 +44,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestLoggingMiddleware)
 
 
 app.include_router(api_router)
@@ -1,4 +1,19 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, ForeignKey
+from datetime import datetime
+
+from sqlalchemy import (
+    Table,
+    Column,
+    Integer,
+    String,
+    Boolean,
+    DateTime,
+    Date,
+    ForeignKey,
+    Index,
+    LargeBinary,
+    UniqueConstraint,
+    event,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -11,6 +26,14 @@ class Role(Base):
     role_id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False, unique=True)
     description = Column(String, nullable=True)
+    # Set on insert and every update, ORM or Core, delta sync reads it
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     users = relationship("User", back_populates="role")
 
@@ -26,6 +49,14 @@ class User(Base):
     email = Column(String, nullable=False, unique=True)
     role_id = Column(Integer, ForeignKey("roles.role_id"), nullable=False)
     is_active = Column(Boolean, nullable=False, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     role = relationship("Role", back_populates="users")
     created_courses = relationship("Course", back_populates="teacher")
@@ -41,12 +72,24 @@ class Course(Base):
     __tablename__ = "courses"
 
     course_id = Column(Integer, primary_key=True, nullable=False)
-    teacher_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-    category_id = Column(Integer, ForeignKey("categories.category_id"), nullable=False)
+    teacher_id = Column(
+        Integer, ForeignKey("users.user_id"), nullable=False, index=True
+    )
+    category_id = Column(
+        Integer, ForeignKey("categories.category_id"), nullable=False, index=True
+    )
     title = Column(String, nullable=False, unique=True)
     description = Column(String, nullable=True)
     deadline_in_days = Column(Integer, nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     teacher = relationship("User", back_populates="created_courses")
     tasks = relationship("Task", back_populates="course")
@@ -58,10 +101,20 @@ class Task(Base):
     __tablename__ = "tasks"
 
     task_id = Column(Integer, primary_key=True, nullable=False)
-    course_id = Column(Integer, ForeignKey("courses.course_id"), nullable=False)
+    course_id = Column(
+        Integer, ForeignKey("courses.course_id"), nullable=False, index=True
+    )
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     course = relationship("Course", back_populates="tasks")
     task_completions = relationship("TaskCompletion", back_populates="task")
@@ -71,13 +124,27 @@ class Enrollment(Base):
     __tablename__ = "enrollments"
 
     enrollment_id = Column(Integer, primary_key=True, nullable=False)
-    student_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-    assigner_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
-    course_id = Column(Integer, ForeignKey("courses.course_id"), nullable=False)
+    student_id = Column(
+        Integer, ForeignKey("users.user_id"), nullable=False, index=True
+    )
+    assigner_id = Column(
+        Integer, ForeignKey("users.user_id"), nullable=False, index=True
+    )
+    course_id = Column(
+        Integer, ForeignKey("courses.course_id"), nullable=False, index=True
+    )
     completed_at = Column(DateTime, nullable=True)
-    enrolled_at = Column(Date, nullable=False)
+    enrolled_at = Column(Date, nullable=False, index=True)
     deadline = Column(Date, nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     student = relationship(
         "User", foreign_keys=[student_id], back_populates="student_enrollments"
@@ -94,11 +161,19 @@ class TaskCompletion(Base):
 
     task_completion_id = Column(Integer, primary_key=True, nullable=False)
     enrollment_id = Column(
-        Integer, ForeignKey("enrollments.enrollment_id"), nullable=False
+        Integer, ForeignKey("enrollments.enrollment_id"), nullable=False, index=True
     )
-    task_id = Column(Integer, ForeignKey("tasks.task_id"), nullable=False)
-    completed_at = Column(DateTime, nullable=True)
+    task_id = Column(Integer, ForeignKey("tasks.task_id"), nullable=False, index=True)
+    completed_at = Column(DateTime, nullable=True, index=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
 
     enrollment = relationship("Enrollment", back_populates="task_completions")
     task = relationship("Task", back_populates="task_completions")
@@ -111,5 +186,118 @@ class Category(Base):
     name = Column(String, nullable=False, unique=True)
     description = Column(String, nullable=True)
     is_active = Column(Boolean, nullable=False, default=True)
+    deactivated_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime,
+        nullable=True,
+        index=True,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+    )
+
+    courses = relationship("Course", back_populates="category")
+
+
+class OutboxEvent(Base):
+    __tablename__ = "outbox_events"
+    # AUTOINCREMENT so event ids are never reused, clients use them as a cursor
+    __table_args__ = (
+        Index("ix_outbox_events_course_id_event_id", "course_id", "event_id"),
+        Index("ix_outbox_events_student_id_event_id", "student_id", "event_id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    event_id = Column(Integer, primary_key=True, nullable=False)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)
+    course_id = Column(Integer, nullable=True)
+    student_id = Column(Integer, nullable=True)
+    payload = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    # Workers claim due jobs in run_at order
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+    job_id = Column(Integer, primary_key=True, nullable=False)
+    kind = Column(String, nullable=False)
+    payload = Column(String, nullable=False)
+    # queued, running, done or dead
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    # A running job not finished by then is claimed again
+    locked_until = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("principal", "endpoint", "key"),)
+
+    idempotency_key_id = Column(Integer, primary_key=True, nullable=False)
+    principal = Column(String, nullable=False)
+    endpoint = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    # NULL while the first request is still running
+    status_code = Column(Integer, nullable=True)
+    content_type = Column(String, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    # Bumped in the transaction of every write to a cached region, workers
+    # compare it per request to drop what other workers made stale
+    region = Column(String, primary_key=True, nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+
+
+def _track_deactivation(target, value, oldvalue, initiator):
+    # deactivated_at drives the archival retention window
+    if not value and oldvalue is not False:
+        target.deactivated_at = datetime.utcnow()
+    elif value:
+        target.deactivated_at = None
+
+
+for _model in (User, Category, Course, Task, Enrollment, TaskCompletion):
+    event.listen(_model.is_active, "set", _track_deactivation)
+
+
+def _archive_table(table: Table) -> Table:
+    # Same columns without foreign keys and unique constraints, archived rows
+    # may reference rows that were archived too
+    return Table(
+        f"{table.name}_archive",
+        Base.metadata,
+        *(
+            Column(
+                column.name,
+                column.type,
+                primary_key=column.primary_key,
+                nullable=column.nullable,
+                index=column.index,
+            )
+            for column in table.columns
+        ),
+        Column("archived_at", DateTime, nullable=False),
+    )
+
 
-    courses = relationship("Course", back_populates="category")
\ No newline at end of file
+categories_archive = _archive_table(Category.__table__)
+courses_archive = _archive_table(Course.__table__)
+tasks_archive = _archive_table(Task.__table__)
+enrollments_archive = _archive_table(Enrollment.__table__)
+task_completions_archive = _archive_table(TaskCompletion.__table__)
@@ -0,0 +1,138 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Generator
+from typing import Any, Literal
+
+from fastapi import HTTPException, Request
+from fastapi.security.utils import get_authorization_scheme_param
+
+from app.config import settings
+from app.tenancy import decode_token
+
+RouteGroup = Literal["public", "private"]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def wait_seconds(self) -> float:
+        """Time until the next token, 0 when one is available."""
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Token buckets of one worker, keyed by route group and client.
+
+    A request takes a token from every bucket it falls in or from none, so a
+    request rejected by the user limit doesn't use up the IP limit. Buckets
+    of idle clients are dropped above rate_limit.max_buckets, a dropped bucket
+    comes back full.
+    """
+
+    def __init__(self, max_buckets: int):
+        self.max_buckets = max_buckets
+        self._buckets: OrderedDict[tuple, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_bucket(
+        self, key: tuple, rate: float, burst: int, now: float
+    ) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.refill(now)
+        return bucket
+
+    def take(self, limits: list[tuple[tuple, float, int]]) -> float:
+        """Take a token from every bucket, or return the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            buckets = [
+                self._get_bucket(key, rate, burst, now) for key, rate, burst in limits
+            ]
+            wait = max(bucket.wait_seconds() for bucket in buckets)
+            if wait == 0:
+                for bucket in buckets:
+                    bucket.tokens -= 1
+            return wait
+
+
+limiter = RateLimiter(settings.rate_limit.max_buckets)
+
+
+class RateLimit:
+    """Dependency applying the token bucket limits of a route group.
+
+    Authenticated clients are limited per user of their school and per IP,
+    anonymous ones per IP only. Rejected requests get a 429 with Retry-After.
+    """
+
+    def __init__(self, group: RouteGroup):
+        self.group = group
+
+    async def __call__(self, request: Request) -> None:
+        if not settings.rate_limit.enabled:
+            return
+
+        limits = getattr(settings.rate_limit, self.group)
+        host = request.client.host if request.client else ""
+        keys = [((self.group, "ip", host), limits.ip_rate, limits.ip_burst)]
+
+        scheme, token = get_authorization_scheme_param(
+            request.headers.get("Authorization")
+        )
+        payload = decode_token(token) if scheme.lower() == "bearer" else {}
+        if "sub" in payload:
+            user = (self.group, "user", payload.get("tenant"), payload["sub"])
+            keys.append((user, limits.user_rate, limits.user_burst))
+
+        wait = limiter.take(keys)
+        if wait > 0:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+
+_db_slots = threading.BoundedSemaphore(settings.rate_limit.max_concurrent_requests)
+
+
+def acquire_db_slot() -> Generator[None, Any, None]:
+    """Hold one of the worker's database slots for the rest of the request.
+
+    Requests over rate_limit.max_concurrent_requests wait up to
+    queue_timeout_seconds and are then shed with a 503 instead of queueing
+    on the SQLite lock.
+    """
+    if not settings.rate_limit.enabled:
+        yield
+        return
+
+    if not _db_slots.acquire(timeout=settings.rate_limit.queue_timeout_seconds):
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy",
+            headers={"Retry-After": str(settings.rate_limit.retry_after_seconds)},
+        )
+    try:
+        yield
+    finally:
+        _db_slots.release()
@@ -0,0 +1,234 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import Engine, event
+
+from app.config import settings
+from app.log import get_request_context
+
+logger = logging.getLogger("app.slow_queries")
+
+SortKey = Literal["total", "max", "count"]
+
+# Expanded IN lists and multi-row VALUES differ per call, not per statement
+_IN_LIST = re.compile(r"IN \(\?(?:, \?)*\)")
+_VALUES_ROWS = re.compile(r"(VALUES \([^()]*\))(?:, \([^()]*\))+")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+# Most shapes kept per statement
+_MAX_SHAPES = 10
+
+
+def fingerprint(statement: str) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _IN_LIST.sub("IN (?, ...)", statement)
+    return _VALUES_ROWS.sub(r"\1, ...", statement)
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> str:
+    if executemany:
+        rows = list(parameters)
+        first = parameter_shape(rows[0], False) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        types = (
+            f"{name}: {type(value).__name__}" for name, value in parameters.items()
+        )
+    else:
+        types = (type(value).__name__ for value in parameters or ())
+    return f"({', '.join(types)})"
+
+
+def explain(
+    cursor: Any, statement: str, parameters: Any, executemany: bool
+) -> list[str]:
+    """EXPLAIN QUERY PLAN of a statement, indented by nesting."""
+    if executemany:
+        parameters = next(iter(parameters), ())
+    rows = cursor.connection.execute(
+        f"EXPLAIN QUERY PLAN {statement}", parameters or ()
+    ).fetchall()
+    depths = {0: -1}
+    plan = []
+    for node_id, parent_id, _, detail in rows:
+        depths[node_id] = depths.get(parent_id, -1) + 1
+        plan.append("  " * depths[node_id] + detail)
+    return plan
+
+
+def is_full_scan(plan: list[str]) -> bool:
+    # "SCAN t USING INDEX" walks an index, subqueries and constants aren't tables
+    for line in plan:
+        detail = line.strip()
+        if (
+            detail.startswith("SCAN ")
+            and " USING " not in detail
+            and "VIRTUAL TABLE" not in detail
+            and not detail.startswith(("SCAN (", "SCAN CONSTANT ROW"))
+        ):
+            return True
+    return False
+
+
+@dataclass
+class SlowStatement:
+    sql: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: datetime | None = None
+    operation_ids: set[str] = field(default_factory=set)
+    parameter_shapes: set[str] = field(default_factory=set)
+    plan: list[str] | None = None
+    full_scan: bool = False
+
+
+class SlowQueryLog:
+    """Slow statements of one database, aggregated by fingerprint."""
+
+    def __init__(self, max_statements: int):
+        self.max_statements = max_statements
+        self._statements: OrderedDict[str, SlowStatement] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def has_plan(self, sql: str) -> bool:
+        with self._lock:
+            statement = self._statements.get(sql)
+            return statement is not None and statement.plan is not None
+
+    def record(
+        self,
+        sql: str,
+        duration_ms: float,
+        operation_id: str | None,
+        shape: str,
+        plan: list[str] | None,
+    ) -> SlowStatement:
+        with self._lock:
+            statement = self._statements.get(sql)
+            if statement is None:
+                statement = self._statements[sql] = SlowStatement(sql)
+                while len(self._statements) > self.max_statements:
+                    self._statements.popitem(last=False)
+            else:
+                self._statements.move_to_end(sql)
+
+            statement.count += 1
+            statement.total_ms += duration_ms
+            statement.max_ms = max(statement.max_ms, duration_ms)
+            statement.last_seen = datetime.utcnow()
+            if operation_id is not None:
+                statement.operation_ids.add(operation_id)
+            if len(statement.parameter_shapes) < _MAX_SHAPES:
+                statement.parameter_shapes.add(shape)
+            if plan is not None and statement.plan is None:
+                statement.plan = plan
+                statement.full_scan = is_full_scan(plan)
+            return statement
+
+    def top(self, limit: int, sort: SortKey) -> list[dict[str, Any]]:
+        keys = {
+            "total": lambda statement: statement.total_ms,
+            "max": lambda statement: statement.max_ms,
+            "count": lambda statement: statement.count,
+        }
+        with self._lock:
+            statements = sorted(
+                self._statements.values(), key=keys[sort], reverse=True
+            )[:limit]
+            return [
+                {
+                    "sql": statement.sql,
+                    "count": statement.count,
+                    "total_ms": statement.total_ms,
+                    "mean_ms": statement.total_ms / statement.count,
+                    "max_ms": statement.max_ms,
+                    "last_seen": statement.last_seen,
+                    "operation_ids": sorted(statement.operation_ids),
+                    "parameter_shapes": sorted(statement.parameter_shapes),
+                    "plan": statement.plan or [],
+                    "full_scan": statement.full_scan,
+                }
+                for statement in statements
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+
+_logs: weakref.WeakKeyDictionary[Engine, SlowQueryLog] = weakref.WeakKeyDictionary()
+
+
+def track_slow_queries(bind: Engine, writer: Engine) -> None:
+    """Time the statements of an engine into the slow query log of its database.
+
+    Statements over slow_queries.threshold_ms are logged with their duration,
+    parameter shapes and the route they ran for. The first time a statement
+    is slow its query plan is captured, full table scans are flagged.
+    """
+    log = _logs.get(writer)
+    if log is None:
+        log = _logs[writer] = SlowQueryLog(settings.slow_queries.max_statements)
+
+    @event.listens_for(bind, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and settings.slow_queries.enabled:
+            context.slow_query_start = time.perf_counter()
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "slow_query_start", None)
+        if start is None:
+            return
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms < settings.slow_queries.threshold_ms:
+            return
+
+        sql = fingerprint(statement)
+        shape = parameter_shape(parameters, executemany)
+        plan = None
+        if (
+            settings.slow_queries.explain
+            and sql.upper().startswith(_EXPLAINABLE)
+            and not log.has_plan(sql)
+        ):
+            try:
+                plan = explain(cursor, statement, parameters, executemany)
+            except sqlite3.Error:
+                logger.debug("Could not explain %s", sql, exc_info=True)
+
+        _, operation_id = get_request_context()
+        recorded = log.record(sql, duration_ms, operation_id, shape, plan)
+        logger.warning(
+            "Slow query %.1f ms%s",
+            duration_ms,
+            " with full table scan" if recorded.full_scan else "",
+            extra={
+                "sql": sql,
+                "parameter_shapes": shape,
+                "duration_ms": round(duration_ms, 3),
+                "plan": recorded.plan,
+                "full_scan": recorded.full_scan,
+            },
+        )
+
+
+def slow_queries(writer: Engine, limit: int, sort: SortKey) -> list[dict[str, Any]]:
+    log = _logs.get(writer)
+    return log.top(limit, sort) if log is not None else []
+
+
+def clear_slow_queries(writer: Engine) -> None:
+    log = _logs.get(writer)
+    if log is not None:
+        log.clear()
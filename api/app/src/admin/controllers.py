@@ -0,0 +1,42 @@
+from sqlalchemy.orm import Session
+
+from app.cache import region_stats
+from app.coalescing import coalescer
+from app.database import get_reader, get_session_engine, pool_stats
+from app.slow_queries import SortKey, clear_slow_queries, slow_queries
+from app.src.admin.schemas import (
+    CacheRegionStats,
+    CoalescingStats,
+    ConnectionPoolStats,
+    SlowQueryReport,
+)
+
+
+def get_cache_stats(sql: Session) -> list[CacheRegionStats]:
+    return [
+        CacheRegionStats.model_validate(stats)
+        for stats in region_stats(get_session_engine(sql))
+    ]
+
+
+def get_pool_stats(sql: Session) -> list[ConnectionPoolStats]:
+    writer = get_session_engine(sql)
+    return [
+        ConnectionPoolStats(engine="writer", **pool_stats(writer)),
+        ConnectionPoolStats(engine="reader", **pool_stats(get_reader(writer))),
+    ]
+
+
+def get_coalescing_stats() -> CoalescingStats:
+    return CoalescingStats.model_validate(coalescer.stats())
+
+
+def get_slow_queries(sql: Session, limit: int, sort: SortKey) -> list[SlowQueryReport]:
+    return [
+        SlowQueryReport.model_validate(statement)
+        for statement in slow_queries(get_session_engine(sql), limit, sort)
+    ]
+
+
+def reset_slow_queries(sql: Session) -> None:
+    clear_slow_queries(get_session_engine(sql))
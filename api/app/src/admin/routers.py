@@ -0,0 +1,82 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import SessionRoute, get_sql
+from app.slow_queries import SortKey
+from app.src.admin.controllers import (
+    get_cache_stats,
+    get_coalescing_stats,
+    get_pool_stats,
+    get_slow_queries,
+    reset_slow_queries,
+)
+from app.src.admin.schemas import (
+    CacheRegionStats,
+    CoalescingStats,
+    ConnectionPoolStats,
+    SlowQueryReport,
+)
+from app.src.auth.controllers import get_current_admin
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(get_current_admin)],
+    route_class=SessionRoute,
+)
+
+
+@router.get(
+    "/cache", summary="Get cache hit rates", operation_id="getCacheStats"
+)
+def endp_get_cache_stats(
+    sql: Annotated[Session, Depends(get_sql)],
+) -> list[CacheRegionStats]:
+    return get_cache_stats(sql=sql)
+
+
+@router.get(
+    "/pool",
+    summary="Get connection checkouts and hold times",
+    operation_id="getPoolStats",
+)
+def endp_get_pool_stats(
+    sql: Annotated[Session, Depends(get_sql)],
+) -> list[ConnectionPoolStats]:
+    return get_pool_stats(sql=sql)
+
+
+@router.get(
+    "/coalescing",
+    summary="Get counts of coalesced requests",
+    operation_id="getCoalescingStats",
+)
+def endp_get_coalescing_stats() -> CoalescingStats:
+    return get_coalescing_stats()
+
+
+@router.get(
+    "/slow-queries",
+    summary="Get the slowest statements with their query plans",
+    operation_id="getSlowQueries",
+)
+def endp_get_slow_queries(
+    sql: Annotated[Session, Depends(get_sql)],
+    limit: Annotated[int, Query(ge=1, le=500)] = 20,
+    sort: SortKey = "total",
+) -> list[SlowQueryReport]:
+    return get_slow_queries(sql=sql, limit=limit, sort=sort)
+
+
+@router.delete(
+    "/slow-queries",
+    status_code=204,
+    summary="Clear the slow query log",
+    operation_id="resetSlowQueries",
+)
+def endp_reset_slow_queries(
+    sql: Annotated[Session, Depends(get_sql)],
+) -> None:
+    reset_slow_queries(sql=sql)
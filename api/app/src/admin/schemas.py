@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class CacheRegionStats(BaseModel):
+    region: str
+    size: int
+    max_entries: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_rate: float
+
+
+class ConnectionPoolStats(BaseModel):
+    engine: Literal["writer", "reader"]
+    checkouts: int
+    checked_out: int
+    # How long connections were held from checkout to checkin
+    mean_hold_ms: float
+    max_hold_ms: float
+
+
+class CoalescingStats(BaseModel):
+    # Counters of this worker since it started
+    leaders: int
+    coalesced: int
+    timeouts: int
+    in_flight: int
+
+
+class SlowQueryReport(BaseModel):
+    sql: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    last_seen: datetime | None
+    operation_ids: list[str]
+    parameter_shapes: list[str]
+    plan: list[str]
+    full_scan: bool
@@ -0,0 +1,272 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    ColumnElement,
+    Select,
+    Table,
+    delete,
+    exists,
+    insert,
+    literal,
+    or_,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.filters import ListQuery, apply_list_query
+from app.src.archive.schemas import ArchiveEntity, ArchiveResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArchiveSpec:
+    model: type
+    archive: Table
+    result_key: str
+    # Hot rows that keep a row from being archived
+    blockers: tuple[ColumnElement, ...] = ()
+    # Child tables moved together with the row: (model, archive, foreign key)
+    children: tuple[tuple[type, Table, str], ...] = ()
+    # Parents restored first so a restored row never points into the archive
+    parents: tuple[tuple[ArchiveEntity, str], ...] = ()
+    # The same for the other parents of the restored children
+    child_parents: tuple[tuple[ArchiveEntity, str], ...] = ()
+
+
+# Children before parents, archiving enrollments unblocks courses and so on
+ARCHIVES: dict[ArchiveEntity, ArchiveSpec] = {
+    "enrollment": ArchiveSpec(
+        models.Enrollment,
+        models.enrollments_archive,
+        "enrollments",
+        children=(
+            (
+                models.TaskCompletion,
+                models.task_completions_archive,
+                "enrollment_id",
+            ),
+        ),
+        parents=(("course", "course_id"),),
+        child_parents=(("task", "task_id"),),
+    ),
+    "task": ArchiveSpec(
+        models.Task,
+        models.tasks_archive,
+        "tasks",
+        blockers=(
+            exists().where(models.TaskCompletion.task_id == models.Task.task_id),
+        ),
+        parents=(("course", "course_id"),),
+    ),
+    "course": ArchiveSpec(
+        models.Course,
+        models.courses_archive,
+        "courses",
+        blockers=(
+            exists().where(models.Task.course_id == models.Course.course_id),
+            exists().where(models.Enrollment.course_id == models.Course.course_id),
+        ),
+        parents=(("category", "category_id"),),
+    ),
+    "category": ArchiveSpec(
+        models.Category,
+        models.categories_archive,
+        "categories",
+        blockers=(
+            exists().where(models.Course.category_id == models.Category.category_id),
+        ),
+    ),
+}
+
+ARCHIVES_BY_MODEL: dict[type, ArchiveSpec] = {
+    spec.model: spec for spec in ARCHIVES.values()
+}
+
+
+def _primary_key(model: type):
+    return model.__mapper__.primary_key[0]
+
+
+def _move(
+    sql: Session, source: Table, target: Table, where: ColumnElement, now: datetime
+) -> int:
+    columns = [column.name for column in source.columns]
+    sql.execute(
+        insert(target).from_select(
+            [*columns, "archived_at"],
+            select(*source.columns, literal(now, target.c.archived_at.type)).where(
+                where
+            ),
+        )
+    )
+    return sql.execute(delete(source).where(where)).rowcount
+
+
+def _restore_rows(
+    sql: Session, archive: Table, target: Table, where: ColumnElement
+) -> int:
+    columns = [column.name for column in target.columns]
+    sql.execute(
+        insert(target).from_select(
+            columns, select(*(archive.c[name] for name in columns)).where(where)
+        )
+    )
+    return sql.execute(delete(archive).where(where)).rowcount
+
+
+def archive_inactive(
+    sql: Session, retention_days: int | None = None, batch_size: int | None = None
+) -> ArchiveResult:
+    """Move rows inactive for longer than the retention window to *_archive.
+
+    Every batch is its own short transaction, so writers are blocked only
+    briefly. Rows deactivated before deactivated_at existed are archived too.
+    """
+    retention_days = (
+        settings.archive.retention_days if retention_days is None else retention_days
+    )
+    batch_size = batch_size or settings.archive.batch_size
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = ArchiveResult()
+
+    try:
+        for spec in ARCHIVES.values():
+            primary_key = _primary_key(spec.model)
+            candidates = (
+                select(primary_key)
+                .where(
+                    spec.model.is_active == False,  # noqa: E712
+                    or_(
+                        spec.model.deactivated_at == None,  # noqa: E711
+                        spec.model.deactivated_at < cutoff,
+                    ),
+                    *(~blocker for blocker in spec.blockers),
+                )
+                .limit(batch_size)
+            )
+            while ids := sql.execute(candidates).scalars().all():
+                now = datetime.utcnow()
+                for child, child_archive, foreign_key in spec.children:
+                    moved = _move(
+                        sql,
+                        child.__table__,
+                        child_archive,
+                        getattr(child, foreign_key).in_(ids),
+                        now,
+                    )
+                    setattr(
+                        result,
+                        child.__tablename__,
+                        getattr(result, child.__tablename__) + moved,
+                    )
+                moved = _move(
+                    sql, spec.model.__table__, spec.archive, primary_key.in_(ids), now
+                )
+                setattr(result, spec.result_key, getattr(result, spec.result_key) + moved)
+                sql.commit()
+
+        return result
+
+    except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+def _restore(
+    sql: Session, entity: ArchiveEntity, entity_id: int, result: ArchiveResult
+) -> bool:
+    spec = ARCHIVES[entity]
+    archive_key = spec.archive.c[_primary_key(spec.model).name]
+    row = sql.execute(select(spec.archive).where(archive_key == entity_id)).first()
+    if row is None:
+        return False
+
+    for parent, foreign_key in spec.parents:
+        _restore(sql, parent, getattr(row, foreign_key), result)
+
+    restored = _restore_rows(
+        sql, spec.archive, spec.model.__table__, archive_key == entity_id
+    )
+    setattr(result, spec.result_key, getattr(result, spec.result_key) + restored)
+    # Restart the retention window, otherwise the next run archives it again
+    sql.execute(
+        update(spec.model)
+        .where(_primary_key(spec.model) == entity_id)
+        .values(deactivated_at=datetime.utcnow())
+    )
+
+    for child, child_archive, foreign_key in spec.children:
+        where = child_archive.c[foreign_key] == entity_id
+        for parent, parent_key in spec.child_parents:
+            parent_ids = sql.execute(
+                select(child_archive.c[parent_key]).where(where).distinct()
+            ).scalars()
+            for parent_id in parent_ids.all():
+                _restore(sql, parent, parent_id, result)
+
+        restored = _restore_rows(sql, child_archive, child.__table__, where)
+        setattr(
+            result,
+            child.__tablename__,
+            getattr(result, child.__tablename__) + restored,
+        )
+    return True
+
+
+def restore_archived(
+    sql: Session, entity: ArchiveEntity, entity_id: int
+) -> ArchiveResult:
+    try:
+        result = ArchiveResult()
+        if not _restore(sql, entity, entity_id, result):
+            raise HTTPException(status_code=404, detail="Archived row not found")
+        sql.commit()
+        return result
+
+    except HTTPException as e:
+        raise e
+
+    except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+def select_with_archived(model: type, params: ListQuery) -> Select:
+    """UNION ALL of hot and archived rows, filtered and sorted by params.
+
+    Archived rows are always inactive, a defaulted is_active only filters the
+    hot table. Passed explicitly it filters both.
+    """
+    table: Table = model.__table__
+    archive: Table = ARCHIVES_BY_MODEL[model].archive
+    unsorted = params.model_copy(update={"sort": None})
+    hot = apply_list_query(select(*table.columns), table.c, unsorted)
+    if "is_active" in type(params).model_fields and (
+        "is_active" not in params.model_fields_set
+    ):
+        unsorted = unsorted.model_copy(update={"is_active": None})
+    archived = apply_list_query(
+        select(*(archive.c[column.name] for column in table.columns)),
+        archive.c,
+        unsorted,
+    )
+    rows = union_all(hot, archived).subquery()
+    return apply_list_query(select(rows), rows.c, ListQuery(sort=params.sort))
+
+
+def get_archived(sql: Session, model: type, entity_id: int):
+    archive = ARCHIVES_BY_MODEL[model].archive
+    return sql.execute(
+        select(archive).where(archive.c[_primary_key(model).name] == entity_id)
+    ).first()
+
@@ -0,0 +1,55 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.annotations import ID_PATH_ANNOTATION
+from app.database import SessionRoute, get_sql
+from app.src.archive.controllers import archive_inactive, restore_archived
+from app.src.archive.schemas import ArchiveEntity, ArchiveResult, ArchiveRun
+from app.src.auth.controllers import get_current_admin
+from app.src.jobs.controllers import queue_job
+from app.src.jobs.schemas import JobResponse
+
+router = APIRouter(
+    prefix="/archive",
+    tags=["Archive"],
+    dependencies=[Depends(get_current_admin)],
+    route_class=SessionRoute,
+)
+
+
+@router.post(
+    "/run", summary="Archive long inactive rows", operation_id="runArchive"
+)
+def endp_run_archive(
+    sql: Annotated[Session, Depends(get_sql)], data: ArchiveRun
+) -> ArchiveResult:
+    return archive_inactive(
+        sql=sql, retention_days=data.retention_days, batch_size=data.batch_size
+    )
+
+
+@router.post(
+    "/jobs",
+    summary="Queue an archive run for the job workers",
+    operation_id="queueArchive",
+    status_code=202,
+)
+def endp_queue_archive(
+    sql: Annotated[Session, Depends(get_sql)], data: ArchiveRun
+) -> JobResponse:
+    return queue_job(sql=sql, kind="archive", payload=data)
+
+
+@router.post(
+    "/{entity}/{entity_id}/restore",
+    summary="Restore an archived row",
+    operation_id="restoreArchived",
+)
+def endp_restore_archived(
+    sql: Annotated[Session, Depends(get_sql)],
+    entity: ArchiveEntity,
+    entity_id: ID_PATH_ANNOTATION,
+) -> ArchiveResult:
+    return restore_archived(sql=sql, entity=entity, entity_id=entity_id)
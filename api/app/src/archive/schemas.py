@@ -0,0 +1,18 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+ArchiveEntity = Literal["enrollment", "task", "course", "category"]
+
+
+class ArchiveRun(BaseModel):
+    retention_days: int | None = Field(None, ge=0)
+    batch_size: int | None = Field(None, ge=1, le=10000)
+
+
+class ArchiveResult(BaseModel):
+    categories: int = 0
+    courses: int = 0
+    tasks: int = 0
+    enrollments: int = 0
+    task_completions: int = 0
@@ -9,7 +9,8 @@ import jwt
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from app import models
-from app.database import get_sql
+from app.database import get_auth_read_sql, release_connection
+from app.tenancy import get_tenant
 from app.config import settings
 
 
@@ -27,7 +28,9 @@ def authenticate_user(sql: Session, username: str, password: str) -> None | mode
 
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
-    sql: Annotated[Session, Depends(get_sql)],
+    # A read, it mustn't queue for the write lock behind group commits
+    sql: Annotated[Session, Depends(get_auth_read_sql)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
 ) -> UserResponse:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,6 +44,9 @@ async def get_current_user(
         username = payload.get("sub")
         if username is None:
             raise credentials_exception
+        # A token of one school must not open a same-named user of another
+        if payload.get("tenant") != tenant:
+            raise credentials_exception
     except jwt.PyJWTError as e:
         raise credentials_exception from e
 
@@ -49,10 +55,14 @@ async def get_current_user(
     ).scalar_one_or_none()
     if user is None:
         raise credentials_exception
-    return UserResponse.model_validate(user)
+    current_user = UserResponse.model_validate(user)
+    # Don't hold the connection (or the write lock) through rate limiting,
+    # coalescing and cache hits, the endpoint checks out again if it queries
+    release_connection(sql)
+    return current_user
 
 
-def get_access_token(sql, username, password):
+def get_access_token(sql, username, password, tenant=None):
     user: None | models.User = authenticate_user(
         sql, username, password
     )
@@ -64,7 +74,18 @@ def get_access_token(sql, username, password):
         )
 
     access_token_expires = timedelta(minutes=settings.auth.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    return Token(access_token=access_token, token_type="bearer")
\ No newline at end of file
+    data = {"sub": user.username}
+    if tenant is not None:
+        data["tenant"] = tenant
+    access_token = create_access_token(data=data, expires_delta=access_token_expires)
+    return Token(access_token=access_token, token_type="bearer")
+
+
+async def get_current_admin(
+    user: Annotated[UserResponse, Depends(get_current_user)],
+) -> UserResponse:
+    if user.role.name != settings.auth.admin_role:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+        )
+    return user
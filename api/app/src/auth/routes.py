@@ -4,14 +4,15 @@ from app.src.users.schemas import UserResponse
 from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from app.database import get_sql
+from app.database import SessionRoute, get_sql
+from app.tenancy import get_tenant
 from passlib.context import CryptContext  # Pro hashování hesel
 from app.src.auth.controllers import (
     get_access_token,
     get_current_user,
 )
 
-router = APIRouter(tags=["Auth"], prefix="/auth")
+router = APIRouter(tags=["Auth"], prefix="/auth", route_class=SessionRoute)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")  # Hashovací context
 
@@ -20,8 +21,9 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")  # Hashovací
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     sql: Annotated[Session, Depends(get_sql)],
+    tenant: Annotated[str | None, Depends(get_tenant)],
 ) -> Token:
-    return get_access_token(sql, form_data.username, form_data.password)
+    return get_access_token(sql, form_data.username, form_data.password, tenant)
 
 
 @router.get("/users/me")
@@ -0,0 +1,151 @@
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import HTTPException
+from sqlalchemy import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_session_engine
+from app.src.backups.schemas import BackupResponse, BackupVerification
+
+logger = logging.getLogger(__name__)
+
+_PARTIAL = ".partial"
+
+
+def _database_name(engine: Engine) -> tuple[str, str]:
+    """Path of an engine's database file and the name its backups go under."""
+    path = engine.url.database
+    return path, Path(path).stem
+
+
+def _backup_directory(name: str) -> Path:
+    return Path(settings.backups.directory) / name
+
+
+def _describe_file(path: Path) -> BackupResponse:
+    stat = path.stat()
+    return BackupResponse(
+        name=path.name,
+        size_bytes=stat.st_size,
+        created_at=datetime.utcfromtimestamp(stat.st_mtime),
+    )
+
+
+def _copy(source_path: str, target_path: Path) -> int:
+    """Copy a live database page by page, returns the number of pages.
+
+    The source keeps one read transaction open across all steps. In WAL mode
+    that pins a snapshot without blocking writers, so the copy is consistent
+    and never restarts because of concurrent writes. Checkpoints can't get
+    past the snapshot until the copy is done, the WAL grows meanwhile.
+    """
+    pages = 0
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal pages
+        pages = total
+        time.sleep(settings.backups.step_sleep_seconds)
+
+    source = sqlite3.connect(f"file:{source_path}?mode=ro", uri=True)
+    target = sqlite3.connect(target_path)
+    try:
+        source.execute("BEGIN")
+        source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        source.backup(
+            target, pages=settings.backups.pages_per_step, progress=progress
+        )
+        source.rollback()
+        # Self-contained file, no -wal next to it needed to read it
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        target.close()
+        source.close()
+    return pages
+
+
+def verify_backup(path: str) -> BackupVerification:
+    """Open a backup read-only, check its integrity and count its rows."""
+    connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        integrity = [row[0] for row in connection.execute("PRAGMA integrity_check")]
+        tables = connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' AND sql NOT LIKE 'CREATE VIRTUAL%' "
+            "ORDER BY name"
+        ).fetchall()
+        row_counts = {
+            name: connection.execute(f'SELECT count(*) FROM "{name}"').fetchone()[0]
+            for (name,) in tables
+        }
+    except sqlite3.DatabaseError as e:
+        # Not a database at all, or too damaged to be read
+        return BackupVerification(ok=False, integrity=[str(e)], row_counts={})
+    finally:
+        connection.close()
+    return BackupVerification(
+        ok=integrity == ["ok"], integrity=integrity, row_counts=row_counts
+    )
+
+
+def _backups(directory: Path, name: str) -> list[Path]:
+    """Backup files of a database, oldest first."""
+    return sorted(directory.glob(f"{name}-*.db"))
+
+
+def _prune(directory: Path, name: str) -> None:
+    for path in _backups(directory, name)[: -max(settings.backups.keep, 1)]:
+        path.unlink()
+
+
+def backup_database(sql: Session, verify: bool = True) -> BackupResponse:
+    """Full online backup of the session's database into backups.directory.
+
+    Written under a temporary name and renamed once complete, so a listed
+    backup is never a partial one. Keeps the newest backups.keep files.
+    """
+    source_path, name = _database_name(get_session_engine(sql))
+    directory = _backup_directory(name)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%fZ")
+    target_path = directory / f"{name}-{stamp}.db"
+    partial_path = target_path.with_name(target_path.name + _PARTIAL)
+
+    try:
+        start = time.perf_counter()
+        pages = _copy(source_path, partial_path)
+        partial_path.replace(target_path)
+        duration = time.perf_counter() - start
+        _prune(directory, name)
+
+        backup = _describe_file(target_path)
+        backup.pages = pages
+        backup.duration_seconds = duration
+        if verify:
+            backup.verification = verify_backup(str(target_path))
+        return backup
+
+    except Exception as e:
+        partial_path.unlink(missing_ok=True)
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Backup failed") from e
+
+
+def get_backups(sql: Session) -> list[BackupResponse]:
+    _, name = _database_name(get_session_engine(sql))
+    directory = _backup_directory(name)
+    if not directory.is_dir():
+        return []
+    return [_describe_file(path) for path in reversed(_backups(directory, name))]
+
+
+def verify_named_backup(sql: Session, backup_name: str) -> BackupVerification:
+    _, name = _database_name(get_session_engine(sql))
+    path = _backup_directory(name) / Path(backup_name).name
+    if not backup_name.startswith(f"{name}-") or not path.is_file():
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return verify_backup(str(path))
@@ -0,0 +1,61 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.database import SessionRoute, get_read_sql, get_sql
+from app.src.auth.controllers import get_current_admin
+from app.src.backups.controllers import (
+    backup_database,
+    get_backups,
+    verify_named_backup,
+)
+from app.src.backups.schemas import BackupResponse, BackupRun, BackupVerification
+from app.src.jobs.controllers import queue_job
+from app.src.jobs.schemas import JobResponse
+
+router = APIRouter(
+    prefix="/backups",
+    tags=["Backups"],
+    dependencies=[Depends(get_current_admin)],
+    route_class=SessionRoute,
+)
+
+
+@router.get("", summary="Get the stored backups", operation_id="getBackups")
+def endp_get_backups(
+    sql: Annotated[Session, Depends(get_read_sql)],
+) -> list[BackupResponse]:
+    return get_backups(sql=sql)
+
+
+@router.post(
+    "", summary="Back up the database while it serves", operation_id="runBackup"
+)
+def endp_run_backup(
+    sql: Annotated[Session, Depends(get_read_sql)], data: BackupRun
+) -> BackupResponse:
+    return backup_database(sql=sql, verify=data.verify)
+
+
+@router.post(
+    "/jobs",
+    summary="Queue a backup for the job workers",
+    operation_id="queueBackup",
+    status_code=202,
+)
+def endp_queue_backup(
+    sql: Annotated[Session, Depends(get_sql)], data: BackupRun
+) -> JobResponse:
+    return queue_job(sql=sql, kind="backup", payload=data)
+
+
+@router.post(
+    "/{backup_name}/verify",
+    summary="Check the integrity of a backup and count its rows",
+    operation_id="verifyBackup",
+)
+def endp_verify_backup(
+    sql: Annotated[Session, Depends(get_read_sql)], backup_name: str
+) -> BackupVerification:
+    return verify_named_backup(sql=sql, backup_name=backup_name)
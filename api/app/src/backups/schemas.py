@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class BackupRun(BaseModel):
+    verify: bool = True
+
+
+class BackupVerification(BaseModel):
+    ok: bool
+    # "ok" or the problems PRAGMA integrity_check found
+    integrity: list[str]
+    row_counts: dict[str, int]
+
+
+class BackupResponse(BaseModel):
+    name: str
+    size_bytes: int
+    created_at: datetime
+    pages: int | None = None
+    duration_seconds: float | None = None
+    verification: BackupVerification | None = None
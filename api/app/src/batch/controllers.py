@@ -0,0 +1,168 @@
+import logging
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, create_model
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import begin_read_snapshot
+from app.filters import ListQuery
+from app.src.batch.schemas import BatchOperation, BatchResult
+from app.src.categories.controllers import get_categories, get_category
+from app.src.courses.controllers import get_course, get_courses
+from app.src.courses.schemas import CourseFilter
+from app.src.enrollments.controllers import get_enrollment, get_enrollments
+from app.src.enrollments.schemas import EnrollmentFilter
+from app.src.roles.controllers import get_role, get_roles
+from app.src.task_completions.controllers import (
+    get_task_completion,
+    get_task_completions,
+)
+from app.src.task_completions.schemas import TaskCompletionFilter
+from app.src.tasks.controllers import get_task, get_tasks
+from app.src.tasks.schemas import TaskFilter
+from app.src.users.controllers import (
+    get_user,
+    get_user_tasks_and_courses,
+    get_users,
+)
+
+logger = logging.getLogger(__name__)
+
+BatchHandler = Callable[[Session, dict[str, Any]], Any]
+
+
+class _NoParams(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+
+def _list_operation(controller: Callable, filter_model: type[ListQuery] | None):
+    def run(sql: Session, params: dict[str, Any]) -> Any:
+        if filter_model is None:
+            _NoParams.model_validate(params)
+            return controller(sql)
+        return controller(sql, filters=filter_model.model_validate(params))
+
+    return run
+
+
+def _detail_operation(controller: Callable, id_param: str):
+    params_model = create_model(
+        f"{id_param}_params",
+        __config__=ConfigDict(extra="forbid"),
+        **{id_param: (int, Field(..., ge=1))},
+    )
+
+    def run(sql: Session, params: dict[str, Any]) -> Any:
+        return controller(sql, **params_model.model_validate(params).model_dump())
+
+    return run
+
+
+# Only read operations, keyed by the operation_id of the matching route
+OPERATIONS: dict[str, BatchHandler] = {
+    "getRoles": _list_operation(get_roles, None),
+    "getRole": _detail_operation(get_role, "role_id"),
+    "getUsers": _list_operation(get_users, None),
+    "getUser": _detail_operation(get_user, "user_id"),
+    "getUserTasksAndCourses": _detail_operation(get_user_tasks_and_courses, "user_id"),
+    "getCategories": _list_operation(get_categories, None),
+    "getCategory": _detail_operation(get_category, "category_id"),
+    "getCourses": _list_operation(get_courses, CourseFilter),
+    "getCourse": _detail_operation(get_course, "course_id"),
+    "getTasks": _list_operation(get_tasks, TaskFilter),
+    "getTask": _detail_operation(get_task, "task_id"),
+    "getEnrollments": _list_operation(get_enrollments, EnrollmentFilter),
+    "getEnrollment": _detail_operation(get_enrollment, "enrollment_id"),
+    "getTaskCompletions": _list_operation(get_task_completions, TaskCompletionFilter),
+    "getTaskCompletion": _detail_operation(get_task_completion, "task_completion_id"),
+}
+
+# Detail reads whose rows can be loaded up front with a single IN query
+_PREFETCH: dict[str, tuple[type, str]] = {
+    "getRole": (models.Role, "role_id"),
+    "getUser": (models.User, "user_id"),
+    "getCategory": (models.Category, "category_id"),
+    "getCourse": (models.Course, "course_id"),
+    "getTask": (models.Task, "task_id"),
+    "getEnrollment": (models.Enrollment, "enrollment_id"),
+    "getTaskCompletion": (models.TaskCompletion, "task_completion_id"),
+}
+
+
+def _prefetch(sql: Session, operations: list[BatchOperation]) -> list[Any]:
+    # Rows land in the identity map, so the sql.get calls of the controllers
+    # are answered without another round trip. The identity map only holds weak
+    # references, the caller has to keep the returned rows alive.
+    rows: list[Any] = []
+    ids: dict[tuple[type, str], set[int]] = defaultdict(set)
+    for operation in operations:
+        if operation.operation_id not in _PREFETCH:
+            continue
+        model, id_param = _PREFETCH[operation.operation_id]
+        value = operation.params.get(id_param)
+        if isinstance(value, int):
+            ids[(model, id_param)].add(value)
+
+    for (model, id_param), values in ids.items():
+        if len(values) > 1:
+            rows.extend(
+                sql.execute(select(model).where(getattr(model, id_param).in_(values)))
+                .scalars()
+                .all()
+            )
+    return rows
+
+
+def _run_operation(sql: Session, operation: BatchOperation) -> BatchResult:
+    handler = OPERATIONS.get(operation.operation_id)
+    if handler is None:
+        return BatchResult(
+            operation_id=operation.operation_id,
+            status=404,
+            body={"detail": "Unknown operation"},
+        )
+
+    try:
+        body = handler(sql, operation.params)
+        return BatchResult(
+            operation_id=operation.operation_id,
+            status=200,
+            body=jsonable_encoder(body),
+        )
+
+    except ValidationError as e:
+        return BatchResult(
+            operation_id=operation.operation_id,
+            status=422,
+            body={"detail": jsonable_encoder(e.errors(include_url=False))},
+        )
+
+    except HTTPException as e:
+        return BatchResult(
+            operation_id=operation.operation_id,
+            status=e.status_code,
+            body={"detail": e.detail},
+        )
+
+
+def run_batch(sql: Session, operations: list[BatchOperation]) -> list[BatchResult]:
+    try:
+        # Every sub-request sees the same snapshot
+        begin_read_snapshot(sql)
+        prefetched = _prefetch(sql, operations)
+        results = [_run_operation(sql, operation) for operation in operations]
+        del prefetched
+        return results
+
+    except Exception as e:
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+    finally:
+        sql.rollback()
@@ -0,0 +1,18 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Depends
+from sqlalchemy.orm import Session
+
+from app.database import SessionRoute, get_read_sql
+from app.src.batch.controllers import run_batch
+from app.src.batch.schemas import BatchOperation, BatchResult
+
+router = APIRouter(prefix="/batch", tags=["Batch"], route_class=SessionRoute)
+
+
+@router.post("", summary="Run several read operations at once", operation_id="batch")
+def endp_batch(
+    sql: Annotated[Session, Depends(get_read_sql)],
+    operations: Annotated[list[BatchOperation], Body(min_length=1, max_length=50)],
+) -> list[BatchResult]:
+    return run_batch(sql=sql, operations=operations)
@@ -0,0 +1,14 @@
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class BatchOperation(BaseModel):
+    operation_id: str = Field(..., examples=["getCourse"])
+    params: dict[str, Any] = Field(default_factory=dict, examples=[{"course_id": 1}])
+
+
+class BatchResult(BaseModel):
+    operation_id: str
+    status: int
+    body: Any = None
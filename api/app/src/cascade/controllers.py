@@ -0,0 +1,302 @@
+import logging
+from collections.abc import Sequence
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, Row, and_, exists, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.cache import invalidate
+from app.existence import TRACKED_MODELS, is_active, mark_active
+from app.src.cascade.schemas import CascadeEntity, CascadeResult
+from app.src.enrollments.schemas import EnrollmentResponse
+from app.src.events.controllers import record_event
+from app.src.task_completions.schemas import TaskCompletionResponse
+from app.src.tasks.schemas import TaskResponse
+
+logger = logging.getLogger(__name__)
+
+ROOTS: dict[CascadeEntity, type] = {
+    "category": models.Category,
+    "course": models.Course,
+    "user": models.User,
+}
+
+RESULT_KEYS: dict[type, str] = {
+    models.Category: "categories",
+    models.Course: "courses",
+    models.User: "users",
+    models.Task: "tasks",
+    models.Enrollment: "enrollments",
+    models.TaskCompletion: "task_completions",
+}
+
+# Rows a reactivated row needs to be active, the ones whose deactivation
+# cascades to it. Courses stay active when their teacher is deactivated
+PARENTS: dict[type, tuple[tuple[str, type], ...]] = {
+    models.Course: (("category_id", models.Category),),
+    models.Task: (("course_id", models.Course),),
+    models.Enrollment: (("course_id", models.Course), ("student_id", models.User)),
+    models.TaskCompletion: (
+        ("enrollment_id", models.Enrollment),
+        ("task_id", models.Task),
+    ),
+}
+
+Changes = dict[type, Sequence[Row]]
+
+
+def _primary_key(model: type):
+    return model.__mapper__.primary_key[0]
+
+
+def _parents_active(model: type) -> list[ColumnElement]:
+    return [
+        exists().where(
+            _primary_key(parent) == getattr(model, column),
+            parent.is_active == True,  # noqa: E712
+        )
+        for column, parent in PARENTS.get(model, ())
+    ]
+
+
+def _set_active(
+    sql: Session,
+    model: type,
+    where: ColumnElement,
+    active: bool,
+    stamp: datetime | None,
+    changes: Changes,
+) -> list[int]:
+    """Flip is_active of the matching rows in one UPDATE, returns their ids.
+
+    A cascade stamps every row it deactivates with the same deactivated_at,
+    reactivation only takes back rows carrying the stamp of its root. Rows
+    deactivated on their own before stay inactive, so do rows with another
+    inactive parent, like enrollments of a user in a course deactivated since.
+    """
+    table = model.__table__
+    if active:
+        condition = and_(
+            where,
+            table.c.is_active == False,  # noqa: E712
+            table.c.deactivated_at == stamp,
+            *_parents_active(model),
+        )
+        values = {"is_active": True, "deactivated_at": None}
+    else:
+        condition = and_(where, table.c.is_active == True)  # noqa: E712
+        values = {"is_active": False, "deactivated_at": stamp}
+
+    rows = sql.execute(
+        update(table).where(condition).values(**values).returning(*table.c)
+    ).all()
+    changes[model] = [*changes.get(model, ()), *rows]
+    primary_key = _primary_key(model).name
+    return [getattr(row, primary_key) for row in rows]
+
+
+def _cascade_enrollments(
+    sql: Session,
+    enrollments: ColumnElement,
+    active: bool,
+    stamp: datetime | None,
+    changes: Changes,
+) -> None:
+    # Completions follow every enrollment matched, not only the ones flipped,
+    # they may still be active under an enrollment deactivated on its own
+    _set_active(sql, models.Enrollment, enrollments, active, stamp, changes)
+    _set_active(
+        sql,
+        models.TaskCompletion,
+        models.TaskCompletion.enrollment_id.in_(
+            select(models.Enrollment.enrollment_id).where(enrollments)
+        ),
+        active,
+        stamp,
+        changes,
+    )
+
+
+def _cascade_courses(
+    sql: Session,
+    course_ids: list[int],
+    active: bool,
+    stamp: datetime | None,
+    changes: Changes,
+) -> None:
+    if not course_ids:
+        return
+    _set_active(
+        sql,
+        models.Task,
+        models.Task.course_id.in_(course_ids),
+        active,
+        stamp,
+        changes,
+    )
+    _cascade_enrollments(
+        sql, models.Enrollment.course_id.in_(course_ids), active, stamp, changes
+    )
+
+
+def _cascade(
+    sql: Session,
+    entity: CascadeEntity,
+    entity_id: int,
+    active: bool,
+    stamp: datetime | None,
+    changes: Changes,
+) -> None:
+    if entity == "category":
+        course_ids = _set_active(
+            sql,
+            models.Course,
+            models.Course.category_id == entity_id,
+            active,
+            stamp,
+            changes,
+        )
+        _cascade_courses(sql, course_ids, active, stamp, changes)
+    elif entity == "course":
+        _cascade_courses(sql, [entity_id], active, stamp, changes)
+    else:
+        # Only what the user owns as a student, courses they teach stay
+        _cascade_enrollments(
+            sql, models.Enrollment.student_id == entity_id, active, stamp, changes
+        )
+
+
+def _record_events(sql: Session, changes: Changes, active: bool) -> None:
+    action = "updated" if active else "deleted"
+    enrollments: dict[int, tuple[int, int]] = {}
+    for row in changes.get(models.Enrollment, ()):
+        enrollments[row.enrollment_id] = (row.course_id, row.student_id)
+        record_event(
+            sql,
+            "enrollment",
+            row.enrollment_id,
+            action,
+            EnrollmentResponse.model_validate(row, from_attributes=True),
+            course_id=row.course_id,
+            student_id=row.student_id,
+        )
+    for row in changes.get(models.Task, ()):
+        record_event(
+            sql,
+            "task",
+            row.task_id,
+            action,
+            TaskResponse.model_validate(row, from_attributes=True),
+            course_id=row.course_id,
+        )
+
+    completions = changes.get(models.TaskCompletion, ())
+    missing = {row.enrollment_id for row in completions} - enrollments.keys()
+    if missing:
+        enrollments.update(
+            (enrollment_id, (course_id, student_id))
+            for enrollment_id, course_id, student_id in sql.execute(
+                select(
+                    models.Enrollment.enrollment_id,
+                    models.Enrollment.course_id,
+                    models.Enrollment.student_id,
+                ).where(models.Enrollment.enrollment_id.in_(missing))
+            )
+        )
+    for row in completions:
+        course_id, student_id = enrollments.get(row.enrollment_id, (None, None))
+        record_event(
+            sql,
+            "task_completion",
+            row.task_completion_id,
+            action,
+            TaskCompletionResponse.model_validate(row, from_attributes=True),
+            course_id=course_id,
+            student_id=student_id,
+        )
+
+
+def _invalidate(sql: Session, changes: Changes) -> None:
+    categories = changes.get(models.Category, ())
+    invalidate(sql, "category", *(row.category_id for row in categories))
+    course_ids = {row.course_id for row in changes.get(models.Course, ())}
+    invalidate(sql, "course", *course_ids)
+    tasks = changes.get(models.Task, ())
+    invalidate(sql, "task", *(row.task_id for row in tasks))
+    invalidate(sql, "course_tasks", *course_ids, *(row.course_id for row in tasks))
+
+
+def _after_commit(sql: Session, changes: Changes, active: bool) -> None:
+    for model, rows in changes.items():
+        if model in TRACKED_MODELS:
+            primary_key = _primary_key(model).name
+            for row in rows:
+                mark_active(sql, model, getattr(row, primary_key), active)
+
+
+def _check_parents(sql: Session, model: type, entity_id: int) -> None:
+    # A reactivated course would otherwise hang off an inactive category
+    for column, parent in PARENTS.get(model, ()):
+        parent_id = sql.execute(
+            select(getattr(model, column)).where(_primary_key(model) == entity_id)
+        ).scalar_one()
+        if not is_active(sql, parent, parent_id):
+            raise HTTPException(
+                status_code=409, detail=f"{parent.__name__} is inactive"
+            )
+
+
+def set_active(
+    sql: Session, entity: CascadeEntity, entity_id: int, active: bool
+) -> CascadeResult:
+    """Deactivate or reactivate a row together with everything below it.
+
+    Categories take their courses along, courses their tasks and
+    enrollments, enrollments their task completions, users their
+    enrollments. Every level is one UPDATE ... RETURNING over the ids of the
+    level above, all in one transaction. Returns the number of rows flipped
+    per table, zero when the row already was in that state.
+    """
+    model = ROOTS[entity]
+    primary_key = _primary_key(model)
+    try:
+        root = sql.execute(
+            select(model.is_active, model.deactivated_at).where(
+                primary_key == entity_id
+            )
+        ).first()
+        if root is None:
+            raise HTTPException(
+                status_code=404, detail=f"{entity.capitalize()} not found"
+            )
+        if active and not root.is_active:
+            _check_parents(sql, model, entity_id)
+
+        stamp = root.deactivated_at if active else datetime.utcnow()
+        changes: Changes = {}
+        flipped = _set_active(
+            sql, model, primary_key == entity_id, active, stamp, changes
+        )
+        # Rows deactivated before cascades existed carry no shared stamp,
+        # their children can't be told apart and stay as they are
+        if flipped and (stamp is not None or not active):
+            _cascade(sql, entity, entity_id, active, stamp, changes)
+
+        _record_events(sql, changes, active)
+        _invalidate(sql, changes)
+        sql.commit()
+        _after_commit(sql, changes, active)
+        return CascadeResult(
+            **{RESULT_KEYS[model]: len(rows) for model, rows in changes.items()}
+        )
+
+    except HTTPException as e:
+        sql.rollback()
+        raise e
+
+    except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
@@ -0,0 +1,14 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+CascadeEntity = Literal["category", "course", "user"]
+
+
+class CascadeResult(BaseModel):
+    categories: int = 0
+    courses: int = 0
+    users: int = 0
+    tasks: int = 0
+    enrollments: int = 0
+    task_completions: int = 0
@@ -1,8 +1,22 @@
+import logging
 from app.src.categories.schemas import CategoryResponse, CategoryCreate, CategoryUpdate
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app import models
+from app.cache import cached, invalidate
+from app.existence import mark_active
+from app.src.cascade.controllers import set_active
+
+logger = logging.getLogger(__name__)
+
+
+def _cached_category(sql: Session, category_id: int) -> CategoryResponse | None:
+    def load() -> CategoryResponse | None:
+        category: models.Category | None = sql.get(models.Category, category_id)
+        return None if category is None else CategoryResponse.model_validate(category)
+
+    return cached(sql, "category", category_id, load)
 
 
 def get_categories(sql: Session) -> list[CategoryResponse]:
@@ -11,7 +25,7 @@ def get_categories(sql: Session) -> list[CategoryResponse]:
         return [CategoryResponse.model_validate(category) for category in categories]
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -20,15 +34,20 @@ def create_category(sql: Session, data: CategoryCreate) -> CategoryResponse:
         new_category = models.Category(**data.model_dump())
 
         sql.add(new_category)
+        sql.flush()
+        invalidate(sql, "category", new_category.category_id)
         sql.commit()
         sql.refresh(new_category)
+        mark_active(
+            sql, models.Category, new_category.category_id, new_category.is_active
+        )
         return CategoryResponse.model_validate(new_category)
 
     except IntegrityError as e:
         raise HTTPException(status_code=400, detail=str(e.orig)) from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -40,11 +59,19 @@ def update_category(
         if category is None:
             raise HTTPException(status_code=404, detail="Category not found")
 
-        for key, value in data.model_dump(exclude_unset=True).items():
+        for key, value in data.model_dump(
+            exclude_unset=True, exclude={"is_active"}
+        ).items():
             setattr(category, key, value)
 
-        sql.commit()
+        invalidate(sql, "category", category.category_id)
+        if data.is_active is not None:
+            # Cascades like deactivate and reactivate, commits the rest too
+            set_active(sql, "category", category.category_id, data.is_active)
+        else:
+            sql.commit()
         sql.refresh(category)
+        mark_active(sql, models.Category, category.category_id, category.is_active)
         return CategoryResponse.model_validate(category)
 
     except HTTPException as e:
@@ -54,36 +81,24 @@ def update_category(
         raise HTTPException(status_code=400, detail=str(e.orig)) from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
 def get_category(sql: Session, category_id: int) -> CategoryResponse:
     try:
-        category: models.Category | None = sql.get(models.Category, category_id)
+        category = _cached_category(sql, category_id)
         if category is None or not category.is_active:
             raise HTTPException(status_code=404, detail="Category not found")
 
-        return CategoryResponse.model_validate(category)
+        return category
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
 def delete_category(sql: Session, category_id: int):
-    try:
-        category: models.Category | None = sql.get(models.Category, category_id)
-        if category is None:
-            raise HTTPException(status_code=404, detail="Category not found")
-
-        category.is_active = False
-        sql.commit()
-        sql.refresh(category)
-    except HTTPException as e:
-        raise e
-
-    except Exception as e:
-        print(e)
-        raise HTTPException(status_code=500, detail="Internal server error") from e
+    # Soft delete, its courses and everything below them go with it
+    set_active(sql, "category", category_id, False)
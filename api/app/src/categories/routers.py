@@ -1,6 +1,10 @@
 from typing import Annotated
 from app.annotations import ID_PATH_ANNOTATION
-from app.database import get_sql
+from app.database import SessionRoute, get_sql
+from app.idempotency import idempotent
+from app.src.auth.controllers import get_current_admin
+from app.src.cascade.controllers import set_active
+from app.src.cascade.schemas import CascadeResult
 from app.src.categories.controllers import (
     create_category,
     get_categories,
@@ -13,7 +17,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 
-router = APIRouter(prefix="/categories", tags=["Categories"])
+router = APIRouter(prefix="/categories", tags=["Categories"], route_class=SessionRoute)
 
 
 @router.get("", summary="Get all categories", operation_id="getCategories")
@@ -23,7 +27,12 @@ def endp_get_categories(
     return get_categories(sql)
 
 
-@router.post("", summary="Create a category", operation_id="createCategories")
+@router.post(
+    "",
+    summary="Create a category",
+    operation_id="createCategories",
+    dependencies=[Depends(idempotent)],
+)
 def endp_create_category(
     sql: Annotated[Session, Depends(get_sql)], data: CategoryCreate
 ) -> CategoryResponse:
@@ -58,3 +67,27 @@ def endp_delete_category(
     category_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
 ):
     return delete_category(sql, category_id)
+
+
+@router.post(
+    "/{category_id}/deactivate",
+    summary="Deactivate a category with everything below it",
+    operation_id="deactivateCategory",
+    dependencies=[Depends(get_current_admin)],
+)
+def endp_deactivate_category(
+    category_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
+) -> CascadeResult:
+    return set_active(sql, "category", category_id, False)
+
+
+@router.post(
+    "/{category_id}/reactivate",
+    summary="Reactivate a category with what its deactivation took along",
+    operation_id="reactivateCategory",
+    dependencies=[Depends(get_current_admin)],
+)
+def endp_reactivate_category(
+    category_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
+) -> CascadeResult:
+    return set_active(sql, "category", category_id, True)
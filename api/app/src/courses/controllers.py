@@ -1,17 +1,86 @@
+import csv
+import io
+import logging
+from collections.abc import Iterator
+from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+
+from app.cache import cached, invalidate
+from app.database import begin_read_snapshot
+from app.filters import apply_list_query
+from app.src.archive.controllers import get_archived, select_with_archived
+from app.loaders import Relation, expand_rows
+from app.existence import is_active, mark_active
+from app.src.cascade.controllers import set_active
+from app.src.events.controllers import record_event
+from app.src.tasks.schemas import TaskResponse
 from app.utils import validate_int
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 from app import models
-from app.src.courses.schemas import CourseCreate, CourseResponse, CourseUpdate
+from app.src.courses.schemas import (
+    CourseClone,
+    CourseCloneResponse,
+    CourseCreate,
+    CourseExpand,
+    CourseFilter,
+    CourseResponse,
+    CourseResponseExpanded,
+    CourseUpdate,
+    GradebookFormat,
+    GradebookHeader,
+    GradebookRow,
+    GradebookTask,
+)
+from sqlalchemy import func, insert, literal, select
 from sqlalchemy.exc import IntegrityError
 
+logger = logging.getLogger(__name__)
+
+
+COURSE_RELATIONS: dict[str, Relation] = {
+    "category": Relation(models.Category, "category_id"),
+    "teacher": Relation(
+        models.User, "teacher_id", prime=((models.Role, "role_id"),)
+    ),
+}
+
 
-def get_courses(sql: Session) -> list[CourseResponse]:
+def _course_responses(
+    sql: Session, courses: list[models.Course], expand: list[CourseExpand] | None
+) -> list[CourseResponse]:
+    return expand_rows(
+        sql, courses, CourseResponse, CourseResponseExpanded, COURSE_RELATIONS, expand
+    )
+
+
+def _cached_course(sql: Session, course_id: int) -> CourseResponse | None:
+    def load() -> CourseResponse | None:
+        course: models.Course | None = sql.get(models.Course, course_id)
+        return None if course is None else CourseResponse.model_validate(course)
+
+    return cached(sql, "course", course_id, load)
+
+
+def get_courses(
+    sql: Session, filters: CourseFilter | None = None
+) -> list[CourseResponse]:
     try:
-        courses: list[models.Course] = sql.query(models.Course).all()
-        return [CourseResponse.model_validate(course) for course in courses]
+        if filters and filters.include_archived:
+            courses = sql.execute(
+                select_with_archived(models.Course, filters)
+            ).all()
+        else:
+            courses: list[models.Course] = sql.execute(
+                apply_list_query(
+                    select(models.Course), models.Course.__table__.c, filters
+                )
+            ).scalars().all()
+        return _course_responses(sql, courses, filters.expand if filters else None)
 
     except Exception as e:
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -19,17 +88,18 @@ def create_course(sql: Session, data: CourseCreate) -> CourseResponse:
     try:
         new_course: models.Course = models.Course(**data.model_dump())
 
-        category: models.Category | None = sql.get(models.Category, validate_int(data.category_id))
-        if category is None or not category.is_active:
+        if not is_active(sql, models.Category, data.category_id):
             raise HTTPException(status_code=404, detail="Category not found")
 
-        teacher: models.User | None = sql.get(models.User, validate_int(data.teacher_id))
-        if teacher is None or not teacher.is_active:
+        if not is_active(sql, models.User, data.teacher_id):
             raise HTTPException(status_code=404, detail="Teacher not found")
 
         sql.add(new_course)
+        sql.flush()
+        invalidate(sql, "course", new_course.course_id)
         sql.commit()
         sql.refresh(new_course)
+        mark_active(sql, models.Course, new_course.course_id, new_course.is_active)
 
         return CourseResponse.model_validate(new_course)
     except HTTPException as e:
@@ -41,6 +111,7 @@ def create_course(sql: Session, data: CourseCreate) -> CourseResponse:
 
     except Exception as e:
         sql.rollback()
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -51,66 +122,305 @@ def update_course(sql: Session, data: CourseUpdate, course_id: int) -> CourseRes
             raise HTTPException(status_code=404, detail="Course not found")
 
         if data.category_id is not None:
-            category: models.Category | None = sql.get(
-                models.Category, validate_int(data.category_id)
-            )
-            if category is None or not category.is_active:
+            if not is_active(sql, models.Category, data.category_id):
                 raise HTTPException(status_code=404, detail="Category not found")
 
         if data.teacher_id is not None:
-            teacher: models.User | None = sql.get(
-                models.User, validate_int(data.teacher_id)
-            )
-            if teacher is None or not teacher.is_active:
+            if not is_active(sql, models.User, data.teacher_id):
                 raise HTTPException(status_code=404, detail="Teacher not found")
 
         for var, value in vars(data).items():
-            if value is not None:
+            if value is not None and var != "is_active":
                 setattr(course, var, value)
-        sql.commit()
+        invalidate(sql, "course", course.course_id)
+        if data.is_active is not None:
+            # Cascades like deactivate and reactivate, commits the rest too
+            set_active(sql, "course", course.course_id, data.is_active)
+        else:
+            sql.commit()
         sql.refresh(course)
+        mark_active(sql, models.Course, course.course_id, course.is_active)
         return CourseResponse.model_validate(course)
 
     except HTTPException as e:
         raise e
 
     except IntegrityError as e:
-        print(e)
+        logger.info("Course already exists: %s", e.orig)
         raise HTTPException(status_code=409, detail="Course already exists") from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
-def get_course(sql: Session, course_id: int) -> CourseResponse:
+def get_course(
+    sql: Session,
+    course_id: int,
+    expand: list[CourseExpand] | None = None,
+    include_archived: bool = False,
+) -> CourseResponse:
     try:
-        course: models.Course | None = sql.get(models.Course, course_id)
-        if course is None or not course.is_active:
+        course = _cached_course(sql, course_id)
+        if include_archived and course is None:
+            course = get_archived(sql, models.Course, course_id)
+        elif course is not None and not course.is_active and not include_archived:
+            course = None
+
+        if course is None:
             raise HTTPException(status_code=404, detail="Course not found")
 
-        return CourseResponse.model_validate(course)
+        return _course_responses(sql, [course], expand)[0]
 
     except HTTPException as e:
         raise e
 
     except Exception as e:
         sql.rollback()
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
 def delete_course(sql: Session, course_id: int):
+    # Soft delete, its tasks, enrollments and completions go with it
+    set_active(sql, "course", course_id, False)
+
+
+def clone_course(
+    sql: Session, course_id: int, data: CourseClone
+) -> CourseCloneResponse:
+    """Copy a course and its active tasks in one transaction.
+
+    Both are copied with INSERT ... SELECT, the tasks never pass through
+    Python on the way in. The copies are active whatever the source is.
+    """
     try:
-        course: models.Course | None = sql.get(models.Course, course_id)
-        if course is None:
+        source: models.Course | None = sql.get(models.Course, validate_int(course_id))
+        if source is None or not source.is_active:
             raise HTTPException(status_code=404, detail="Course not found")
 
-        course.is_active = False
+        category_id = data.category_id or source.category_id
+        teacher_id = data.teacher_id or source.teacher_id
+        if not is_active(sql, models.Category, category_id):
+            raise HTTPException(status_code=404, detail="Category not found")
+
+        if not is_active(sql, models.User, teacher_id):
+            raise HTTPException(status_code=404, detail="Teacher not found")
+
+        # INSERT ... SELECT skips Python side defaults
+        now = datetime.utcnow()
+        course = models.Course.__table__
+        new_course_id = sql.execute(
+            insert(course)
+            .from_select(
+                [
+                    "teacher_id",
+                    "category_id",
+                    "title",
+                    "description",
+                    "deadline_in_days",
+                    "is_active",
+                    "updated_at",
+                ],
+                select(
+                    literal(teacher_id),
+                    literal(category_id),
+                    literal(data.title),
+                    course.c.description,
+                    course.c.deadline_in_days,
+                    literal(True),
+                    literal(now, course.c.updated_at.type),
+                ).where(course.c.course_id == source.course_id),
+            )
+            .returning(course.c.course_id)
+        ).scalar_one()
+
+        task = models.Task.__table__
+        tasks = sql.execute(
+            insert(task)
+            .from_select(
+                ["course_id", "title", "description", "is_active", "updated_at"],
+                select(
+                    literal(new_course_id),
+                    task.c.title,
+                    task.c.description,
+                    literal(True),
+                    literal(now, task.c.updated_at.type),
+                )
+                .where(
+                    task.c.course_id == source.course_id,
+                    task.c.is_active == True,  # noqa: E712
+                )
+                .order_by(task.c.task_id),
+            )
+            .returning(*task.c)
+        ).all()
+        for row in tasks:
+            cloned = TaskResponse.model_validate(row, from_attributes=True)
+            record_event(
+                sql, "task", cloned.task_id, "created", cloned, course_id=new_course_id
+            )
+        invalidate(sql, "course", new_course_id)
+        invalidate(sql, "course_tasks", new_course_id)
         sql.commit()
-        sql.refresh(course)
+
+        new_course: models.Course = sql.get(models.Course, new_course_id)
+        mark_active(sql, models.Course, new_course_id)
+        for row in tasks:
+            mark_active(sql, models.Task, row.task_id)
+        return CourseCloneResponse(
+            **CourseResponse.model_validate(new_course).model_dump(),
+            tasks_cloned=len(tasks),
+        )
 
     except HTTPException as e:
         raise e
 
+    except IntegrityError as e:
+        sql.rollback()
+        raise HTTPException(status_code=409, detail="Course already exists") from e
+
     except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+def check_course(sql: Session, course_id: int) -> None:
+    course = _cached_course(sql, validate_int(course_id))
+    if course is None or not course.is_active:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+
+def _gradebook_rows(
+    sql: Session, course_id: int, tasks: list[GradebookTask]
+) -> Iterator[GradebookRow]:
+    """Merge the enrollments and the completions of a course, both by id.
+
+    Completions are read in batches and grouped per enrollment, so only one
+    row of the matrix is built at a time.
+    """
+    task_ids = {task.task_id for task in tasks}
+    enrollments = sql.execute(
+        select(
+            models.Enrollment.enrollment_id,
+            models.Enrollment.student_id,
+            models.User.username,
+            models.User.first_name,
+            models.User.last_name,
+        )
+        .join(models.User, models.User.user_id == models.Enrollment.student_id)
+        .where(
+            models.Enrollment.course_id == course_id,
+            models.Enrollment.is_active == True,  # noqa: E712
+        )
+        .order_by(models.Enrollment.enrollment_id)
+    ).all()
+    # Core rows with the timestamp as stored, ORM row handling and datetime
+    # parsing would take most of the time on large courses
+    completions = sql.connection().execute(
+        select(
+            models.TaskCompletion.enrollment_id,
+            models.TaskCompletion.task_id,
+            func.replace(models.TaskCompletion.completed_at, " ", "T"),
+        )
+        .join(models.Enrollment)
+        .where(
+            models.Enrollment.course_id == course_id,
+            models.Enrollment.is_active == True,  # noqa: E712
+            models.TaskCompletion.is_active == True,  # noqa: E712
+        )
+        .order_by(models.TaskCompletion.enrollment_id)
+        .execution_options(yield_per=1000)
+    )
+
+    groups = groupby(completions, key=itemgetter(0))
+    group = next(groups, None)
+    for enrollment in enrollments:
+        cells: dict[int, str | None] = {}
+        while group is not None and group[0] < enrollment.enrollment_id:
+            group = next(groups, None)
+        if group is not None and group[0] == enrollment.enrollment_id:
+            cells = {
+                task_id: completed_at
+                for _, task_id, completed_at in group[1]
+                if task_id in task_ids
+            }
+            group = next(groups, None)
+        yield GradebookRow(**enrollment._mapping, completions=cells)
+
+
+def _gradebook_json(header: GradebookHeader, rows: Iterator[GradebookRow]):
+    # The header object stays open, the rows are appended to it
+    yield header.model_dump_json()[:-1] + ',"rows":['
+    for index, row in enumerate(rows):
+        yield ("," if index else "") + row.model_dump_json()
+    yield "]}"
+
+
+def _gradebook_csv(header: GradebookHeader, rows: Iterator[GradebookRow]):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(
+        ["enrollment_id", "student_id", "username", "first_name", "last_name"]
+        + [f"{task.title} (#{task.task_id})" for task in header.tasks]
+    )
+    for row in rows:
+        cells = []
+        for task in header.tasks:
+            if task.task_id not in row.completions:
+                cells.append("")
+            else:
+                completed_at = row.completions[task.task_id]
+                cells.append(completed_at or "completed")
+        writer.writerow(
+            [
+                row.enrollment_id,
+                row.student_id,
+                row.username,
+                row.first_name,
+                row.last_name,
+                *cells,
+            ]
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_gradebook(
+    sessions: sessionmaker, course_id: int, response_format: GradebookFormat
+) -> Iterator[str]:
+    """Students x tasks matrix of a course, serialized row by row.
+
+    The stream outlives the request session, it reads through its own
+    session in one snapshot.
+    """
+    with sessions() as sql:
+        begin_read_snapshot(sql)
+        tasks = [
+            GradebookTask.model_validate(task, from_attributes=True)
+            for task in sql.execute(
+                select(models.Task.task_id, models.Task.title)
+                .where(
+                    models.Task.course_id == course_id,
+                    models.Task.is_active == True,  # noqa: E712
+                )
+                .order_by(models.Task.task_id)
+            )
+        ]
+        header = GradebookHeader(course_id=course_id, tasks=tasks)
+        rows = _gradebook_rows(sql, course_id, tasks)
+        if response_format == "csv":
+            parts = _gradebook_csv(header, rows)
+        else:
+            parts = _gradebook_json(header, rows)
+
+        # Every chunk is a hop to the event loop, send rows in batches
+        batch: list[str] = []
+        for part in parts:
+            batch.append(part)
+            if len(batch) == 100:
+                yield "".join(batch)
+                batch.clear()
+        yield "".join(batch)
@@ -1,31 +1,62 @@
 from typing import Annotated
 
-from app.annotations import ID_PATH_ANNOTATION
+from app.annotations import ID_PATH_ANNOTATION, comma_separated
+from app.coalescing import coalesce
+from app.idempotency import idempotent
+from app.src.auth.controllers import get_current_admin
+from app.src.cascade.controllers import set_active
+from app.src.cascade.schemas import CascadeResult
 from app.src.courses.controllers import (
+    check_course,
+    clone_course,
     create_course,
     delete_course,
     get_course,
     update_course,
     get_courses,
+    stream_gradebook,
 )
-from app.src.courses.schemas import CourseCreate, CourseResponse, CourseUpdate
-from fastapi import APIRouter, Depends
+from app.src.courses.schemas import (
+    CourseClone,
+    CourseCloneResponse,
+    CourseCreate,
+    CourseExpand,
+    CourseFilter,
+    CourseResponse,
+    CourseResponseExpanded,
+    CourseUpdate,
+    GradebookFormat,
+)
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
-from app.database import get_sql
+from app.database import SessionRoute, get_sessions, get_sql
 
-router = APIRouter(prefix="/courses", tags=["Courses"])
+router = APIRouter(prefix="/courses", tags=["Courses"], route_class=SessionRoute)
 
 
-@router.get("", summary="Get all courses", operation_id="getCourses")
+@router.get(
+    "",
+    summary="Get all courses",
+    operation_id="getCourses",
+    response_model_exclude_unset=True,
+    dependencies=[Depends(coalesce)],
+)
 def endp_get_courses(
     sql: Annotated[Session, Depends(get_sql)],
-) -> list[CourseResponse]:
-    return get_courses(sql=sql)
+    filters: Annotated[CourseFilter, Query()],
+) -> list[CourseResponseExpanded]:
+    return get_courses(sql=sql, filters=filters)
 
 
-@router.post("", summary="Create a course", operation_id="createCourses")
+@router.post(
+    "",
+    summary="Create a course",
+    operation_id="createCourses",
+    dependencies=[Depends(idempotent)],
+)
 def endp_create_course(
     sql: Annotated[Session, Depends(get_sql)], data: CourseCreate
 ) -> CourseResponse:
@@ -41,11 +72,25 @@ def endp_update_course(
     return update_course(sql=sql, data=data, course_id=course_id)
 
 
-@router.get("/{course_id}", summary="Get a course", operation_id="getCourse")
+@router.get(
+    "/{course_id}",
+    summary="Get a course",
+    operation_id="getCourse",
+    response_model_exclude_unset=True,
+    dependencies=[Depends(coalesce)],
+)
 def endp_get_course(
-    sql: Annotated[Session, Depends(get_sql)], course_id: ID_PATH_ANNOTATION
-) -> CourseResponse:
-    return get_course(sql=sql, course_id=course_id)
+    sql: Annotated[Session, Depends(get_sql)],
+    course_id: ID_PATH_ANNOTATION,
+    expand: Annotated[comma_separated(CourseExpand), Query()] = (),
+    include_archived: bool = False,
+) -> CourseResponseExpanded:
+    return get_course(
+        sql=sql,
+        course_id=course_id,
+        expand=expand,
+        include_archived=include_archived,
+    )
 
 
 @router.delete("/{course_id}", summary="Delete a course", operation_id="deleteCourse", status_code=204)
@@ -53,3 +98,67 @@ def endp_delete_course(
     course_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
 ) -> None:
     return delete_course(sql=sql, course_id=course_id)
+
+
+@router.post(
+    "/{course_id}/clone",
+    summary="Copy a course with its active tasks",
+    operation_id="cloneCourse",
+    dependencies=[Depends(idempotent)],
+)
+def endp_clone_course(
+    course_id: ID_PATH_ANNOTATION,
+    sql: Annotated[Session, Depends(get_sql)],
+    data: CourseClone,
+) -> CourseCloneResponse:
+    return clone_course(sql=sql, course_id=course_id, data=data)
+
+
+@router.post(
+    "/{course_id}/deactivate",
+    summary="Deactivate a course with everything below it",
+    operation_id="deactivateCourse",
+    dependencies=[Depends(get_current_admin)],
+)
+def endp_deactivate_course(
+    course_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
+) -> CascadeResult:
+    return set_active(sql, "course", course_id, False)
+
+
+@router.post(
+    "/{course_id}/reactivate",
+    summary="Reactivate a course with what its deactivation took along",
+    operation_id="reactivateCourse",
+    dependencies=[Depends(get_current_admin)],
+)
+def endp_reactivate_course(
+    course_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
+) -> CascadeResult:
+    return set_active(sql, "course", course_id, True)
+
+
+@router.get(
+    "/{course_id}/gradebook",
+    summary="Get the students x tasks completion matrix of a course",
+    operation_id="getCourseGradebook",
+    response_class=StreamingResponse,
+)
+def endp_get_course_gradebook(
+    sql: Annotated[Session, Depends(get_sql)],
+    sessions: Annotated[sessionmaker, Depends(get_sessions)],
+    course_id: ID_PATH_ANNOTATION,
+    response_format: Annotated[GradebookFormat, Query(alias="format")] = "json",
+) -> StreamingResponse:
+    check_course(sql=sql, course_id=course_id)
+    media_type = "text/csv" if response_format == "csv" else "application/json"
+    headers = {}
+    if response_format == "csv":
+        headers["Content-Disposition"] = (
+            f'attachment; filename="gradebook-{course_id}.csv"'
+        )
+    return StreamingResponse(
+        stream_gradebook(sessions, course_id, response_format),
+        media_type=media_type,
+        headers=headers,
+    )
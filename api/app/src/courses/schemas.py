@@ -1,6 +1,15 @@
+from typing import TYPE_CHECKING, Literal
+
 from pydantic import BaseModel, ConfigDict, Field
-# from ..categories.schemas import CategoryResponse
-# from ..users.schemas import UserResponse
+from app.annotations import comma_separated
+from app.filters import ListQuery
+from app.src.categories.schemas import CategoryResponse
+
+if TYPE_CHECKING:
+    # users.schemas imports this module, the reference is resolved there
+    from app.src.users.schemas import UserResponse
+
+CourseExpand = Literal["category", "teacher"]
 
 
 class CourseBase(BaseModel):
@@ -18,16 +27,62 @@ class CourseCreate(CourseBase):
 
 class CourseResponse(CourseBase):
     course_id: int
-    # category: CategoryResponse | None = None
-    # teacher: UserResponse | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class CourseResponseExpanded(CourseResponse):
+    category: CategoryResponse | None = None
+    teacher: "UserResponse | None" = None
+
+
 class CourseUpdate(BaseModel):
     title: str | None = Field(None, min_length=3, max_length=50)
     description: str | None = Field(None, max_length=100)
     category_id: int | None = None
     teacher_id: int | None = None
     deadline_in_days: int | None = None
-    is_active: bool | None = None
\ No newline at end of file
+    is_active: bool | None = None
+
+
+class CourseClone(BaseModel):
+    title: str = Field(..., min_length=3, max_length=50)
+    # The source course's when not given
+    category_id: int | None = None
+    teacher_id: int | None = None
+
+
+class CourseCloneResponse(CourseResponse):
+    tasks_cloned: int
+
+
+class CourseFilter(ListQuery):
+    teacher_id: int | None = None
+    category_id: int | None = None
+    is_active: bool | None = None
+    include_archived: bool = False
+    sort: Literal["course_id", "-course_id", "title", "-title"] | None = None
+    expand: comma_separated(CourseExpand) = []
+
+
+GradebookFormat = Literal["json", "csv"]
+
+
+class GradebookTask(BaseModel):
+    task_id: int
+    title: str
+
+
+class GradebookHeader(BaseModel):
+    course_id: int
+    tasks: list[GradebookTask]
+
+
+class GradebookRow(BaseModel):
+    enrollment_id: int
+    student_id: int
+    username: str
+    first_name: str
+    last_name: str
+    # task_id -> ISO completed_at of the completed tasks, missing ones are open
+    completions: dict[int, str | None]
@@ -1,10 +1,19 @@
-from app.utils import validate_int
+import logging
+
+from app.filters import apply_list_query
+from app.src.archive.controllers import get_archived, select_with_archived
+from app.loaders import Relation, expand_rows
+from app.existence import is_active, mark_active
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app import models
+from app.src.events.controllers import record_event
 from app.src.enrollments.schemas import (
     EnrollmentCreate,
+    EnrollmentExpand,
+    EnrollmentFilter,
     EnrollmentResponse,
+    EnrollmentResponseExpanded,
     EnrollmentUpdate,
     EnrollmentResponseTasks,
 )
@@ -12,42 +21,90 @@ from app.src.enrollments.schemas import (
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func, select, and_
 
-
-def get_enrollments(sql: Session) -> list[EnrollmentResponse]:
+logger = logging.getLogger(__name__)
+
+
+def _record_enrollment_event(
+    sql: Session, enrollment: models.Enrollment, action: str
+) -> None:
+    record_event(
+        sql,
+        "enrollment",
+        enrollment.enrollment_id,
+        action,
+        EnrollmentResponse.model_validate(enrollment),
+        course_id=enrollment.course_id,
+        student_id=enrollment.student_id,
+    )
+
+
+ENROLLMENT_RELATIONS: dict[str, Relation] = {
+    "student": Relation(models.User, "student_id", prime=((models.Role, "role_id"),)),
+    "course": Relation(models.Course, "course_id"),
+    "assigner": Relation(
+        models.User, "assigner_id", prime=((models.Role, "role_id"),)
+    ),
+}
+
+
+def _enrollment_responses(
+    sql: Session,
+    enrollments: list[models.Enrollment],
+    expand: list[EnrollmentExpand] | None,
+) -> list[EnrollmentResponse]:
+    return expand_rows(
+        sql,
+        enrollments,
+        EnrollmentResponse,
+        EnrollmentResponseExpanded,
+        ENROLLMENT_RELATIONS,
+        expand,
+    )
+
+
+def get_enrollments(
+    sql: Session, filters: EnrollmentFilter | None = None
+) -> list[EnrollmentResponse]:
     try:
-        enrollments: list[models.Enrollment] = sql.query(models.Enrollment).all()
-        return [
-            EnrollmentResponse.model_validate(enrollment) for enrollment in enrollments
-        ]
+        if filters and filters.include_archived:
+            enrollments = sql.execute(
+                select_with_archived(models.Enrollment, filters)
+            ).all()
+        else:
+            enrollments: list[models.Enrollment] = sql.execute(
+                apply_list_query(
+                    select(models.Enrollment), models.Enrollment.__table__.c, filters
+                )
+            ).scalars().all()
+        return _enrollment_responses(
+            sql, enrollments, filters.expand if filters else None
+        )
 
     except Exception as e:
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
 def create_enrollment(sql: Session, data: EnrollmentCreate) -> EnrollmentResponse:
     try:
-        student: models.User | None = sql.get(
-            models.User, validate_int(data.student_id)
-        )
-        if student is None or not student.is_active:
+        if not is_active(sql, models.User, data.student_id):
             raise HTTPException(status_code=404, detail="Student not found")
 
-        course: models.Course | None = sql.get(
-            models.Course, validate_int(data.course_id)
-        )
-        if course is None or not course.is_active:
+        if not is_active(sql, models.Course, data.course_id):
             raise HTTPException(status_code=404, detail="Course not found")
 
-        assigner: models.User | None = sql.get(
-            models.User, validate_int(data.assigner_id)
-        )
-        if assigner is None or not assigner.is_active:
+        if not is_active(sql, models.User, data.assigner_id):
             raise HTTPException(status_code=404, detail="Assigner not found")
 
         new_enrollment: models.Enrollment = models.Enrollment(**data.model_dump())
         sql.add(new_enrollment)
+        sql.flush()
+        _record_enrollment_event(sql, new_enrollment, "created")
         sql.commit()
         sql.refresh(new_enrollment)
+        mark_active(
+            sql, models.Enrollment, new_enrollment.enrollment_id, new_enrollment.is_active
+        )
 
         return EnrollmentResponse.model_validate(new_enrollment)
 
@@ -63,6 +120,7 @@ def create_enrollment(sql: Session, data: EnrollmentCreate) -> EnrollmentRespons
 
     except Exception as e:
         sql.rollback()
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -77,32 +135,27 @@ def update_enrollment(
             )
 
         if data.student_id is not None:
-            student: models.User | None = sql.get(
-                models.User, validate_int(data.student_id)
-            )
-            if student is None or not student.is_active:
+            if not is_active(sql, models.User, data.student_id):
                 raise HTTPException(status_code=404, detail="Student not found")
 
         if data.course_id is not None:
-            course: models.Course | None = sql.get(
-                models.User, validate_int(data.course_id)
-            )
-            if course is None or not course.is_active:
+            if not is_active(sql, models.Course, data.course_id):
                 raise HTTPException(status_code=404, detail="Course not found")
 
         if data.assigner_id is not None:
-            assigner: models.User | None = sql.get(
-                models.User, validate_int(data.assigner_id)
-            )
-            if assigner is None or not assigner.is_active:
+            if not is_active(sql, models.User, data.assigner_id):
                 raise HTTPException(status_code=404, detail="Assigner not found")
 
         for key, value in data.model_dump(exclude_unset=True).items():
             if value is not None:
                 setattr(enrollment, key, value)
 
+        _record_enrollment_event(sql, enrollment, "updated")
         sql.commit()
         sql.refresh(enrollment)
+        mark_active(
+            sql, models.Enrollment, enrollment.enrollment_id, enrollment.is_active
+        )
         return EnrollmentResponse.model_validate(enrollment)
 
     except HTTPException as e:
@@ -116,22 +169,38 @@ def update_enrollment(
 
     except Exception as e:
         sql.rollback()
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
-def get_enrollment(sql: Session, enrollment_id: int) -> EnrollmentResponse:
+def get_enrollment(
+    sql: Session,
+    enrollment_id: int,
+    expand: list[EnrollmentExpand] | None = None,
+    include_archived: bool = False,
+) -> EnrollmentResponse:
     try:
         enrollment: models.Enrollment | None = sql.get(models.Enrollment, enrollment_id)
-        if enrollment is None or not enrollment.is_active:
+        if include_archived and enrollment is None:
+            enrollment = get_archived(sql, models.Enrollment, enrollment_id)
+        elif (
+            enrollment is not None
+            and not enrollment.is_active
+            and not include_archived
+        ):
+            enrollment = None
+
+        if enrollment is None:
             raise HTTPException(
                 status_code=404, detail="Student course enrollment not found"
             )
-        return EnrollmentResponse.model_validate(enrollment)
+        return _enrollment_responses(sql, [enrollment], expand)[0]
 
     except HTTPException as e:
         raise e
 
     except Exception as e:
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -144,14 +213,17 @@ def delete_enrollment(sql: Session, enrollment_id: int):
             )
 
         enrollment.is_active = False
+        _record_enrollment_event(sql, enrollment, "deleted")
         sql.commit()
         sql.refresh(enrollment)
+        mark_active(sql, models.Enrollment, enrollment.enrollment_id, False)
 
     except HTTPException as e:
         raise e
 
     except Exception as e:
         sql.rollback()
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -204,4 +276,5 @@ def get_task_completions_for_user(
         raise e
 
     except Exception as e:
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
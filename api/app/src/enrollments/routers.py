@@ -1,6 +1,7 @@
 from typing import Annotated
 
-from app.annotations import ID_PATH_ANNOTATION
+from app.annotations import ID_PATH_ANNOTATION, comma_separated
+from app.idempotency import idempotent
 from app.src.enrollments.controllers import (
     create_enrollment,
     delete_enrollment,
@@ -9,24 +10,42 @@ from app.src.enrollments.controllers import (
     update_enrollment,
     get_task_completions_for_user,
 )
-from app.src.enrollments.schemas import EnrollmentCreate, EnrollmentResponse, EnrollmentUpdate
-from fastapi import APIRouter, Depends
+from app.src.enrollments.schemas import (
+    EnrollmentCreate,
+    EnrollmentExpand,
+    EnrollmentFilter,
+    EnrollmentResponse,
+    EnrollmentResponseExpanded,
+    EnrollmentUpdate,
+)
+from fastapi import APIRouter, Depends, Query
 from app.src.enrollments.schemas import EnrollmentResponseTasks
 from sqlalchemy.orm import Session
 
-from app.database import get_sql
+from app.database import SessionRoute, get_sql
 
-router = APIRouter(prefix="/enrollments", tags=["Enrollments"])
+router = APIRouter(prefix="/enrollments", tags=["Enrollments"], route_class=SessionRoute)
 
 
-@router.get("", summary="Get all student course enrollments", operation_id="getEnrollments")
+@router.get(
+    "",
+    summary="Get all student course enrollments",
+    operation_id="getEnrollments",
+    response_model_exclude_unset=True,
+)
 def endp_get_enrollments(
     sql: Annotated[Session, Depends(get_sql)],
-) -> list[EnrollmentResponse]:
-    return get_enrollments(sql=sql)
+    filters: Annotated[EnrollmentFilter, Query()],
+) -> list[EnrollmentResponseExpanded]:
+    return get_enrollments(sql=sql, filters=filters)
 
 
-@router.post("", summary="Create a student course enrollment", operation_id="createEnrollment")
+@router.post(
+    "",
+    summary="Create a student course enrollment",
+    operation_id="createEnrollment",
+    dependencies=[Depends(idempotent)],
+)
 def endp_create_enrollment(
     sql: Annotated[Session, Depends(get_sql)], data: EnrollmentCreate
 ) -> EnrollmentResponse:
@@ -43,11 +62,24 @@ def endp_update_enrollment(
     return update_enrollment(sql=sql, data=data, enrollment_id=enrollment_id)
 
 
-@router.get("/{enrollment_id}", summary="Get a student course enrollment", operation_id="getEnrollment")
+@router.get(
+    "/{enrollment_id}",
+    summary="Get a student course enrollment",
+    operation_id="getEnrollment",
+    response_model_exclude_unset=True,
+)
 def endp_get_enrollment(
-    sql: Annotated[Session, Depends(get_sql)], enrollment_id: ID_PATH_ANNOTATION
-) -> EnrollmentResponse:
-    return get_enrollment(sql=sql, enrollment_id=enrollment_id)
+    sql: Annotated[Session, Depends(get_sql)],
+    enrollment_id: ID_PATH_ANNOTATION,
+    expand: Annotated[comma_separated(EnrollmentExpand), Query()] = (),
+    include_archived: bool = False,
+) -> EnrollmentResponseExpanded:
+    return get_enrollment(
+        sql=sql,
+        enrollment_id=enrollment_id,
+        expand=expand,
+        include_archived=include_archived,
+    )
 
 
 @router.delete(
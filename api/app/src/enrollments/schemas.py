@@ -1,9 +1,18 @@
+from typing import TYPE_CHECKING, Literal
+
 from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime, date
-# from ..courses.schemas import CourseResponse
-# from ..users.schemas import UserResponse
+from app.annotations import comma_separated
+from app.filters import ListQuery
+from ..courses.schemas import CourseResponse
 from ..task_completions.schemas import TaskCompletionResponse
 
+if TYPE_CHECKING:
+    # users.schemas imports this module, the reference is resolved there
+    from app.src.users.schemas import UserResponse
+
+EnrollmentExpand = Literal["student", "course", "assigner"]
+
 
 class EnrollmentBase(BaseModel):
     student_id: int
@@ -22,13 +31,15 @@ class EnrollmentCreate(EnrollmentBase):
 class EnrollmentResponse(EnrollmentBase):
     enrollment_id: int
 
-    # student: UserResponse | None = None
-    # course: CourseResponse | None = None
-    # assigner: UserResponse | None = None
-
     model_config = ConfigDict(from_attributes=True)
 
 
+class EnrollmentResponseExpanded(EnrollmentResponse):
+    student: "UserResponse | None" = None
+    course: CourseResponse | None = None
+    assigner: "UserResponse | None" = None
+
+
 class EnrollmentUpdate(BaseModel):
     student_id: int | None = None
     course_id: int | None = None
@@ -44,3 +55,18 @@ class EnrollmentResponseTasks(EnrollmentResponse):
     total_tasks: int = 0
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class EnrollmentFilter(ListQuery):
+    student_id: int | None = None
+    course_id: int | None = None
+    assigner_id: int | None = None
+    is_active: bool | None = None
+    enrolled_at_from: date | None = None
+    enrolled_at_to: date | None = None
+    include_archived: bool = False
+    sort: (
+        Literal["enrollment_id", "-enrollment_id", "enrolled_at", "-enrolled_at"]
+        | None
+    ) = None
+    expand: comma_separated(EnrollmentExpand) = []
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import delete, exists, func, or_, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import models
+from app.config import settings
+from app.src.events.schemas import EventPruneResult, EventResponse
+from app.src.users.schemas import UserResponse
+
+logger = logging.getLogger(__name__)
+
+
+def record_event(
+    sql: Session,
+    entity: str,
+    entity_id: int,
+    action: str,
+    payload: BaseModel,
+    course_id: int | None = None,
+    student_id: int | None = None,
+) -> None:
+    """Append a change to the outbox.
+
+    Only adds the row to the session, so the event is committed (or rolled back)
+    together with the write that caused it.
+    """
+    sql.add(
+        models.OutboxEvent(
+            entity=entity,
+            entity_id=entity_id,
+            action=action,
+            course_id=course_id,
+            student_id=student_id,
+            payload=payload.model_dump_json(),
+        )
+    )
+
+
+def get_events(
+    sql: Session,
+    after: int = 0,
+    course_id: int | None = None,
+    student_id: int | None = None,
+    limit: int = 100,
+    visible_to: int | None = None,
+) -> list[EventResponse]:
+    # visible_to keeps course-wide events and those of that one student
+    query = select(models.OutboxEvent).where(models.OutboxEvent.event_id > after)
+    if course_id is not None:
+        query = query.where(models.OutboxEvent.course_id == course_id)
+    if student_id is not None:
+        query = query.where(models.OutboxEvent.student_id == student_id)
+    if visible_to is not None:
+        query = query.where(
+            or_(
+                models.OutboxEvent.student_id == None,  # noqa: E711
+                models.OutboxEvent.student_id == visible_to,
+            )
+        )
+
+    events = sql.execute(
+        query.order_by(models.OutboxEvent.event_id).limit(limit)
+    ).scalars()
+    return [EventResponse.model_validate(event) for event in events]
+
+
+def authorize_subscription(
+    sql: Session,
+    user: UserResponse,
+    course_id: int | None,
+    student_id: int | None,
+) -> int | None:
+    """Check the caller may stream these events, returns visible_to for them.
+
+    Admins see everything, a course's teacher its whole course. Everybody
+    else sees their own events, and the course-wide ones of the courses
+    they are actively enrolled in.
+    """
+    if user.role.name == settings.auth.admin_role:
+        return None
+    if course_id is not None:
+        course = sql.get(models.Course, course_id)
+        if course is not None and course.teacher_id == user.user_id:
+            return None
+    if student_id == user.user_id:
+        return user.user_id
+    if course_id is not None and student_id is None:
+        enrolled = sql.execute(
+            select(
+                exists().where(
+                    models.Enrollment.course_id == course_id,
+                    models.Enrollment.student_id == user.user_id,
+                    models.Enrollment.is_active == True,  # noqa: E712
+                )
+            )
+        ).scalar()
+        if enrolled:
+            return user.user_id
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions"
+    )
+
+
+def prune_events(
+    sql: Session, retention_days: int | None = None, batch_size: int | None = None
+) -> EventPruneResult:
+    """Delete events older than the retention window from the outbox.
+
+    Event ids grow with created_at, each batch is the oldest ids and its own
+    short transaction.
+    """
+    retention_days = (
+        settings.events.retention_days if retention_days is None else retention_days
+    )
+    batch_size = batch_size or settings.events.prune_batch_size
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    result = EventPruneResult()
+
+    try:
+        oldest = (
+            select(models.OutboxEvent.event_id)
+            .where(models.OutboxEvent.created_at < cutoff)
+            .order_by(models.OutboxEvent.event_id)
+            .limit(batch_size)
+            .subquery()
+        )
+        last_of_batch = select(func.max(oldest.c.event_id))
+        while (last := sql.execute(last_of_batch).scalar()) is not None:
+            result.deleted += sql.execute(
+                delete(models.OutboxEvent).where(
+                    models.OutboxEvent.event_id <= last,
+                    models.OutboxEvent.created_at < cutoff,
+                )
+            ).rowcount
+            sql.commit()
+        return result
+
+    except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+def _poll_events(
+    sessions: sessionmaker,
+    after: int,
+    course_id: int | None,
+    student_id: int | None,
+    visible_to: int | None,
+) -> list[EventResponse]:
+    # Short-lived session per poll, the stream must not hold a transaction open
+    with sessions() as sql:
+        return get_events(
+            sql,
+            after=after,
+            course_id=course_id,
+            student_id=student_id,
+            limit=settings.events.batch_size,
+            visible_to=visible_to,
+        )
+
+
+def format_event(event: EventResponse) -> str:
+    return (
+        f"id: {event.event_id}\n"
+        f"event: {event.entity}.{event.action}\n"
+        f"data: {event.payload}\n\n"
+    )
+
+
+async def stream_events(
+    request: Request,
+    sessions: sessionmaker,
+    after: int,
+    course_id: int | None = None,
+    student_id: int | None = None,
+    visible_to: int | None = None,
+) -> AsyncGenerator[str, None]:
+    retry_ms = int(settings.events.poll_interval_seconds * 1000)
+    yield f"retry: {retry_ms}\n\n"
+
+    idle = 0.0
+    while not await request.is_disconnected():
+        events = await run_in_threadpool(
+            _poll_events, sessions, after, course_id, student_id, visible_to
+        )
+        for event in events:
+            yield format_event(event)
+            after = event.event_id
+
+        # A full batch means there is probably more waiting, poll again right away
+        if len(events) == settings.events.batch_size:
+            continue
+
+        if events:
+            idle = 0.0
+        elif idle >= settings.events.keepalive_seconds:
+            idle = 0.0
+            yield ": keep-alive\n\n"
+
+        await asyncio.sleep(settings.events.poll_interval_seconds)
+        idle += settings.events.poll_interval_seconds
@@ -0,0 +1,93 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import SessionRoute, get_sessions, get_sql
+from app.src.auth.controllers import get_current_admin, get_current_user
+from app.src.events.controllers import (
+    authorize_subscription,
+    prune_events,
+    stream_events,
+)
+from app.src.events.schemas import EventPruneResult, EventPruneRun
+from app.src.jobs.controllers import queue_job
+from app.src.jobs.schemas import JobResponse
+from app.src.users.schemas import UserResponse
+
+router = APIRouter(prefix="/events", tags=["Events"], route_class=SessionRoute)
+
+
+def _authorize(
+    sessions: sessionmaker,
+    user: UserResponse,
+    course_id: int | None,
+    student_id: int | None,
+) -> int | None:
+    with sessions() as sql:
+        return authorize_subscription(sql, user, course_id, student_id)
+
+
+@router.get(
+    "",
+    summary="Stream changes of enrollments, tasks and task completions",
+    operation_id="streamEvents",
+    response_class=StreamingResponse,
+)
+async def endp_stream_events(
+    request: Request,
+    sessions: Annotated[sessionmaker, Depends(get_sessions)],
+    user: Annotated[UserResponse, Depends(get_current_user)],
+    course_id: Annotated[int | None, Query(ge=1)] = None,
+    student_id: Annotated[int | None, Query(ge=1)] = None,
+    last_event_id: Annotated[int | None, Query(ge=0)] = None,
+    last_event_id_header: Annotated[
+        int | None, Header(alias="Last-Event-ID", ge=0)
+    ] = None,
+) -> StreamingResponse:
+    # EventSource sends Last-Event-ID on reconnect, the query parameter is for the first connect
+    after = last_event_id_header if last_event_id_header is not None else last_event_id
+    visible_to = await run_in_threadpool(
+        _authorize, sessions, user, course_id, student_id
+    )
+    return StreamingResponse(
+        stream_events(
+            request,
+            sessions,
+            after or 0,
+            course_id=course_id,
+            student_id=student_id,
+            visible_to=visible_to,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post(
+    "/prune",
+    summary="Delete events older than the retention window",
+    operation_id="pruneEvents",
+    dependencies=[Depends(get_current_admin)],
+)
+def endp_prune_events(
+    sql: Annotated[Session, Depends(get_sql)], data: EventPruneRun
+) -> EventPruneResult:
+    return prune_events(
+        sql=sql, retention_days=data.retention_days, batch_size=data.batch_size
+    )
+
+
+@router.post(
+    "/prune/jobs",
+    summary="Queue an event prune for the job workers",
+    operation_id="queuePruneEvents",
+    status_code=202,
+    dependencies=[Depends(get_current_admin)],
+)
+def endp_queue_prune_events(
+    sql: Annotated[Session, Depends(get_sql)], data: EventPruneRun
+) -> JobResponse:
+    return queue_job(sql=sql, kind="prune_events", payload=data)
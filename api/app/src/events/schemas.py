@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class EventResponse(BaseModel):
+    event_id: int
+    entity: str
+    entity_id: int
+    action: str
+    course_id: int | None = None
+    student_id: int | None = None
+    payload: str
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EventPruneRun(BaseModel):
+    retention_days: int | None = Field(None, ge=0)
+    batch_size: int | None = Field(None, ge=1, le=10000)
+
+
+class EventPruneResult(BaseModel):
+    deleted: int = 0
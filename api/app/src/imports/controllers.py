@@ -0,0 +1,251 @@
+import csv
+import logging
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.cache import invalidate
+from app.config import settings
+from app.existence import is_active, mark_active
+from app.src.courses.schemas import CourseCreate
+from app.src.enrollments.schemas import EnrollmentCreate, EnrollmentResponse
+from app.src.events.controllers import record_event
+from app.src.imports.schemas import ImportEntity, ImportReport, ImportRowError
+from app.src.users.schemas import UserCreate
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Lookup:
+    # CSV column with a unique name that is resolved to the id field of the schema
+    column: str
+    field: str
+    model: type
+    key: str
+
+
+@dataclass(frozen=True)
+class ImportSpec:
+    model: type
+    schema: type[BaseModel]
+    lookups: tuple[Lookup, ...] = ()
+    # Called for every inserted row before its chunk commits
+    on_insert: Callable[[Session, Any], None] | None = None
+    cache_region: str | None = None
+
+
+def _record_enrollment_event(sql: Session, enrollment: models.Enrollment) -> None:
+    record_event(
+        sql,
+        "enrollment",
+        enrollment.enrollment_id,
+        "created",
+        EnrollmentResponse.model_validate(enrollment),
+        course_id=enrollment.course_id,
+        student_id=enrollment.student_id,
+    )
+
+
+IMPORTS: dict[ImportEntity, ImportSpec] = {
+    "users": ImportSpec(
+        models.User,
+        UserCreate,
+        lookups=(Lookup("role", "role_id", models.Role, "name"),),
+    ),
+    "courses": ImportSpec(
+        models.Course,
+        CourseCreate,
+        lookups=(
+            Lookup("category", "category_id", models.Category, "name"),
+            Lookup("teacher", "teacher_id", models.User, "username"),
+        ),
+        cache_region="course",
+    ),
+    "enrollments": ImportSpec(
+        models.Enrollment,
+        EnrollmentCreate,
+        lookups=(
+            Lookup("student", "student_id", models.User, "username"),
+            Lookup("course", "course_id", models.Course, "title"),
+            Lookup("assigner", "assigner_id", models.User, "username"),
+        ),
+        on_insert=_record_enrollment_event,
+    ),
+}
+
+
+def _add_error(report: ImportReport, line: int, errors: list[str]) -> None:
+    report.failed += 1
+    if len(report.errors) < settings.imports.max_errors:
+        report.errors.append(ImportRowError(line=line, errors=errors))
+    else:
+        report.errors_truncated = True
+
+
+def _resolve(
+    sql: Session, lookup: Lookup, chunk: list[tuple[int, dict[str, str]]]
+) -> dict[str, int]:
+    # One query per lookup and chunk instead of one per row
+    names = {row[lookup.column] for _, row in chunk if row.get(lookup.column)}
+    if not names:
+        return {}
+
+    key = getattr(lookup.model, lookup.key)
+    query = select(key, lookup.model.__mapper__.primary_key[0]).where(key.in_(names))
+    if hasattr(lookup.model, "is_active"):
+        query = query.where(lookup.model.is_active == True)  # noqa: E712
+    return dict(sql.execute(query).tuples().all())
+
+
+def _clean(schema: type[BaseModel], row: dict[str, str]) -> dict[str, Any]:
+    # Empty cells fall back to the schema default, required ones become None
+    data: dict[str, Any] = {}
+    for name, value in row.items():
+        if name is None:
+            continue
+        if value:
+            data[name] = value
+        elif name in schema.model_fields and schema.model_fields[name].is_required():
+            data[name] = None
+    return data
+
+
+def _validate_row(
+    sql: Session,
+    spec: ImportSpec,
+    row: dict[str, str],
+    resolved: dict[Lookup, dict[str, int]],
+) -> tuple[dict[str, Any] | None, list[str]]:
+    data = _clean(spec.schema, row)
+    errors: list[str] = []
+    for lookup in spec.lookups:
+        name = data.pop(lookup.column, None)
+        if name is None:
+            continue
+        if name not in resolved[lookup]:
+            errors.append(f"{lookup.column}: '{name}' not found")
+        else:
+            data[lookup.field] = resolved[lookup][name]
+    if errors:
+        return None, errors
+
+    try:
+        item = spec.schema.model_validate(data)
+    except ValidationError as e:
+        return None, [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        ]
+
+    # Ids given directly instead of names still have to reference active rows
+    for lookup in spec.lookups:
+        if not row.get(lookup.column):
+            id_ = getattr(item, lookup.field)
+            if not is_active(sql, lookup.model, id_):
+                errors.append(f"{lookup.field}: {id_} not found")
+    return (None, errors) if errors else (item.model_dump(), [])
+
+
+def _insert(
+    sql: Session,
+    spec: ImportSpec,
+    valid: list[tuple[int, dict[str, Any]]],
+    report: ImportReport,
+) -> list[Any]:
+    try:
+        with sql.begin_nested():
+            return sql.scalars(
+                insert(spec.model).returning(spec.model), [data for _, data in valid]
+            ).all()
+    except IntegrityError:
+        pass
+
+    # A duplicate somewhere in the chunk, find it row by row
+    rows = []
+    for line, data in valid:
+        try:
+            with sql.begin_nested():
+                rows.append(
+                    sql.scalars(
+                        insert(spec.model).values(**data).returning(spec.model)
+                    ).one()
+                )
+        except IntegrityError as e:
+            _add_error(report, line, [str(e.orig)])
+    return rows
+
+
+def _import_chunk(
+    sql: Session,
+    spec: ImportSpec,
+    chunk: list[tuple[int, dict[str, str]]],
+    report: ImportReport,
+) -> None:
+    resolved = {lookup: _resolve(sql, lookup, chunk) for lookup in spec.lookups}
+    valid: list[tuple[int, dict[str, Any]]] = []
+    for line, row in chunk:
+        data, errors = _validate_row(sql, spec, row, resolved)
+        if errors:
+            _add_error(report, line, errors)
+        else:
+            valid.append((line, data))
+
+    rows = _insert(sql, spec, valid, report) if valid else []
+    primary_key = spec.model.__mapper__.primary_key[0].key
+    created = [(getattr(row, primary_key), row.is_active) for row in rows]
+    if spec.on_insert is not None:
+        for row in rows:
+            spec.on_insert(sql, row)
+    if spec.cache_region is not None:
+        invalidate(sql, spec.cache_region, *(id_ for id_, _ in created))
+    sql.commit()
+
+    report.rows += len(chunk)
+    report.imported += len(created)
+    for id_, active in created:
+        mark_active(sql, spec.model, id_, active)
+
+
+def import_csv(
+    sql: Session,
+    entity: ImportEntity,
+    lines: Iterable[str],
+    chunk_size: int | None = None,
+) -> ImportReport:
+    """Import CSV rows in chunks, each validated, bulk inserted and committed.
+
+    Only one chunk is held in memory. Rows that fail are reported with their
+    line and don't stop the rest of the file.
+    """
+    spec = IMPORTS[entity]
+    chunk_size = chunk_size or settings.imports.chunk_size
+    report = ImportReport(entity=entity)
+    reader = csv.DictReader(lines)
+    numbered: Iterator[tuple[int, dict[str, str]]] = (
+        (reader.line_num, row) for row in reader
+    )
+
+    try:
+        while chunk := list(islice(numbered, chunk_size)):
+            _import_chunk(sql, spec, chunk, report)
+        return report
+
+    except (csv.Error, UnicodeDecodeError) as e:
+        sql.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"Invalid CSV on line {reader.line_num}: {e}"
+        ) from e
+
+    except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
@@ -0,0 +1,31 @@
+import io
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, UploadFile
+from sqlalchemy.orm import Session
+
+from app.database import SessionRoute, get_sql
+from app.src.auth.controllers import get_current_admin
+from app.src.imports.controllers import import_csv
+from app.src.imports.schemas import ImportEntity, ImportReport
+
+router = APIRouter(
+    prefix="/imports",
+    tags=["Imports"],
+    dependencies=[Depends(get_current_admin)],
+    route_class=SessionRoute,
+)
+
+
+@router.post(
+    "/{entity}", summary="Import rows from a CSV file", operation_id="importCsv"
+)
+def endp_import_csv(
+    sql: Annotated[Session, Depends(get_sql)],
+    entity: ImportEntity,
+    file: UploadFile,
+    chunk_size: Annotated[int | None, Query(ge=1, le=5000)] = None,
+) -> ImportReport:
+    # The upload is spooled to disk, it's read line by line from there
+    lines = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    return import_csv(sql=sql, entity=entity, lines=lines, chunk_size=chunk_size)
@@ -0,0 +1,21 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+ImportEntity = Literal["users", "courses", "enrollments"]
+
+
+class ImportRowError(BaseModel):
+    # Line of the CSV file, the header is line 1
+    line: int
+    errors: list[str]
+
+
+class ImportReport(BaseModel):
+    entity: ImportEntity
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: list[ImportRowError] = []
+    # Only the first imports.max_errors rows are reported in detail
+    errors_truncated: bool = False
@@ -0,0 +1,343 @@
+import json
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from typing import Any, Literal
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import get_session_factory
+from app.src.archive.controllers import archive_inactive
+from app.src.archive.schemas import ArchiveRun
+from app.src.backups.controllers import backup_database
+from app.src.backups.schemas import BackupRun
+from app.src.events.controllers import prune_events
+from app.src.events.schemas import EventPruneRun
+from app.src.jobs.schemas import JobResponse, JobStats, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Handlers get a write session of the job's database and its payload. They
+# may commit along the way, whatever is left is committed when they return
+JobHandler = Callable[[Session, dict[str, Any]], None]
+
+
+def _run_archive(sql: Session, payload: dict[str, Any]) -> None:
+    run = ArchiveRun.model_validate(payload)
+    archive_inactive(sql, run.retention_days, run.batch_size)
+
+
+def _run_backup(sql: Session, payload: dict[str, Any]) -> None:
+    run = BackupRun.model_validate(payload)
+    backup = backup_database(sql, run.verify)
+    if backup.verification is not None and not backup.verification.ok:
+        raise RuntimeError(f"Backup {backup.name} failed verification")
+
+
+def _run_prune_events(sql: Session, payload: dict[str, Any]) -> None:
+    run = EventPruneRun.model_validate(payload)
+    prune_events(sql, run.retention_days, run.batch_size)
+
+
+JOBS: dict[str, JobHandler] = {
+    "archive": _run_archive,
+    "backup": _run_backup,
+    "prune_events": _run_prune_events,
+}
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    tenant: str | None
+    job_id: int
+    kind: str
+    payload: str
+    attempts: int
+    max_attempts: int
+
+
+def enqueue(
+    sql: Session,
+    kind: str,
+    payload: BaseModel | dict[str, Any] | None = None,
+    delay_seconds: float = 0.0,
+    max_attempts: int | None = None,
+) -> models.Job:
+    """Add a job to the session, it's queued when the caller commits.
+
+    Enqueue in the transaction of the change the job follows from, the job
+    then exists exactly when the change does.
+    """
+    if kind not in JOBS:
+        raise ValueError(f"Unknown job kind {kind}")
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+
+    now = datetime.utcnow()
+    job = models.Job(
+        kind=kind,
+        payload=json.dumps(payload or {}),
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts or settings.jobs.max_attempts,
+        created_at=now,
+        run_at=now + timedelta(seconds=delay_seconds),
+    )
+    sql.add(job)
+    return job
+
+
+def queue_job(
+    sql: Session, kind: str, payload: BaseModel | dict[str, Any] | None = None
+) -> JobResponse:
+    try:
+        job = enqueue(sql, kind, payload)
+        sql.commit()
+        sql.refresh(job)
+        return JobResponse.model_validate(job)
+
+    except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+def claim_jobs(tenant: str | None, limit: int) -> list[ClaimedJob]:
+    """Mark up to ``limit`` due jobs as running and return them.
+
+    One IMMEDIATE transaction, so two workers never claim the same job. Jobs
+    whose worker died holding them are claimed again once locked_until passes.
+    """
+    now = datetime.utcnow()
+    with get_session_factory(tenant)() as sql:
+        sql.execute(
+            delete(models.Job).where(
+                models.Job.status == "done",
+                models.Job.finished_at
+                < now - timedelta(days=settings.jobs.done_retention_days),
+            )
+        )
+        due = (
+            select(models.Job.job_id)
+            .where(
+                or_(
+                    and_(models.Job.status == "queued", models.Job.run_at <= now),
+                    and_(models.Job.status == "running", models.Job.locked_until < now),
+                )
+            )
+            .order_by(models.Job.run_at)
+            .limit(limit)
+        )
+        rows = sql.execute(
+            update(models.Job)
+            .where(models.Job.job_id.in_(due.scalar_subquery()))
+            .values(
+                status="running",
+                attempts=models.Job.attempts + 1,
+                started_at=now,
+                locked_until=now + timedelta(seconds=settings.jobs.lock_seconds),
+            )
+            .returning(
+                models.Job.job_id,
+                models.Job.kind,
+                models.Job.payload,
+                models.Job.attempts,
+                models.Job.max_attempts,
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        sql.commit()
+    return [ClaimedJob(tenant, *row) for row in rows]
+
+
+def execute_job(tenant: str | None, kind: str, payload: str) -> None:
+    # Module level with plain arguments, process pools pickle it
+    with get_session_factory(tenant)() as sql:
+        JOBS[kind](sql, json.loads(payload))
+        sql.commit()
+
+
+def _describe(error: BaseException) -> str:
+    if isinstance(error, HTTPException):
+        return f"HTTP {error.status_code}: {error.detail}"
+    return f"{type(error).__name__}: {error}"
+
+
+def finish_job(job: ClaimedJob, error: str | None = None) -> None:
+    """Record the outcome of a run, failed jobs are retried with backoff.
+
+    A job failing its last attempt is dead-lettered, it stays in the table
+    with its error until retried by hand.
+    """
+    now = datetime.utcnow()
+    if error is None:
+        values: dict[str, Any] = {"status": "done", "finished_at": now}
+    elif job.attempts >= job.max_attempts:
+        values = {"status": "dead", "finished_at": now, "last_error": error}
+    else:
+        backoff = min(
+            settings.jobs.backoff_seconds * 2 ** (job.attempts - 1),
+            settings.jobs.max_backoff_seconds,
+        )
+        values = {
+            "status": "queued",
+            "run_at": now + timedelta(seconds=backoff),
+            "last_error": error,
+        }
+
+    with get_session_factory(job.tenant)() as sql:
+        # Skipped when the lock expired and another worker took the job over
+        sql.execute(
+            update(models.Job)
+            .where(
+                models.Job.job_id == job.job_id,
+                models.Job.status == "running",
+                models.Job.attempts == job.attempts,
+            )
+            .values(locked_until=None, **values)
+        )
+        sql.commit()
+
+
+def _create_executor(kind: Literal["thread", "process"], concurrency: int) -> Executor:
+    if kind == "process":
+        # Forked children would share the parent's SQLite connections
+        return ProcessPoolExecutor(concurrency, mp_context=get_context("spawn"))
+    return ThreadPoolExecutor(concurrency, thread_name_prefix="job")
+
+
+def run_worker(
+    targets: list[str | None],
+    executor: Literal["thread", "process"] | None = None,
+    concurrency: int | None = None,
+    once: bool = False,
+) -> int:
+    """Claim jobs of the target databases in batches and run them in a pool.
+
+    Runs until interrupted, or with ``once`` until no job is due. Returns the
+    number of jobs run.
+    """
+    concurrency = concurrency or settings.jobs.concurrency
+    running: dict[Future, ClaimedJob] = {}
+    finished = 0
+
+    with _create_executor(executor or settings.jobs.executor, concurrency) as pool:
+        while True:
+            for tenant in targets:
+                free = min(concurrency - len(running), settings.jobs.batch_size)
+                if free <= 0:
+                    break
+                for job in claim_jobs(tenant, free):
+                    future = pool.submit(execute_job, tenant, job.kind, job.payload)
+                    running[future] = job
+
+            if not running:
+                if once:
+                    return finished
+                time.sleep(settings.jobs.poll_interval_seconds)
+                continue
+
+            done, _ = wait(
+                running,
+                timeout=settings.jobs.poll_interval_seconds,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                job = running.pop(future)
+                error = future.exception()
+                finish_job(job, None if error is None else _describe(error))
+                finished += 1
+
+
+def get_jobs(sql: Session, status: JobStatus | None, limit: int) -> list[JobResponse]:
+    try:
+        query = select(models.Job).order_by(models.Job.job_id.desc()).limit(limit)
+        if status is not None:
+            query = query.where(models.Job.status == status)
+        return [JobResponse.model_validate(job) for job in sql.scalars(query).all()]
+
+    except Exception as e:
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+def retry_job(sql: Session, job_id: int) -> JobResponse:
+    try:
+        job: models.Job | None = sql.get(models.Job, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        if job.status != "dead":
+            raise HTTPException(status_code=409, detail="Only dead jobs can be retried")
+
+        job.status = "queued"
+        job.attempts = 0
+        job.run_at = datetime.utcnow()
+        job.finished_at = None
+        sql.commit()
+        sql.refresh(job)
+        return JobResponse.model_validate(job)
+
+    except HTTPException as e:
+        raise e
+
+    except Exception as e:
+        sql.rollback()
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+def _seconds(earlier: Any, later: Any) -> Any:
+    return (func.julianday(later) - func.julianday(earlier)) * 86400
+
+
+def get_job_stats(sql: Session) -> JobStats:
+    try:
+        now = datetime.utcnow()
+        stats = JobStats()
+        counts = sql.execute(
+            select(models.Job.status, func.count()).group_by(models.Job.status)
+        ).tuples()
+        for status, count in counts:
+            setattr(stats, status, count)
+
+        due, oldest = sql.execute(
+            select(func.count(), func.min(models.Job.run_at)).where(
+                models.Job.status == "queued", models.Job.run_at <= now
+            )
+        ).one()
+        stats.due = due
+        if oldest is not None:
+            stats.oldest_due_seconds = (now - oldest).total_seconds()
+
+        wait_seconds, run_seconds = sql.execute(
+            select(
+                func.avg(_seconds(models.Job.run_at, models.Job.started_at)),
+                func.avg(_seconds(models.Job.started_at, models.Job.finished_at)),
+            ).where(
+                models.Job.status == "done",
+                models.Job.finished_at >= now - timedelta(hours=1),
+            )
+        ).one()
+        stats.mean_wait_seconds = wait_seconds or 0.0
+        stats.mean_run_seconds = run_seconds or 0.0
+        return stats
+
+    except Exception as e:
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
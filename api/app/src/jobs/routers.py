@@ -0,0 +1,42 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.annotations import ID_PATH_ANNOTATION
+from app.database import SessionRoute, get_sql
+from app.src.auth.controllers import get_current_admin
+from app.src.jobs.controllers import get_job_stats, get_jobs, retry_job
+from app.src.jobs.schemas import JobResponse, JobStats, JobStatus
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["Jobs"],
+    dependencies=[Depends(get_current_admin)],
+    route_class=SessionRoute,
+)
+
+
+@router.get("", summary="Get the latest jobs", operation_id="getJobs")
+def endp_get_jobs(
+    sql: Annotated[Session, Depends(get_sql)],
+    status: JobStatus | None = None,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+) -> list[JobResponse]:
+    return get_jobs(sql=sql, status=status, limit=limit)
+
+
+@router.get(
+    "/stats", summary="Get queue depth and latency", operation_id="getJobStats"
+)
+def endp_get_job_stats(sql: Annotated[Session, Depends(get_sql)]) -> JobStats:
+    return get_job_stats(sql=sql)
+
+
+@router.post(
+    "/{job_id}/retry", summary="Queue a dead job again", operation_id="retryJob"
+)
+def endp_retry_job(
+    sql: Annotated[Session, Depends(get_sql)], job_id: ID_PATH_ANNOTATION
+) -> JobResponse:
+    return retry_job(sql=sql, job_id=job_id)
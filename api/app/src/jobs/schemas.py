@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict
+
+JobStatus = Literal["queued", "running", "done", "dead"]
+
+
+class JobResponse(BaseModel):
+    job_id: int
+    kind: str
+    payload: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    last_error: str | None = None
+    created_at: datetime
+    run_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobStats(BaseModel):
+    queued: int = 0
+    # Queued jobs whose run_at has passed, the rest wait for a retry
+    due: int = 0
+    running: int = 0
+    done: int = 0
+    dead: int = 0
+    # How far the workers are behind
+    oldest_due_seconds: float = 0.0
+    # Over the jobs finished in the last hour
+    mean_wait_seconds: float = 0.0
+    mean_run_seconds: float = 0.0
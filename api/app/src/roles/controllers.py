@@ -1,10 +1,14 @@
+import logging
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app import models
+from app.existence import mark_active
 from app.src.roles.schemas import RoleCreate, RoleResponse, RoleUpdate
 
 from sqlalchemy.exc import IntegrityError, OperationalError
 
+logger = logging.getLogger(__name__)
+
 
 def get_roles(sql: Session) -> list[RoleResponse]:
     try:
@@ -17,7 +21,7 @@ def get_roles(sql: Session) -> list[RoleResponse]:
         raise e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
@@ -28,6 +32,7 @@ def create_role(sql: Session, data: RoleCreate) -> RoleResponse:
         sql.add(new_role)
         sql.commit()
         sql.refresh(new_role)
+        mark_active(sql, models.Role, new_role.role_id)
         return RoleResponse.model_validate(new_role)
 
     except IntegrityError as e:
@@ -37,7 +42,7 @@ def create_role(sql: Session, data: RoleCreate) -> RoleResponse:
         raise HTTPException(status_code=500, detail=str(e.orig)) from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
@@ -57,11 +62,11 @@ def update_role(sql: Session, data: RoleUpdate, role_id: int) -> RoleResponse:
         raise e
 
     except IntegrityError as e:
-        print(e)
+        logger.info("Role already exists: %s", e.orig)
         raise HTTPException(status_code=409, detail="Role already exists") from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -76,7 +81,7 @@ def get_role(sql: Session, role_id: int) -> RoleResponse:
         raise e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
@@ -87,10 +92,11 @@ def delete_role(sql: Session, role_id: int):
             raise HTTPException(status_code=404, detail="Role not found")
         sql.delete(role)
         sql.commit()
+        mark_active(sql, models.Role, role_id, False)
 
     except HTTPException as e:
         raise e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
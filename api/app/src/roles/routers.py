@@ -13,9 +13,9 @@ from fastapi import APIRouter, Depends
 
 from sqlalchemy.orm import Session
 
-from app.database import get_sql
+from app.database import SessionRoute, get_sql
 
-router = APIRouter(prefix="/roles", tags=["Roles"])
+router = APIRouter(prefix="/roles", tags=["Roles"], route_class=SessionRoute)
 
 
 @router.get("", summary="Get all roles", operation_id="getRoles")
@@ -1,5 +1,6 @@
 from app.src.auth.controllers import get_current_user
 from fastapi import APIRouter, Depends
+from app.ratelimit import RateLimit
 
 from app.src.roles import routers as role_router
 from app.src.tasks import routers as task_router
@@ -8,14 +9,27 @@ from app.src.users import routers as user_router
 from app.src.enrollments import routers as student_course_router
 from app.src.courses import routers as course_router
 from app.src.task_completions import routers as task_completion_router
+from app.src.events import routers as event_router
+from app.src.search import routers as search_router
+from app.src.batch import routers as batch_router
+from app.src.archive import routers as archive_router
+from app.src.admin import routers as admin_router
+from app.src.imports import routers as import_router
+from app.src.jobs import routers as job_router
+from app.src.backups import routers as backup_router
+from app.src.sync import routers as sync_router
 
 router = APIRouter()
 
-router.include_router(role_router.router)
-router.include_router(user_router.router)
+public_limit = Depends(RateLimit("public"))
+router.include_router(role_router.router, dependencies=[public_limit])
+router.include_router(user_router.router, dependencies=[public_limit])
 
 
-private_router = APIRouter(dependencies=[Depends(get_current_user)])
+# Limited before authentication, rejected requests never touch the database
+private_router = APIRouter(
+    dependencies=[Depends(RateLimit("private")), Depends(get_current_user)]
+)
 
 
 private_router.include_router(task_router.router)
@@ -23,5 +37,15 @@ private_router.include_router(category_router.router)
 private_router.include_router(student_course_router.router)
 private_router.include_router(course_router.router)
 private_router.include_router(task_completion_router.router)
+private_router.include_router(event_router.router)
+private_router.include_router(search_router.router)
+private_router.include_router(batch_router.router)
+private_router.include_router(archive_router.router)
+private_router.include_router(admin_router.router)
+private_router.include_router(import_router.router)
+private_router.include_router(job_router.router)
+private_router.include_router(backup_router.router)
+private_router.include_router(sync_router.router)
+private_router.include_router(user_router.admin_router)
 
 router.include_router(private_router)
@@ -0,0 +1,117 @@
+import logging
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import Engine, text
+from sqlalchemy.orm import Session
+
+from app.src.search.schemas import SearchEntity, SearchHit
+
+logger = logging.getLogger(__name__)
+
+# table -> (primary key, indexed columns)
+FTS_TABLES: dict[str, tuple[str, tuple[str, ...]]] = {
+    "courses": ("course_id", ("title", "description")),
+    "tasks": ("task_id", ("title", "description")),
+    "users": ("user_id", ("username", "first_name", "last_name")),
+}
+
+_SEARCH_SELECTS: dict[str, str] = {
+    "course": """
+        SELECT 'course' AS entity, t.course_id AS entity_id, t.title AS title,
+            snippet(courses_fts, -1, '[', ']', '...', 10) AS snippet,
+            bm25(courses_fts, 10.0, 1.0) AS rank
+        FROM courses_fts JOIN courses AS t ON t.course_id = courses_fts.rowid
+        WHERE courses_fts MATCH :q AND t.is_active = 1
+    """,
+    "task": """
+        SELECT 'task' AS entity, t.task_id AS entity_id, t.title AS title,
+            snippet(tasks_fts, -1, '[', ']', '...', 10) AS snippet,
+            bm25(tasks_fts, 10.0, 1.0) AS rank
+        FROM tasks_fts JOIN tasks AS t ON t.task_id = tasks_fts.rowid
+        WHERE tasks_fts MATCH :q AND t.is_active = 1
+    """,
+    "user": """
+        SELECT 'user' AS entity, t.user_id AS entity_id,
+            t.first_name || ' ' || t.last_name AS title,
+            t.username AS snippet,
+            bm25(users_fts, 5.0, 10.0, 10.0) AS rank
+        FROM users_fts JOIN users AS t ON t.user_id = users_fts.rowid
+        WHERE users_fts MATCH :q AND t.is_active = 1
+    """,
+}
+
+
+def _fts_statements(table: str, pk: str, columns: tuple[str, ...]) -> list[str]:
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new_values = ", ".join(f"new.{col}" for col in columns)
+    old_values = ", ".join(f"old.{col}" for col in columns)
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) "
+        f"VALUES ('delete', old.{pk}, {old_values});"
+    )
+    insert_new = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_values});"
+    return [
+        # External content table, the text itself stays only in the original table
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, "
+        f"content='{table}', content_rowid='{pk}', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def create_search_index(engine: Engine) -> None:
+    """Create FTS5 tables and sync triggers, rebuild the index of new tables."""
+    with engine.begin() as conn:
+        existing = set(
+            conn.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'table'")
+            ).scalars()
+        )
+        for table, (pk, columns) in FTS_TABLES.items():
+            for statement in _fts_statements(table, pk, columns):
+                conn.exec_driver_sql(statement)
+            if f"{table}_fts" not in existing:
+                conn.exec_driver_sql(
+                    f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"
+                )
+
+
+def build_match_query(q: str) -> str:
+    # Every word as a quoted prefix term, so user input can't inject FTS syntax
+    terms = re.findall(r"\w+", q)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def search(
+    sql: Session,
+    q: str,
+    entities: list[SearchEntity] | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[SearchHit]:
+    match = build_match_query(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="Empty search query")
+
+    selects = [
+        statement
+        for entity, statement in _SEARCH_SELECTS.items()
+        if not entities or entity in entities
+    ]
+    query = text(
+        " UNION ALL ".join(selects) + " ORDER BY rank LIMIT :limit OFFSET :offset"
+    )
+    try:
+        rows = sql.execute(query, {"q": match, "limit": limit, "offset": offset})
+        return [SearchHit.model_validate(row._asdict()) for row in rows]
+
+    except Exception as e:
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
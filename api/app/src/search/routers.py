@@ -0,0 +1,21 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import SessionRoute, get_sql
+from app.src.search.controllers import search
+from app.src.search.schemas import SearchEntity, SearchHit
+
+router = APIRouter(prefix="/search", tags=["Search"], route_class=SessionRoute)
+
+
+@router.get("", summary="Search courses, tasks and users", operation_id="search")
+def endp_search(
+    sql: Annotated[Session, Depends(get_sql)],
+    q: Annotated[str, Query(min_length=1, max_length=100)],
+    types: Annotated[list[SearchEntity] | None, Query()] = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0)] = 0,
+) -> list[SearchHit]:
+    return search(sql=sql, q=q, entities=types, limit=limit, offset=offset)
@@ -0,0 +1,13 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+SearchEntity = Literal["course", "task", "user"]
+
+
+class SearchHit(BaseModel):
+    entity: SearchEntity
+    entity_id: int
+    title: str
+    snippet: str | None = None
+    rank: float
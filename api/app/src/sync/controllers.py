@@ -0,0 +1,183 @@
+import base64
+import binascii
+import json
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import begin_read_snapshot
+from app.src.categories.schemas import CategoryResponse
+from app.src.courses.schemas import CourseResponse
+from app.src.enrollments.schemas import EnrollmentResponse
+from app.src.sync.schemas import SyncEntity, SyncResponse
+from app.src.task_completions.schemas import TaskCompletionResponse
+from app.src.tasks.schemas import TaskResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SyncSpec:
+    entity: SyncEntity
+    model: type
+    schema: type[BaseModel]
+
+
+# Parents first, a client applying changes in order never sees dangling ids
+SYNCED: tuple[SyncSpec, ...] = (
+    SyncSpec("categories", models.Category, CategoryResponse),
+    SyncSpec("courses", models.Course, CourseResponse),
+    SyncSpec("tasks", models.Task, TaskResponse),
+    SyncSpec("enrollments", models.Enrollment, EnrollmentResponse),
+    SyncSpec("task_completions", models.TaskCompletion, TaskCompletionResponse),
+)
+
+# Outbox entities whose "deleted" events are hard deletes
+HARD_DELETES: dict[str, SyncEntity] = {"task_completion": "task_completions"}
+
+
+@dataclass
+class SyncCursor:
+    # Changes at or after since are sent, None sends every active row
+    since: str | None = None
+    # Where the round that is being paged through ends
+    until: str | None = None
+    after_event: int = 0
+    until_event: int | None = None
+    # Position inside the round: entity index and last (updated_at, id) sent
+    entity: int = 0
+    after: tuple[str, int] | None = None
+
+
+def _encode(cursor: SyncCursor) -> str:
+    data = json.dumps(asdict(cursor), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def _decode(token: str) -> SyncCursor:
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        cursor = SyncCursor(**json.loads(data))
+        for value in (cursor.since, cursor.until, *(cursor.after or ())[:1]):
+            if value is not None:
+                datetime.fromisoformat(value)
+        if cursor.after is not None:
+            cursor.after = (cursor.after[0], int(cursor.after[1]))
+        return cursor
+    except (binascii.Error, ValueError, TypeError, IndexError) as e:
+        raise HTTPException(status_code=400, detail="Invalid sync token") from e
+
+
+def _changed_rows(
+    sql: Session, spec: SyncSpec, cursor: SyncCursor, position: bool, limit: int
+) -> list:
+    model = spec.model
+    primary_key = model.__mapper__.primary_key[0]
+    query = select(model).order_by(model.updated_at, primary_key).limit(limit)
+    if cursor.since is None:
+        query = query.where(model.is_active == True)  # noqa: E712
+    else:
+        query = query.where(
+            model.updated_at >= datetime.fromisoformat(cursor.since)
+        )
+    if position and cursor.after is not None:
+        updated_at, id_ = cursor.after
+        query = query.where(
+            tuple_(model.updated_at, primary_key)
+            > tuple_(datetime.fromisoformat(updated_at), id_)
+        )
+    return sql.execute(query).scalars().all()
+
+
+def _hard_deletes(sql: Session, cursor: SyncCursor) -> dict[SyncEntity, list[int]]:
+    if cursor.since is None:
+        return {}
+    events = sql.execute(
+        select(models.OutboxEvent.entity, models.OutboxEvent.entity_id)
+        .where(
+            models.OutboxEvent.event_id > cursor.after_event,
+            models.OutboxEvent.event_id <= cursor.until_event,
+            models.OutboxEvent.entity.in_(HARD_DELETES),
+            models.OutboxEvent.action == "deleted",
+        )
+        .order_by(models.OutboxEvent.event_id)
+    )
+    deleted: dict[SyncEntity, list[int]] = {}
+    for entity, entity_id in events:
+        deleted.setdefault(HARD_DELETES[entity], []).append(entity_id)
+    return deleted
+
+
+def get_changes(sql: Session, token: str | None, limit: int) -> SyncResponse:
+    """Rows changed since a sync token, served from the updated_at indexes.
+
+    Without a token every active row is sent. A round goes through the
+    entities in order and is paged by (updated_at, id) when it has more than
+    ``limit`` rows, has_more asks the client to continue right away. The
+    token of the last page starts the next round, a little before this one
+    so transactions in flight during the sync aren't missed. Rows may come
+    twice, clients upsert by id.
+    """
+    cursor = _decode(token) if token else SyncCursor()
+    try:
+        begin_read_snapshot(sql)
+        if cursor.until is None:
+            now = datetime.utcnow()
+            cursor.until = (
+                now - timedelta(seconds=settings.sync.overlap_seconds)
+            ).isoformat()
+            cursor.until_event = (
+                sql.execute(select(func.max(models.OutboxEvent.event_id))).scalar()
+                or 0
+            )
+
+        response = SyncResponse(token="")
+        budget = limit
+        for index in range(cursor.entity, len(SYNCED)):
+            spec = SYNCED[index]
+            rows = _changed_rows(
+                sql, spec, cursor, index == cursor.entity, budget + 1
+            )
+            page = rows[:budget]
+            setattr(
+                response,
+                spec.entity,
+                [spec.schema.model_validate(row) for row in page],
+            )
+            budget -= len(page)
+            if len(rows) > len(page):
+                if page:
+                    last = page[-1]
+                    position = (
+                        last.updated_at.isoformat(),
+                        getattr(last, spec.model.__mapper__.primary_key[0].name),
+                    )
+                elif index == cursor.entity:
+                    position = cursor.after
+                else:
+                    position = None
+                next_cursor = SyncCursor(**{**asdict(cursor), "entity": index})
+                next_cursor.after = position
+                response.token = _encode(next_cursor)
+                response.has_more = True
+                return response
+
+        response.deleted = _hard_deletes(sql, cursor)
+        response.token = _encode(
+            SyncCursor(since=cursor.until, after_event=cursor.until_event or 0)
+        )
+        return response
+
+    except HTTPException as e:
+        raise e
+
+    except Exception as e:
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
@@ -0,0 +1,24 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionRoute, get_read_sql
+from app.src.sync.controllers import get_changes
+from app.src.sync.schemas import SyncResponse
+
+router = APIRouter(prefix="/sync", tags=["Sync"], route_class=SessionRoute)
+
+
+@router.get(
+    "",
+    summary="Get the rows changed since the last sync",
+    operation_id="getChanges",
+)
+def endp_get_changes(
+    sql: Annotated[Session, Depends(get_read_sql)],
+    since: str | None = None,
+    limit: Annotated[int | None, Query(ge=1, le=10000)] = None,
+) -> SyncResponse:
+    return get_changes(sql=sql, token=since, limit=limit or settings.sync.max_rows)
@@ -0,0 +1,27 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+from app.src.categories.schemas import CategoryResponse
+from app.src.courses.schemas import CourseResponse
+from app.src.enrollments.schemas import EnrollmentResponse
+from app.src.task_completions.schemas import TaskCompletionResponse
+from app.src.tasks.schemas import TaskResponse
+
+SyncEntity = Literal[
+    "categories", "courses", "tasks", "enrollments", "task_completions"
+]
+
+
+class SyncResponse(BaseModel):
+    categories: list[CategoryResponse] = []
+    courses: list[CourseResponse] = []
+    tasks: list[TaskResponse] = []
+    enrollments: list[EnrollmentResponse] = []
+    task_completions: list[TaskCompletionResponse] = []
+    # Ids of rows deleted for good, deactivated ones come with is_active false
+    deleted: dict[SyncEntity, list[int]] = {}
+    # Pass as since on the next call
+    token: str
+    # More changes are waiting, call again with the token right away
+    has_more: bool = False
@@ -1,50 +1,99 @@
+import logging
+from functools import partial
+
 from app import models
+from app.existence import is_active
+from app.group_commit import group_commit
+from app.filters import apply_list_query
 from app.utils import validate_int
+from app.src.events.controllers import record_event
 from fastapi import HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from app.src.task_completions.schemas import (
     TaskCompletionCreate,
+    TaskCompletionFilter,
     TaskCompletionResponse,
 )
 
-
-def get_task_completions(sql: Session) -> list[TaskCompletionResponse]:
+logger = logging.getLogger(__name__)
+
+
+def _record_task_completion_event(
+    sql: Session,
+    task_completion: models.TaskCompletion,
+    enrollment: models.Enrollment | None,
+    action: str,
+) -> None:
+    record_event(
+        sql,
+        "task_completion",
+        task_completion.task_completion_id,
+        action,
+        TaskCompletionResponse.model_validate(task_completion),
+        course_id=enrollment.course_id if enrollment else None,
+        student_id=enrollment.student_id if enrollment else None,
+    )
+
+
+def get_task_completions(
+    sql: Session, filters: TaskCompletionFilter | None = None
+) -> list[TaskCompletionResponse]:
     try:
-        task_completions: list[models.TaskCompletion] = sql.query(
-            models.TaskCompletion
-        ).all()
+        task_completions: list[models.TaskCompletion] = sql.execute(
+            apply_list_query(
+                select(models.TaskCompletion),
+                models.TaskCompletion.__table__.c,
+                filters,
+            )
+        ).scalars().all()
         return [
             TaskCompletionResponse.model_validate(task_completion)
             for task_completion in task_completions
         ]
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
-def create_task_completion(
+def _insert_task_completion(
     sql: Session, data: TaskCompletionCreate
 ) -> TaskCompletionResponse:
-    try:
-        new_task_completion = models.TaskCompletion(**data.model_dump())
+    """Insert a task completion and its event, the caller commits."""
+    new_task_completion = models.TaskCompletion(**data.model_dump())
 
-        enrollment: models.Enrollment | None = sql.get(
-            models.Enrollment, validate_int(data.enrollment_id)
-        )
-        if enrollment is None or not enrollment.is_active:
-            raise HTTPException(status_code=404, detail="Enrollment not found")
+    # The enrollment row is needed anyway, its course and student go to the event
+    enrollment: models.Enrollment | None = sql.get(
+        models.Enrollment, validate_int(data.enrollment_id)
+    )
+    if enrollment is None or not enrollment.is_active:
+        raise HTTPException(status_code=404, detail="Enrollment not found")
 
-        task: models.Task | None = sql.get(models.Task, validate_int(data.task_id))
-        if task is None or not task.is_active:
-            raise HTTPException(status_code=404, detail="Task not found")
+    if not is_active(sql, models.Task, data.task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
 
-        sql.add(new_task_completion)
+    sql.add(new_task_completion)
+    try:
+        sql.flush()
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=409, detail="TaskCompletion already exists"
+        ) from e
+    _record_task_completion_event(sql, new_task_completion, enrollment, "created")
+    return TaskCompletionResponse.model_validate(new_task_completion)
+
+
+def create_task_completion(
+    sql: Session, data: TaskCompletionCreate
+) -> TaskCompletionResponse:
+    try:
+        task_completion = _insert_task_completion(sql, data)
         sql.commit()
-        sql.refresh(new_task_completion)
-        return TaskCompletionResponse.model_validate(new_task_completion)
+        return task_completion
     except HTTPException as e:
+        sql.rollback()
         raise e
     except IntegrityError as e:
         sql.rollback()
@@ -56,6 +105,26 @@ def create_task_completion(
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
+async def create_task_completion_grouped(
+    sql: Session, data: TaskCompletionCreate
+) -> TaskCompletionResponse:
+    """Create a task completion in the next group commit of its database.
+
+    Concurrent creates share one transaction and one commit, each in its own
+    savepoint, so a failing one doesn't take the others down.
+    """
+    try:
+        return await group_commit(sql, partial(_insert_task_completion, data=data))
+    except HTTPException as e:
+        raise e
+    except TimeoutError as e:
+        logger.warning("Group commit timed out")
+        raise HTTPException(status_code=503, detail="Write timed out") from e
+    except Exception as e:
+        logger.exception("Unexpected error")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
 def update_task_completion(
     sql: Session, data: TaskCompletionCreate, task_completion_id: int
 ) -> TaskCompletionResponse:
@@ -67,20 +136,18 @@ def update_task_completion(
             raise HTTPException(status_code=404, detail="TaskCompletion not found")
 
         if data.enrollment_id is not None:
-            enrollment: models.Enrollment | None = sql.get(
-                models.Enrollment, validate_int(data.enrollment_id)
-            )
-            if enrollment is None or not enrollment.is_active:
+            if not is_active(sql, models.Enrollment, data.enrollment_id):
                 raise HTTPException(status_code=404, detail="Enrollment not found")
 
         if data.task_id is not None:
-            task: models.Task | None = sql.get(models.Task, data.task_id)
-            if task is None or not task.is_active:
+            if not is_active(sql, models.Task, data.task_id):
                 raise HTTPException(status_code=404, detail="Task not found")
 
         for var, value in vars(data).items():
             setattr(task_completion, var, value)
 
+        enrollment = sql.get(models.Enrollment, task_completion.enrollment_id)
+        _record_task_completion_event(sql, task_completion, enrollment, "updated")
         sql.commit()
         sql.refresh(task_completion)
         return TaskCompletionResponse.model_validate(task_completion)
@@ -125,6 +192,9 @@ def delete_task_completion(
         )
         if task_completion is None:
             raise HTTPException(status_code=404, detail="TaskCompletion not found")
+        _record_task_completion_event(
+            sql, task_completion, task_completion.enrollment, "deleted"
+        )
         sql.delete(task_completion)
         sql.commit()
         return TaskCompletionResponse.model_validate(task_completion)
@@ -1,31 +1,47 @@
 from typing import Annotated
-from app.database import get_sql
+from app.config import settings
+from app.database import SessionRoute, get_sql
+from app.idempotency import idempotent
 from app.src.task_completions.controllers import (
     create_task_completion,
+    create_task_completion_grouped,
     get_task_completions,
     get_task_completion,
     update_task_completion,
     delete_task_completion,
 )
-from app.src.task_completions.schemas import TaskCompletionCreate, TaskCompletionResponse
-from fastapi import APIRouter, Depends
+from app.src.task_completions.schemas import (
+    TaskCompletionCreate,
+    TaskCompletionFilter,
+    TaskCompletionResponse,
+)
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-router = APIRouter(prefix="/task_completion", tags=["TaskCompletion"])
+router = APIRouter(prefix="/task_completion", tags=["TaskCompletion"], route_class=SessionRoute)
 
 
 @router.get("", summary="Get all task_completions", operation_id="getTaskCompletions")
 def endp_get_task_completions(
     sql: Annotated[Session, Depends(get_sql)],
+    filters: Annotated[TaskCompletionFilter, Query()],
 ) -> list[TaskCompletionResponse]:
-    return get_task_completions(sql=sql)
+    return get_task_completions(sql=sql, filters=filters)
 
 
-@router.post("", summary="Create a task_completion", operation_id="createTaskCompletion")
-def endp_create_task_completion(
+@router.post(
+    "",
+    summary="Create a task_completion",
+    operation_id="createTaskCompletion",
+    dependencies=[Depends(idempotent)],
+)
+async def endp_create_task_completion(
     sql: Annotated[Session, Depends(get_sql)], data: TaskCompletionCreate
 ) -> TaskCompletionResponse:
-    return create_task_completion(sql=sql, data=data)
+    if settings.group_commit.enabled:
+        return await create_task_completion_grouped(sql=sql, data=data)
+    return await run_in_threadpool(create_task_completion, sql=sql, data=data)
 
 
 @router.put(
@@ -1,5 +1,8 @@
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+from app.filters import ListQuery
 
 
 class TaskCompletionBase(BaseModel):
@@ -23,4 +26,21 @@ class TaskCompletionUpdate(BaseModel):
     enrollment_id: int | None = None
     task_id: int | None = None
     completed_at: datetime | None = None
-    is_active: bool | None = None
\ No newline at end of file
+    is_active: bool | None = None
+
+
+class TaskCompletionFilter(ListQuery):
+    enrollment_id: int | None = None
+    task_id: int | None = None
+    is_active: bool | None = None
+    completed_at_from: datetime | None = None
+    completed_at_to: datetime | None = None
+    sort: (
+        Literal[
+            "task_completion_id",
+            "-task_completion_id",
+            "completed_at",
+            "-completed_at",
+        ]
+        | None
+    ) = None
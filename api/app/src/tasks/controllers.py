@@ -1,20 +1,78 @@
+import logging
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from app import models
-from app.src.tasks.schemas import TaskCreate, TaskResponse, TaskUpdate
+from app.src.tasks.schemas import TaskCreate, TaskFilter, TaskResponse, TaskUpdate
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from app.cache import cached, invalidate
+from app.existence import is_active, mark_active
+from app.filters import apply_list_query
+from app.src.archive.controllers import get_archived, select_with_archived
 from app.utils import validate_int
+from app.src.events.controllers import record_event
 
+logger = logging.getLogger(__name__)
 
-def get_tasks(sql: Session) -> list[TaskResponse]:
+
+def _record_task_event(sql: Session, task: models.Task, action: str) -> None:
+    record_event(
+        sql,
+        "task",
+        task.task_id,
+        action,
+        TaskResponse.model_validate(task),
+        course_id=task.course_id,
+    )
+
+
+def _cached_task(sql: Session, task_id: int) -> TaskResponse | None:
+    def load() -> TaskResponse | None:
+        task: models.Task | None = sql.get(models.Task, task_id)
+        return None if task is None else TaskResponse.model_validate(task)
+
+    return cached(sql, "task", task_id, load)
+
+
+def _cached_course_tasks(sql: Session, course_id: int) -> tuple[TaskResponse, ...]:
+    def load() -> tuple[TaskResponse, ...]:
+        tasks = sql.execute(
+            select(models.Task)
+            .where(
+                models.Task.course_id == course_id,
+                models.Task.is_active == True,  # noqa: E712
+            )
+            .order_by(models.Task.task_id)
+        ).scalars()
+        return tuple(TaskResponse.model_validate(task) for task in tasks)
+
+    return cached(sql, "course_tasks", course_id, load)
+
+
+def _invalidate_task(sql: Session, task_id: int, *course_ids: int) -> None:
+    invalidate(sql, "task", task_id)
+    invalidate(sql, "course_tasks", *course_ids)
+
+
+def get_tasks(sql: Session, filters: TaskFilter | None = None) -> list[TaskResponse]:
     try:
-        tasks: list[models.Task] = (
-            sql.query(models.Task).filter(models.Task.is_active == True).all()
-        )
+        filters = filters or TaskFilter()
+        # Active tasks of one course, the catalog every course page asks for
+        if filters.course_id is not None and filters.model_dump(
+            exclude_defaults=True
+        ).keys() == {"course_id"}:
+            return list(_cached_course_tasks(sql, filters.course_id))
+
+        if filters.include_archived:
+            tasks = sql.execute(select_with_archived(models.Task, filters)).all()
+        else:
+            tasks: list[models.Task] = sql.execute(
+                apply_list_query(select(models.Task), models.Task.__table__.c, filters)
+            ).scalars().all()
         return [TaskResponse.model_validate(task) for task in tasks]
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Internal server error: ") from e
 
 
@@ -25,15 +83,16 @@ def create_task(
     try:
         task_data = data.model_dump()
         new_task: models.Task = models.Task(**task_data)
-        course: models.Course | None = sql.get(
-            models.Course, validate_int(new_task.course_id)
-        )
-        if course is None or not course.is_active:
+        if not is_active(sql, models.Course, new_task.course_id):
             raise HTTPException(status_code=404, detail="Course not found")
 
         sql.add(new_task)
+        sql.flush()
+        _record_task_event(sql, new_task, "created")
+        _invalidate_task(sql, new_task.task_id, new_task.course_id)
         sql.commit()
         sql.refresh(new_task)
+        mark_active(sql, models.Task, new_task.task_id, new_task.is_active)
         return TaskResponse.model_validate(new_task)
 
     except IntegrityError as e:
@@ -54,20 +113,21 @@ def update_task(sql: Session, data: TaskUpdate, task_id: int) -> TaskResponse:
         task: models.Task | None = sql.get(models.Task, validate_int(task_id))
         if task is None or not task.is_active:
             raise HTTPException(status_code=404, detail="Task not found")
+        previous_course_id = task.course_id
 
         if data.course_id is not None:
-            course: models.Course | None = sql.get(
-                models.Course, validate_int(data.course_id)
-            )
-            if course is None or not course.is_active:
+            if not is_active(sql, models.Course, data.course_id):
                 raise HTTPException(status_code=404, detail="Course not found")
 
         for var, value in vars(data).items():
             if value is not None:
                 setattr(task, var, value)
 
+        _record_task_event(sql, task, "updated")
+        _invalidate_task(sql, task.task_id, previous_course_id, task.course_id)
         sql.commit()
         sql.refresh(task)
+        mark_active(sql, models.Task, task.task_id, task.is_active)
         return TaskResponse.model_validate(task)
 
     except HTTPException as e:
@@ -82,10 +142,17 @@ def update_task(sql: Session, data: TaskUpdate, task_id: int) -> TaskResponse:
         raise HTTPException(status_code=500, detail="Internal server error") from e
 
 
-def get_task(sql: Session, task_id: int) -> TaskResponse:
+def get_task(
+    sql: Session, task_id: int, include_archived: bool = False
+) -> TaskResponse:
     try:
-        task: models.Task | None = sql.get(models.Task, validate_int(task_id))
-        if task is None or not task.is_active:
+        task = _cached_task(sql, validate_int(task_id))
+        if include_archived and task is None:
+            task = get_archived(sql, models.Task, task_id)
+        elif task is not None and not task.is_active and not include_archived:
+            task = None
+
+        if task is None:
             raise HTTPException(status_code=404, detail="Task not found")
         return TaskResponse.model_validate(task)
 
@@ -103,8 +170,11 @@ def delete_task(sql: Session, task_id: int):
             raise HTTPException(status_code=404, detail="Task not found")
 
         task.is_active = False
+        _record_task_event(sql, task, "deleted")
+        _invalidate_task(sql, task.task_id, task.course_id)
         sql.commit()
         sql.refresh(task)
+        mark_active(sql, models.Task, task.task_id, False)
 
     except HTTPException as e:
         raise e
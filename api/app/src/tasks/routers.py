@@ -1,6 +1,8 @@
 from typing import Annotated
 
 from app.annotations import ID_PATH_ANNOTATION
+from app.coalescing import coalesce
+from app.idempotency import idempotent
 from app.src.tasks.controllers import (
     create_task,
     delete_task,
@@ -8,22 +10,33 @@ from app.src.tasks.controllers import (
     update_task,
     get_tasks,
 )
-from app.src.tasks.schemas import TaskCreate, TaskResponse, TaskUpdate
-from fastapi import APIRouter, Depends
+from app.src.tasks.schemas import TaskCreate, TaskFilter, TaskResponse, TaskUpdate
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from app.database import get_sql
+from app.database import SessionRoute, get_sql
 
-router = APIRouter(prefix="/tasks", tags=["Tasks"])
+router = APIRouter(prefix="/tasks", tags=["Tasks"], route_class=SessionRoute)
 
 
-@router.get("", summary="Get all tasks", operation_id="getTasks")
+@router.get(
+    "",
+    summary="Get all tasks",
+    operation_id="getTasks",
+    dependencies=[Depends(coalesce)],
+)
 def endp_get_tasks(
     sql: Annotated[Session, Depends(get_sql)],
+    filters: Annotated[TaskFilter, Query()],
 ) -> list[TaskResponse]:
-    return get_tasks(sql=sql)
+    return get_tasks(sql=sql, filters=filters)
 
 
-@router.post("", summary="Create a task", operation_id="createTasks")
+@router.post(
+    "",
+    summary="Create a task",
+    operation_id="createTasks",
+    dependencies=[Depends(idempotent)],
+)
 def endp_create_task(
     sql: Annotated[Session, Depends(get_sql)], data: TaskCreate,
 ) -> TaskResponse:
@@ -39,11 +52,18 @@ def endp_update_task(
     return update_task(sql=sql, data=data, task_id=task_id)
 
 
-@router.get("/{task_id}", summary="Get a task", operation_id="getTask")
+@router.get(
+    "/{task_id}",
+    summary="Get a task",
+    operation_id="getTask",
+    dependencies=[Depends(coalesce)],
+)
 def endp_get_task(
-    sql: Annotated[Session, Depends(get_sql)], task_id: ID_PATH_ANNOTATION
+    sql: Annotated[Session, Depends(get_sql)],
+    task_id: ID_PATH_ANNOTATION,
+    include_archived: bool = False,
 ) -> TaskResponse:
-    return get_task(sql=sql, task_id=task_id)
+    return get_task(sql=sql, task_id=task_id, include_archived=include_archived)
 
 
 @router.delete(
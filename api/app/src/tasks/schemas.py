@@ -1,4 +1,7 @@
+from typing import Literal
+
 from pydantic import BaseModel, ConfigDict, Field
+from app.filters import ListQuery
 
 
 class TaskBase(BaseModel):
@@ -22,3 +25,10 @@ class TaskUpdate(BaseModel):
     description: str | None = Field(None, min_length=1, max_length=100)
     course_id: int | None = None
     is_active: bool | None = None
+
+
+class TaskFilter(ListQuery):
+    course_id: int | None = None
+    is_active: bool | None = True
+    include_archived: bool = False
+    sort: Literal["task_id", "-task_id"] | None = None
@@ -1,3 +1,4 @@
+import logging
 from app import models
 from app.src.users.schemas import (
     UserCreate,
@@ -5,22 +6,26 @@ from app.src.users.schemas import (
     UserResponseTasksAndCourses,
     UserUpdate,
 )
+from app.existence import is_active, mark_active
+from app.src.cascade.controllers import set_active
 from app.utils import validate_int
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, OperationalError
 
+logger = logging.getLogger(__name__)
+
 
 def create_user(sql: Session, data: UserCreate) -> UserResponse:
     try:
         new_user: models.User = models.User(**data.model_dump())
 
-        role: models.Role | None = sql.get(models.Role, validate_int(new_user.role_id))
-        if role is None:
+        if not is_active(sql, models.Role, new_user.role_id):
             raise HTTPException(status_code=404, detail="Role not found")
         sql.add(new_user)
         sql.commit()
         sql.refresh(new_user)
+        mark_active(sql, models.User, new_user.user_id, new_user.is_active)
         return UserResponse.model_validate(new_user)
     
     except HTTPException as e:
@@ -33,7 +38,7 @@ def create_user(sql: Session, data: UserCreate) -> UserResponse:
         raise HTTPException(status_code=500, detail=str(e.orig)) from e
     
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
@@ -53,7 +58,7 @@ def get_users(sql: Session) -> list[UserResponse]:
         raise HTTPException(status_code=500, detail=str(e.orig)) from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
@@ -72,7 +77,7 @@ def get_user(sql: Session, user_id: int) -> UserResponse:
         raise HTTPException(status_code=500, detail=str(e.orig)) from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
@@ -83,16 +88,22 @@ def update_user(sql: Session, user_id: int, data: UserUpdate) -> UserResponse:
             raise HTTPException(status_code=404, detail="User not found")
 
         if data.role_id is not None:
-            role: models.Role | None = sql.get(models.Role, validate_int(data.role_id))
-            if role is None:
+            if not is_active(sql, models.Role, data.role_id):
                 raise HTTPException(status_code=404, detail="Role not found")
 
-        for key, value in data.model_dump(exclude_unset=True).items():
+        for key, value in data.model_dump(
+            exclude_unset=True, exclude={"is_active"}
+        ).items():
             if value is not None:
                 setattr(user, key, value)
 
-        sql.commit()
+        if data.is_active is not None:
+            # Cascades like deactivate and reactivate, commits the rest too
+            set_active(sql, "user", user.user_id, data.is_active)
+        else:
+            sql.commit()
         sql.refresh(user)
+        mark_active(sql, models.User, user.user_id, user.is_active)
         return UserResponse.model_validate(user)
 
     except HTTPException as e:
@@ -105,7 +116,7 @@ def update_user(sql: Session, user_id: int, data: UserUpdate) -> UserResponse:
         raise HTTPException(status_code=500, detail=str(e.orig)) from e
 
     except Exception as e:
-        print(e)
+        logger.exception("Unexpected error")
         raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
@@ -1,14 +1,25 @@
 from typing import Annotated
 from app.annotations import ID_PATH_ANNOTATION
-from app.database import get_sql
+from app.database import SessionRoute, get_sql
+from app.src.auth.controllers import get_current_admin
+from app.src.cascade.controllers import set_active
+from app.src.cascade.schemas import CascadeResult
 from app.src.users.controllers import create_user, get_user, get_user_tasks_and_courses, get_users, update_user
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from app.src.users.schemas import UserCreate, UserResponse, UserResponseTasksAndCourses, UserUpdate
 
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=SessionRoute)
+
+# Mounted behind authentication, cascades are for administrators only
+admin_router = APIRouter(
+    prefix="/users",
+    tags=["Users"],
+    dependencies=[Depends(get_current_admin)],
+    route_class=SessionRoute,
+)
 
 
 @router.get("", summary="Get all users", operation_id="getUsers")
@@ -31,6 +42,9 @@ def endp_update_user(
     sql: Annotated[Session, Depends(get_sql)],
     data: UserUpdate,
 ) -> UserResponse:
+    if data.is_active is not None:
+        # Cascades to enrollments, administrators use /deactivate and /reactivate
+        raise HTTPException(status_code=403, detail="Not enough permissions")
     return update_user(sql, user_id, data)
 
 
@@ -46,3 +60,25 @@ def endp_get_user_task_and_courses(
     sql: Annotated[Session, Depends(get_sql)], user_id: ID_PATH_ANNOTATION
 ) -> UserResponseTasksAndCourses:
     return get_user_tasks_and_courses(sql, user_id)
+
+
+@admin_router.post(
+    "/{user_id}/deactivate",
+    summary="Deactivate a user with everything below it",
+    operation_id="deactivateUser",
+)
+def endp_deactivate_user(
+    user_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
+) -> CascadeResult:
+    return set_active(sql, "user", user_id, False)
+
+
+@admin_router.post(
+    "/{user_id}/reactivate",
+    summary="Reactivate a user with what its deactivation took along",
+    operation_id="reactivateUser",
+)
+def endp_reactivate_user(
+    user_id: ID_PATH_ANNOTATION, sql: Annotated[Session, Depends(get_sql)]
+) -> CascadeResult:
+    return set_active(sql, "user", user_id, True)
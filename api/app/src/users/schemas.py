@@ -1,7 +1,7 @@
 from app.src.task_completions.schemas import TaskCompletionResponse
-from app.src.courses.schemas import CourseResponse
+from app.src.courses.schemas import CourseResponse, CourseResponseExpanded
 from app.src.roles.schemas import RoleResponse
-from app.src.enrollments.schemas import EnrollmentResponse
+from app.src.enrollments.schemas import EnrollmentResponse, EnrollmentResponseExpanded
 from pydantic import BaseModel, ConfigDict, Field, EmailStr
 
 
@@ -26,6 +26,11 @@ class UserResponse(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Resolve the UserResponse forward references of the expanded schemas
+CourseResponseExpanded.model_rebuild()
+EnrollmentResponseExpanded.model_rebuild()
+
+
 class UserUpdate(BaseModel):
     username: str | None = Field(None, min_length=3, max_length=50)
     first_name: str | None = Field(None, min_length=1, max_length=50)
@@ -0,0 +1,47 @@
+import re
+from typing import Annotated
+
+import jwt
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordBearer
+
+from app.config import settings
+
+# Tenant names end up in file paths, nothing else gets through
+TENANT_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+_optional_token = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+
+
+def validate_tenant(tenant: str) -> str:
+    if not TENANT_PATTERN.fullmatch(tenant):
+        raise HTTPException(status_code=400, detail="Invalid tenant")
+    return tenant
+
+
+def decode_token(token: str | None) -> dict:
+    """Claims of a valid token, empty for a missing or invalid one."""
+    if token is None:
+        return {}
+    try:
+        return jwt.decode(
+            token, settings.auth.secret_key, algorithms=[settings.auth.algorithm]
+        )
+    except jwt.PyJWTError:
+        return {}
+
+
+def get_tenant(
+    request: Request, token: Annotated[str | None, Depends(_optional_token)]
+) -> str | None:
+    """Resolve the school of a request, None is the default database.
+
+    The tenant claim of a valid token wins, the header only picks the school
+    to log in to. Invalid tokens are left for get_current_user to reject.
+    """
+    payload = decode_token(token)
+    if "tenant" in payload:
+        return payload["tenant"]
+
+    tenant = request.headers.get(settings.sql.tenant_header)
+    return validate_tenant(tenant) if tenant else None
@@ -4,7 +4,16 @@ from fastapi import HTTPException
 def validate_int(number: int) -> int:
     try:
         number_str = str(number)
-        number_int = int(number_str, base=8)
+        number_int = int(number_str)
         return number_int
     except ValueError as e:
         raise HTTPException(status_code=400, detail="Invalid number") from e
+
+
+def split_comma_separated(value):
+    # Query lists as ?x=1,2 as well as ?x=1&x=2
+    if isinstance(value, str):
+        value = [value]
+    if isinstance(value, list):
+        return [part for item in value for part in str(item).split(",") if part]
+    return value
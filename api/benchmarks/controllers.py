@@ -0,0 +1,355 @@
+"""Timings and query counts of hot controllers against stored baselines.
+
+Run from api/: ``python -m benchmarks.controllers [--sizes small medium]``.
+Every size is seeded into its own tenant database in a temporary directory
+and the controllers are called directly, without HTTP. Exits with 1 when a
+median is more than --threshold slower than its baseline or a controller
+runs more queries. ``--update`` stores the results as the new baseline,
+timings only compare against baselines recorded on the same machine.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+_directory = tempfile.mkdtemp()
+os.environ["sql__name"] = str(Path(_directory) / "bench")
+os.environ["sql__tenant_dir"] = _directory
+os.environ.setdefault("auth__secret_key", "benchmark")
+os.environ.setdefault("auth__algorithm", "HS256")
+os.environ.setdefault("auth__access_token_expire_minutes", "30")
+
+from sqlalchemy import event, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models  # noqa: E402
+from app.bootstrap import init_database  # noqa: E402
+from app.database import Database, get_database  # noqa: E402
+from app.existence import load_indexes  # noqa: E402
+from app.src.auth.controllers import get_current_user  # noqa: E402
+from app.src.auth.utils import create_access_token  # noqa: E402
+from app.src.enrollments.controllers import (  # noqa: E402
+    create_enrollment,
+    get_enrollments,
+    get_task_completions_for_user,
+)
+from app.src.enrollments.schemas import (  # noqa: E402
+    EnrollmentCreate,
+    EnrollmentFilter,
+)
+from app.src.users.controllers import (  # noqa: E402
+    get_user_tasks_and_courses,
+    get_users,
+)
+
+BASELINE = Path(__file__).parent / "baselines" / "controllers.json"
+
+
+@dataclass(frozen=True)
+class Dataset:
+    students: int
+    courses: int
+    tasks_per_course: int
+    enrollments_per_student: int
+    # Share of an enrollment's tasks that are completed
+    completed: float
+
+
+SIZES: dict[str, Dataset] = {
+    "small": Dataset(100, 10, 10, 3, 0.5),
+    "medium": Dataset(1000, 50, 20, 5, 0.5),
+    "large": Dataset(5000, 200, 20, 8, 0.3),
+}
+
+
+def seed(database: Database, dataset: Dataset) -> list[tuple[int, int]]:
+    """Fill a database, returns (student, enrollment) pairs to look up."""
+    init_database(database.writer)
+    rng = random.Random(0)
+    today = date.today()
+    with database.writer.begin() as conn:
+        conn.execute(insert(models.Category), [{"name": "Benchmark"}])
+        conn.execute(
+            insert(models.User),
+            [
+                {
+                    "user_id": user_id,
+                    "username": f"user{user_id}",
+                    "first_name": "First",
+                    "last_name": "Last",
+                    "email": f"user{user_id}@example.com",
+                    "password_hash": "secret",
+                    "role_id": 1,
+                }
+                for user_id in range(1, dataset.students + 1)
+            ],
+        )
+        conn.execute(
+            insert(models.Course),
+            [
+                {
+                    "course_id": course_id,
+                    "title": f"Course {course_id}",
+                    "category_id": 1,
+                    "teacher_id": 1,
+                }
+                for course_id in range(1, dataset.courses + 1)
+            ],
+        )
+        tasks = {
+            course_id: range(
+                (course_id - 1) * dataset.tasks_per_course + 1,
+                course_id * dataset.tasks_per_course + 1,
+            )
+            for course_id in range(1, dataset.courses + 1)
+        }
+        conn.execute(
+            insert(models.Task),
+            [
+                {"task_id": task_id, "course_id": course_id, "title": "Task"}
+                for course_id, task_ids in tasks.items()
+                for task_id in task_ids
+            ],
+        )
+
+        enrollments = []
+        completions = []
+        for student_id in range(1, dataset.students + 1):
+            for course_id in rng.sample(
+                range(1, dataset.courses + 1), dataset.enrollments_per_student
+            ):
+                enrollment_id = len(enrollments) + 1
+                enrollments.append(
+                    {
+                        "enrollment_id": enrollment_id,
+                        "student_id": student_id,
+                        "course_id": course_id,
+                        "assigner_id": 1,
+                        "enrolled_at": today,
+                    }
+                )
+                completions += [
+                    {
+                        "enrollment_id": enrollment_id,
+                        "task_id": task_id,
+                        "completed_at": datetime.utcnow(),
+                    }
+                    for task_id in tasks[course_id]
+                    if rng.random() < dataset.completed
+                ]
+        conn.execute(insert(models.Enrollment), enrollments)
+        conn.execute(insert(models.TaskCompletion), completions)
+
+    # Ids were written behind the bitmap's back
+    load_indexes(database.writer)
+    return [(row["student_id"], row["enrollment_id"]) for row in enrollments]
+
+
+class QueryCounter:
+    def __init__(self, database: Database):
+        self.count = 0
+        for engine in (database.writer, database.reader):
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args: Any) -> None:
+        self.count += 1
+
+
+@dataclass
+class Case:
+    name: str
+    # Returns the session factory and a call taking the session
+    prepare: Callable[[], tuple[Callable[[], Session], Callable[[Session], Any]]]
+
+
+def build_cases(
+    tenant: str, database: Database, dataset: Dataset, pairs: list[tuple[int, int]]
+) -> list[Case]:
+    rng = random.Random(1)
+    loop = asyncio.new_event_loop()
+    token = create_access_token({"sub": "user1", "tenant": tenant})
+    enrolled = {(student, course) for student, course in _enrolled_pairs(database)}
+    free_pairs = iter(
+        [
+            (student, course)
+            for student in range(1, dataset.students + 1)
+            for course in range(1, dataset.courses + 1)
+            if (student, course) not in enrolled
+        ]
+    )
+
+    def reads(call: Callable[[Session], Any]) -> Callable[[], tuple]:
+        return lambda: (database.read_sessions, call)
+
+    def task_completions() -> tuple:
+        student_id, enrollment_id = rng.choice(pairs)
+        return database.read_sessions, lambda sql: get_task_completions_for_user(
+            sql, student_id, enrollment_id
+        )
+
+    def tasks_and_courses() -> tuple:
+        student_id = rng.randint(1, dataset.students)
+        return database.read_sessions, lambda sql: get_user_tasks_and_courses(
+            sql, student_id
+        )
+
+    def enrollment() -> tuple:
+        student_id, course_id = next(free_pairs)
+        data = EnrollmentCreate(
+            student_id=student_id, course_id=course_id, assigner_id=1
+        )
+        return database.write_sessions, lambda sql: create_enrollment(sql, data)
+
+    def current_user(sql: Session) -> Any:
+        return loop.run_until_complete(get_current_user(token, sql, tenant))
+
+    return [
+        Case("get_task_completions_for_user", task_completions),
+        Case("get_user_tasks_and_courses", tasks_and_courses),
+        Case("create_enrollment", enrollment),
+        Case("get_current_user", reads(current_user)),
+        Case("get_users", reads(get_users)),
+        Case(
+            "get_enrollments",
+            reads(lambda sql: get_enrollments(sql, EnrollmentFilter())),
+        ),
+    ]
+
+
+def _enrolled_pairs(database: Database) -> list[tuple[int, int]]:
+    with database.read_sessions() as sql:
+        return sql.query(
+            models.Enrollment.student_id, models.Enrollment.course_id
+        ).all()
+
+
+def measure(
+    case: Case, counter: QueryCounter, repeat: int, warmup: int
+) -> dict[str, Any]:
+    timings = []
+    queries = []
+    for run in range(warmup + repeat):
+        sessions, call = case.prepare()
+        before = counter.count
+        start = time.perf_counter()
+        # A request's worth of work, session opened and closed around it
+        with sessions() as sql:
+            call(sql)
+        elapsed = time.perf_counter() - start
+        if run >= warmup:
+            timings.append(elapsed * 1000)
+            queries.append(counter.count - before)
+
+    timings.sort()
+    return {
+        "runs": repeat,
+        "min_ms": round(timings[0], 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "queries": max(queries),
+    }
+
+
+def calibrate(repeat: int = 15) -> float:
+    """Median ms of a fixed pure Python workload, the speed of the machine now."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = [{"id": i, "name": f"row {i}", "tags": [i, i + 1]} for i in range(5000)]
+        json.loads(json.dumps(sorted(rows, key=lambda row: row["name"])))
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(timings), 4)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for size, result_size in results.items():
+        base_size = baseline.get(size)
+        if base_size is None:
+            continue
+        # Shared machines speed up and slow down, compare at the baseline's speed
+        speed = result_size["calibration_ms"] / base_size["calibration_ms"]
+        for name, result in result_size["controllers"].items():
+            base = base_size["controllers"].get(name)
+            if base is None:
+                continue
+            expected = base["median_ms"] * speed
+            if result["median_ms"] > expected * (1 + threshold):
+                regressions.append(
+                    f"{size}/{name}: median {result['median_ms']:.3f} ms, "
+                    f"baseline {expected:.3f} ms at this machine speed"
+                )
+            if result["queries"] > base["queries"]:
+                regressions.append(
+                    f"{size}/{name}: {result['queries']} queries, "
+                    f"baseline {base['queries']}"
+                )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes", nargs="+", choices=list(SIZES), default=list(SIZES)
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Allowed median slowdown"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--update", action="store_true", help="Store the results as the baseline"
+    )
+    args = parser.parse_args()
+
+    results: dict[str, dict] = {}
+    print(
+        f"{'size':<7} {'controller':<31} {'median ms':>10} {'p95 ms':>9} "
+        f"{'queries':>8}"
+    )
+    for size in args.sizes:
+        tenant = f"bench-{size}"
+        database = get_database(tenant, create=True)
+        pairs = seed(database, SIZES[size])
+        counter = QueryCounter(database)
+        results[size] = {"calibration_ms": calibrate(), "controllers": {}}
+        for case in build_cases(tenant, database, SIZES[size], pairs):
+            result = measure(case, counter, args.repeat, args.warmup)
+            results[size]["controllers"][case.name] = result
+            print(
+                f"{size:<7} {case.name:<31} {result['median_ms']:>10.3f} "
+                f"{result['p95_ms']:>9.3f} {result['queries']:>8}"
+            )
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.update:
+        stored.setdefault("sizes", {}).update(results)
+        stored["machine"] = f"{platform.machine()} {platform.python_version()}"
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, stored.get("sizes", {}), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Task completion inserts, a commit per request vs group commits.
+
+Run from api/: ``python -m benchmarks.group_commit [--seconds 3]``.
+Uses a throwaway database in a temporary directory.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+_directory = tempfile.mkdtemp()
+os.environ["sql__name"] = str(Path(_directory) / "bench")
+os.environ.setdefault("auth__secret_key", "benchmark")
+os.environ.setdefault("auth__algorithm", "HS256")
+os.environ.setdefault("auth__access_token_expire_minutes", "30")
+
+from app import group_commit, models  # noqa: E402
+from app.bootstrap import init_database  # noqa: E402
+from app.database import default_database  # noqa: E402
+from app.src.task_completions.controllers import (  # noqa: E402
+    _insert_task_completion,
+    create_task_completion,
+)
+from app.src.task_completions.schemas import TaskCompletionCreate  # noqa: E402
+
+TASKS = 20
+STUDENTS = 100
+
+
+def seed() -> None:
+    init_database(default_database.writer)
+    with default_database.write_sessions() as sql:
+        sql.add(models.Category(name="Benchmark"))
+        for user_id in range(1, STUDENTS + 2):
+            sql.add(
+                models.User(
+                    user_id=user_id,
+                    username=f"user{user_id}",
+                    first_name="U",
+                    last_name="U",
+                    email=f"user{user_id}@example.com",
+                    password_hash="secret",
+                    role_id=1,
+                )
+            )
+        sql.flush()
+        sql.add(models.Course(course_id=1, title="Course", category_id=1, teacher_id=1))
+        for task_id in range(1, TASKS + 1):
+            sql.add(models.Task(task_id=task_id, course_id=1, title="Task"))
+        for student_id in range(2, STUDENTS + 2):
+            sql.add(
+                models.Enrollment(
+                    enrollment_id=student_id - 1,
+                    course_id=1,
+                    student_id=student_id,
+                    assigner_id=1,
+                    enrolled_at=datetime.utcnow(),
+                )
+            )
+        sql.commit()
+
+
+def completion() -> TaskCompletionCreate:
+    return TaskCompletionCreate(
+        enrollment_id=random.randint(1, STUDENTS), task_id=random.randint(1, TASKS)
+    )
+
+
+def per_request() -> None:
+    with default_database.write_sessions() as sql:
+        create_task_completion(sql, completion())
+
+
+def grouped() -> None:
+    group_commit.submit(
+        default_database.writer,
+        partial(_insert_task_completion, data=completion()),
+    ).result()
+
+
+def client(write, stop: threading.Event, latencies: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        write()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def run(write, clients: int, seconds: float) -> list[float]:
+    stop = threading.Event()
+    latencies: list[float] = []
+    threads = [
+        threading.Thread(target=client, args=(write, stop, latencies))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    seed()
+    modes = {"per-request": per_request, "group": grouped}
+    print(
+        f"{'commit':<12} {'clients':>7} {'writes/s':>10} {'p50 ms':>8} "
+        f"{'p95 ms':>8} {'per batch':>9}"
+    )
+    for name, write in modes.items():
+        for clients in args.clients:
+            writer = group_commit._writers.get(default_database.writer)
+            before = (writer.batches, writer.operations) if writer else (0, 0)
+            latencies = run(write, clients, args.seconds)
+            writer = group_commit._writers.get(default_database.writer)
+            batches, operations = (
+                (writer.batches - before[0], writer.operations - before[1])
+                if writer
+                else (0, 0)
+            )
+            percentiles = statistics.quantiles(latencies, n=20)
+            print(
+                f"{name:<12} {clients:>7} {len(latencies) / args.seconds:>10.0f} "
+                f"{percentiles[9]:>8.2f} {percentiles[18]:>8.2f} "
+                f"{operations / batches if batches else 1:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
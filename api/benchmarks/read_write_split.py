@@ -0,0 +1,121 @@
+"""Read throughput with writes in flight, read-only sessions vs the writer.
+
+Run from api/: ``python -m benchmarks.read_write_split [--seconds 3]``.
+Uses a throwaway database in a temporary directory.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+_directory = tempfile.mkdtemp()
+os.environ["sql__name"] = str(Path(_directory) / "bench")
+os.environ.setdefault("auth__secret_key", "benchmark")
+os.environ.setdefault("auth__algorithm", "HS256")
+os.environ.setdefault("auth__access_token_expire_minutes", "30")
+
+from sqlalchemy import select, update  # noqa: E402
+
+from app import models  # noqa: E402
+from app.bootstrap import init_database  # noqa: E402
+from app.database import default_database  # noqa: E402
+
+COURSES = 200
+TASKS_PER_COURSE = 10
+
+
+def seed() -> None:
+    init_database(default_database.writer)
+    with default_database.write_sessions() as sql:
+        sql.add(models.Category(name="Benchmark"))
+        sql.add(
+            models.User(
+                username="teacher",
+                first_name="T",
+                last_name="T",
+                email="teacher@example.com",
+                password_hash="secret",
+                role_id=1,
+            )
+        )
+        sql.flush()
+        for course_id in range(1, COURSES + 1):
+            sql.add(
+                models.Course(
+                    course_id=course_id,
+                    title=f"Course {course_id}",
+                    category_id=1,
+                    teacher_id=1,
+                )
+            )
+            for _ in range(TASKS_PER_COURSE):
+                sql.add(models.Task(course_id=course_id, title="Task"))
+        sql.commit()
+
+
+def reader(sessions, stop: threading.Event, counts: list[int], slot: int) -> None:
+    while not stop.is_set():
+        with sessions() as sql:
+            # A request's worth of reads in one session
+            course_id = random.randint(1, COURSES)
+            sql.get(models.Course, course_id)
+            sql.execute(
+                select(models.Task).where(models.Task.course_id == course_id)
+            ).scalars().all()
+        counts[slot] += 1
+
+
+def writer(stop: threading.Event, counts: list[int]) -> None:
+    while not stop.is_set():
+        with default_database.write_sessions() as sql:
+            sql.execute(
+                update(models.Task)
+                .where(models.Task.task_id == random.randint(1, COURSES))
+                .values(title=f"Task {time.monotonic()}")
+            )
+            sql.commit()
+        counts[0] += 1
+
+
+def run(sessions, workers: int, seconds: float) -> tuple[float, float]:
+    stop = threading.Event()
+    reads = [0] * workers
+    writes = [0]
+    threads = [threading.Thread(target=writer, args=(stop, writes))]
+    threads += [
+        threading.Thread(target=reader, args=(sessions, stop, reads, slot))
+        for slot in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return sum(reads) / seconds, writes[0] / seconds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    seed()
+    modes = {
+        "read-only": default_database.read_sessions,
+        "writer": default_database.write_sessions,
+    }
+    print(f"{'sessions':<10} {'workers':>7} {'reads/s':>10} {'writes/s':>10}")
+    for name, sessions in modes.items():
+        for workers in args.workers:
+            reads, writes = run(sessions, workers, args.seconds)
+            print(f"{name:<10} {workers:>7} {reads:>10.0f} {writes:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
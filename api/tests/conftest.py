@@ -0,0 +1,25 @@
+import os
+import tempfile
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Settings are read when app is first imported, point them at throwaway files
+_directory = Path(tempfile.mkdtemp())
+os.environ["sql__name"] = str(_directory / "test")
+os.environ["sql__tenant_dir"] = str(_directory / "tenants")
+os.environ.setdefault("auth__secret_key", "test")
+os.environ.setdefault("auth__algorithm", "HS256")
+os.environ.setdefault("auth__access_token_expire_minutes", "30")
+
+from app.bootstrap import init_database  # noqa: E402
+from app.database import Database, get_database  # noqa: E402
+
+
+@pytest.fixture
+def database() -> Database:
+    """A fresh, initialized database file of its own for every test."""
+    database = get_database(f"test-{uuid.uuid4().hex[:12]}", create=True)
+    init_database(database.writer)
+    return database
@@ -0,0 +1,47 @@
+from app import models
+from app.database import Database
+from app.src.archive.controllers import archive_inactive
+from app.src.tasks.controllers import get_tasks
+from app.src.tasks.schemas import TaskFilter
+
+
+def _course_with_tasks(database: Database) -> tuple[int, int, int]:
+    with database.write_sessions() as sql:
+        sql.add(models.Category(category_id=1, name="Category"))
+        sql.add(
+            models.User(
+                user_id=1,
+                username="teacher",
+                first_name="T",
+                last_name="T",
+                email="teacher@example.com",
+                password_hash="secret",
+                role_id=1,
+            )
+        )
+        sql.flush()
+        sql.add(models.Course(course_id=1, title="Course", category_id=1, teacher_id=1))
+        sql.add(models.Task(task_id=1, course_id=1, title="Hot"))
+        sql.add(models.Task(task_id=2, course_id=1, title="Archived", is_active=False))
+        sql.commit()
+        archive_inactive(sql, retention_days=0)
+    return 1, 1, 2
+
+
+def _task_ids(database: Database, **filters) -> list[int]:
+    with database.read_sessions() as sql:
+        tasks = get_tasks(sql, TaskFilter(include_archived=True, **filters))
+        return sorted(task.task_id for task in tasks)
+
+
+def test_include_archived_lists_hot_and_archived_tasks(database: Database):
+    course_id, hot_id, archived_id = _course_with_tasks(database)
+
+    assert _task_ids(database, course_id=course_id) == [hot_id, archived_id]
+
+
+def test_explicit_is_active_filters_archived_tasks_too(database: Database):
+    course_id, hot_id, archived_id = _course_with_tasks(database)
+
+    assert _task_ids(database, course_id=course_id, is_active=True) == [hot_id]
+    assert _task_ids(database, course_id=course_id, is_active=False) == [archived_id]
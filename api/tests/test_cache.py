@@ -0,0 +1,47 @@
+from app import cache, models
+from app.database import Database
+from app.src.courses.controllers import get_course, update_course
+from app.src.courses.schemas import CourseUpdate
+
+
+def _course(database: Database) -> int:
+    with database.write_sessions() as sql:
+        sql.add(models.Category(category_id=1, name="Category"))
+        sql.add(
+            models.User(
+                user_id=1,
+                username="teacher",
+                first_name="T",
+                last_name="T",
+                email="teacher@example.com",
+                password_hash="secret",
+                role_id=1,
+            )
+        )
+        sql.flush()
+        course = models.Course(title="Before", category_id=1, teacher_id=1)
+        sql.add(course)
+        sql.commit()
+        return course.course_id
+
+
+def _title(database: Database, course_id: int) -> str:
+    with database.read_sessions() as sql:
+        return get_course(sql, course_id).title
+
+
+def test_write_on_another_worker_drops_cached_entries(database: Database):
+    course_id = _course(database)
+    assert _title(database, course_id) == "Before"
+
+    # Another worker has regions of its own, only the database is shared
+    regions = cache._regions.pop(database.writer)
+    try:
+        with database.write_sessions() as sql:
+            update_course(sql, CourseUpdate(title="After"), course_id)
+    finally:
+        cache._regions[database.writer] = regions
+
+    assert _title(database, course_id) == "After"
+    assert _title(database, course_id) == "After"
+    assert cache.region_stats(database.writer)[0]["hits"] == 1
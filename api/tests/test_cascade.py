@@ -0,0 +1,83 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import models
+from app.database import Database
+from app.src.cascade.controllers import set_active
+from app.src.courses.controllers import update_course
+from app.src.courses.schemas import CourseUpdate
+
+TEACHER, STUDENT = 1, 2
+COURSE, OTHER_COURSE = 1, 2
+
+
+@pytest.fixture
+def courses(database: Database) -> Database:
+    with database.write_sessions() as sql:
+        sql.add(models.Category(category_id=1, name="Category"))
+        for user_id in (TEACHER, STUDENT):
+            sql.add(
+                models.User(
+                    user_id=user_id,
+                    username=f"user{user_id}",
+                    first_name="U",
+                    last_name="U",
+                    email=f"user{user_id}@example.com",
+                    password_hash="secret",
+                    role_id=1,
+                )
+            )
+        sql.flush()
+        for course_id in (COURSE, OTHER_COURSE):
+            sql.add(
+                models.Course(
+                    course_id=course_id,
+                    title=f"Course {course_id}",
+                    category_id=1,
+                    teacher_id=TEACHER,
+                )
+            )
+            sql.add(models.Task(task_id=course_id, title="Task", course_id=course_id))
+            sql.add(
+                models.Enrollment(
+                    enrollment_id=course_id,
+                    course_id=course_id,
+                    student_id=STUDENT,
+                    assigner_id=TEACHER,
+                    enrolled_at=date.today(),
+                )
+            )
+        sql.commit()
+    return database
+
+
+def _active(database: Database, model: type) -> list[int]:
+    with database.read_sessions() as sql:
+        primary_key = model.__mapper__.primary_key[0]
+        return sorted(
+            sql.scalars(select(primary_key).where(model.is_active == True))  # noqa: E712
+        )
+
+
+def test_reactivation_skips_rows_under_another_inactive_parent(courses):
+    with courses.write_sessions() as sql:
+        set_active(sql, "user", STUDENT, False)
+    with courses.write_sessions() as sql:
+        set_active(sql, "course", OTHER_COURSE, False)
+
+    with courses.write_sessions() as sql:
+        result = set_active(sql, "user", STUDENT, True)
+
+    assert result.enrollments == 1
+    assert _active(courses, models.Enrollment) == [COURSE]
+
+
+def test_deactivating_through_update_cascades(courses):
+    with courses.write_sessions() as sql:
+        course = update_course(sql, CourseUpdate(is_active=False), COURSE)
+
+    assert not course.is_active
+    assert _active(courses, models.Task) == [OTHER_COURSE]
+    assert _active(courses, models.Enrollment) == [OTHER_COURSE]
@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import coalescing, models, ratelimit
+from app.coalescing import CoalescedError, CoalescingMiddleware, coalesced_handler
+from app.bootstrap import init_database
+from app.config import settings
+from app.database import default_database
+from app.src.auth.utils import create_access_token
+from app.src.courses import routers as course_routers
+from app.src.routers import router as api_router
+
+SLOTS = 4
+REQUESTS = 20
+LEADER_SECONDS = 1.0
+
+
+@pytest.fixture
+def client(monkeypatch) -> TestClient:
+    init_database(default_database.writer)
+    with default_database.write_sessions() as sql:
+        if sql.get(models.User, 1) is None:
+            sql.add(
+                models.User(
+                    user_id=1,
+                    username="student",
+                    first_name="S",
+                    last_name="S",
+                    email="student@example.com",
+                    password_hash="secret",
+                    role_id=1,
+                )
+            )
+            sql.commit()
+
+    monkeypatch.setattr(settings.rate_limit, "enabled", True)
+    monkeypatch.setattr(settings.rate_limit.private, "user_burst", 1000)
+    monkeypatch.setattr(settings.rate_limit.private, "ip_burst", 1000)
+    monkeypatch.setattr(ratelimit, "_db_slots", threading.BoundedSemaphore(SLOTS))
+    monkeypatch.setattr(coalescing, "coalescer", coalescing.Coalescer())
+
+    app = FastAPI()
+    app.add_middleware(CoalescingMiddleware)
+    app.add_exception_handler(CoalescedError, coalesced_handler)
+    app.include_router(api_router)
+    client = TestClient(app)
+    token = create_access_token({"sub": "student"})
+    client.headers["Authorization"] = f"Bearer {token}"
+    return client
+
+
+def test_burst_of_identical_gets_shares_one_response(client, monkeypatch):
+    calls = []
+    get_courses = course_routers.get_courses
+
+    def slow_get_courses(**kwargs):
+        calls.append(kwargs)
+        time.sleep(LEADER_SECONDS)
+        return get_courses(**kwargs)
+
+    monkeypatch.setattr(course_routers, "get_courses", slow_get_courses)
+
+    with ThreadPoolExecutor(REQUESTS) as pool:
+        responses = list(pool.map(lambda _: client.get("/courses"), range(REQUESTS)))
+
+    # Followers wait without a database slot, far more of them than slots
+    assert [response.status_code for response in responses] == [200] * REQUESTS
+    assert len(calls) == 1
+    coalesced = [r for r in responses if r.headers.get("X-Coalesced") == "true"]
+    assert len(coalesced) == REQUESTS - 1
+    assert coalescing.coalescer.stats()["coalesced"] == REQUESTS - 1
@@ -0,0 +1,141 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from app import models
+from app.database import Database
+from app.src.events.controllers import (
+    authorize_subscription,
+    get_events,
+    prune_events,
+    record_event,
+)
+from app.src.roles.schemas import RoleResponse
+from app.src.users.schemas import UserResponse
+
+TEACHER, STUDENT, OTHER_STUDENT, OUTSIDER = 1, 2, 3, 4
+COURSE = 1
+
+
+class Payload(BaseModel):
+    value: int = 0
+
+
+def _user(user_id: int, role: str = "User") -> UserResponse:
+    return UserResponse(
+        user_id=user_id,
+        username=f"user{user_id}",
+        first_name="U",
+        last_name="U",
+        email=f"user{user_id}@example.com",
+        role=RoleResponse(role_id=1, name=role, description=None),
+    )
+
+
+@pytest.fixture
+def course(database: Database) -> Database:
+    with database.write_sessions() as sql:
+        sql.add(models.Category(category_id=1, name="Category"))
+        for user_id in (TEACHER, STUDENT, OTHER_STUDENT, OUTSIDER):
+            sql.add(
+                models.User(
+                    user_id=user_id,
+                    username=f"user{user_id}",
+                    first_name="U",
+                    last_name="U",
+                    email=f"user{user_id}@example.com",
+                    password_hash="secret",
+                    role_id=1,
+                )
+            )
+        sql.flush()
+        sql.add(
+            models.Course(
+                course_id=COURSE, title="Course", category_id=1, teacher_id=TEACHER
+            )
+        )
+        for student_id in (STUDENT, OTHER_STUDENT):
+            sql.add(
+                models.Enrollment(
+                    course_id=COURSE,
+                    student_id=student_id,
+                    assigner_id=TEACHER,
+                    enrolled_at=date.today(),
+                )
+            )
+        record_event(sql, "task", 1, "created", Payload(), course_id=COURSE)
+        for student_id in (STUDENT, OTHER_STUDENT):
+            record_event(
+                sql,
+                "task_completion",
+                student_id,
+                "created",
+                Payload(),
+                course_id=COURSE,
+                student_id=student_id,
+            )
+        sql.commit()
+    return database
+
+
+def _visible(database: Database, user: UserResponse, **filters) -> list[int | None]:
+    with database.read_sessions() as sql:
+        visible_to = authorize_subscription(
+            sql, user, filters.get("course_id"), filters.get("student_id")
+        )
+        return [
+            event.student_id
+            for event in get_events(sql, visible_to=visible_to, **filters)
+        ]
+
+
+def test_teacher_and_admin_see_the_whole_course(course):
+    assert _visible(course, _user(TEACHER), course_id=COURSE) == [
+        None,
+        STUDENT,
+        OTHER_STUDENT,
+    ]
+    assert len(_visible(course, _user(OUTSIDER, "Admin"))) == 3
+
+
+def test_student_sees_course_wide_and_own_events_only(course):
+    assert _visible(course, _user(STUDENT), course_id=COURSE) == [None, STUDENT]
+    assert _visible(course, _user(STUDENT), student_id=STUDENT) == [STUDENT]
+
+
+@pytest.mark.parametrize(
+    "user_id, filters",
+    [
+        (OUTSIDER, {"course_id": COURSE}),
+        (STUDENT, {"student_id": OTHER_STUDENT}),
+        (STUDENT, {"course_id": COURSE, "student_id": OTHER_STUDENT}),
+        (STUDENT, {}),
+    ],
+)
+def test_other_subscriptions_are_forbidden(course, user_id, filters):
+    with pytest.raises(HTTPException) as error:
+        _visible(course, _user(user_id), **filters)
+    assert error.value.status_code == 403
+
+
+def test_prune_deletes_events_older_than_the_retention(database: Database):
+    now = datetime.utcnow()
+    with database.write_sessions() as sql:
+        for age_days in (30, 20, 10, 1, 0):
+            sql.add(
+                models.OutboxEvent(
+                    entity="task",
+                    entity_id=age_days,
+                    action="created",
+                    payload="{}",
+                    created_at=now - timedelta(days=age_days),
+                )
+            )
+        sql.commit()
+        result = prune_events(sql, retention_days=7, batch_size=2)
+
+    assert result.deleted == 3
+    with database.read_sessions() as sql:
+        assert [event.entity_id for event in get_events(sql)] == [1, 0]
@@ -0,0 +1,208 @@
+import threading
+import time
+
+from sqlalchemy import event, select, update
+
+from app import models
+from app.config import settings
+from app.database import Database
+from app.existence import ActiveIdIndex, _get_index, is_active, mark_active
+
+WRITERS = 4
+ROWS_PER_WRITER = 50
+
+
+def _create_category(database: Database, name: str) -> int:
+    with database.write_sessions() as sql:
+        category = models.Category(name=name)
+        sql.add(category)
+        sql.commit()
+        mark_active(sql, models.Category, category.category_id)
+        return category.category_id
+
+
+def _deactivate_category(database: Database, category_id: int) -> None:
+    with database.write_sessions() as sql:
+        sql.execute(
+            update(models.Category)
+            .where(models.Category.category_id == category_id)
+            .values(is_active=False)
+        )
+        sql.commit()
+        mark_active(sql, models.Category, category_id, False)
+
+
+def _active_ids(database: Database) -> set[int]:
+    with database.read_sessions() as sql:
+        return set(
+            sql.execute(
+                select(models.Category.category_id).where(
+                    models.Category.is_active == True  # noqa: E712
+                )
+            ).scalars()
+        )
+
+
+def _indexed_ids(index: ActiveIdIndex, upto: int) -> set[int]:
+    return {id_ for id_ in range(upto + 1) if id_ in index}
+
+
+def test_concurrent_writers_and_reloads_agree_with_database(database: Database):
+    index = _get_index(database.writer, models.Category)
+    errors: list[BaseException] = []
+    writers_done = threading.Event()
+
+    def writer(slot: int) -> None:
+        try:
+            for row in range(ROWS_PER_WRITER):
+                category_id = _create_category(database, f"w{slot}-{row}")
+                if row % 2:
+                    _deactivate_category(database, category_id)
+        except BaseException as e:
+            errors.append(e)
+
+    def reloader() -> None:
+        try:
+            while not writers_done.is_set():
+                index.reload(database.writer)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(slot,)) for slot in range(WRITERS)]
+    reloaders = [threading.Thread(target=reloader) for _ in range(2)]
+    for thread in reloaders + threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writers_done.set()
+    for thread in reloaders:
+        thread.join()
+
+    assert errors == []
+    expected = _active_ids(database)
+    assert len(expected) == WRITERS * ROWS_PER_WRITER // 2
+    # Nothing lost, nothing deactivated left behind
+    assert _indexed_ids(index, WRITERS * ROWS_PER_WRITER + 10) == expected
+
+
+def _during_reload(database: Database, callback) -> None:
+    """Run callback once, after a reload has read its ids but before it swaps."""
+    fired = threading.Event()
+
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        if "categories" in statement and not fired.is_set():
+            fired.set()
+            # Another thread, like another request committing meanwhile
+            thread = threading.Thread(target=callback)
+            thread.start()
+            thread.join()
+
+    event.listen(database.reader, "after_cursor_execute", after_execute)
+    try:
+        _get_index(database.writer, models.Category).reload(database.writer)
+    finally:
+        event.remove(database.reader, "after_cursor_execute", after_execute)
+    assert fired.is_set()
+
+
+def test_reload_does_not_undo_deactivation_made_while_reading(database: Database):
+    category_id = _create_category(database, "stale")
+    _during_reload(database, lambda: _deactivate_category(database, category_id))
+
+    index = _get_index(database.writer, models.Category)
+    assert category_id not in index
+    with database.read_sessions() as sql:
+        assert not is_active(sql, models.Category, category_id)
+
+
+def test_reload_keeps_rows_created_while_reading(database: Database):
+    created: list[int] = []
+    _during_reload(
+        database, lambda: created.append(_create_category(database, "fresh"))
+    )
+
+    assert created[0] in _get_index(database.writer, models.Category)
+
+
+def test_fallback_lookup_does_not_overwrite_newer_mark(database: Database):
+    index = _get_index(database.writer, models.Category)
+    category_id = _create_category(database, "raced")
+    # Missing from the index, so is_active falls back to the database
+    index.mark(category_id, False)
+
+    # The lookup read the row as active, then a deactivation was marked
+    version = index.version
+    index.mark(category_id, False)
+    index.add_if_unchanged(category_id, version)
+    assert category_id not in index
+
+    index.add_if_unchanged(category_id, index.version)
+    assert category_id in index
+
+
+def test_hit_is_rechecked_against_database(database: Database):
+    category_id = _create_category(database, "elsewhere")
+    # Deactivated by another worker, this one's index still has it
+    with database.write_sessions() as sql:
+        sql.execute(
+            update(models.Category)
+            .where(models.Category.category_id == category_id)
+            .values(is_active=False)
+        )
+        sql.commit()
+    assert category_id in _get_index(database.writer, models.Category)
+
+    with database.write_sessions() as sql:
+        assert not is_active(sql, models.Category, category_id)
+
+
+def test_miss_above_high_water_goes_to_database(database: Database):
+    index = _get_index(database.writer, models.Category)
+    category_id = _create_category(database, "newer")
+    # Created by another worker, after this one's last reload
+    index.mark(category_id, False)
+    index.high_water = category_id - 1
+
+    with database.write_sessions() as sql:
+        assert is_active(sql, models.Category, category_id)
+
+
+def test_stale_index_reloads_off_the_request_path(database: Database, monkeypatch):
+    index = _get_index(database.writer, models.Category)
+    reloaded = threading.Event()
+    reload = index.reload
+
+    def slow_reload(engine) -> None:
+        time.sleep(0.5)
+        reload(engine)
+        reloaded.set()
+
+    monkeypatch.setattr(index, "reload", slow_reload)
+    monkeypatch.setattr(settings.existence, "refresh_seconds", 0)
+    start = time.monotonic()
+    assert _get_index(database.writer, models.Category) is index
+    assert time.monotonic() - start < 0.5
+    assert reloaded.wait(5)
+
+
+def test_versions_count_every_mark_from_every_thread(database: Database):
+    index = ActiveIdIndex(models.Category)
+    marks_per_thread = 1000
+
+    def mark(offset: int) -> None:
+        for id_ in range(offset, offset + marks_per_thread):
+            index.mark(id_, True)
+
+    threads = [
+        threading.Thread(target=mark, args=(slot * marks_per_thread,))
+        for slot in range(WRITERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert index.version == WRITERS * marks_per_thread
+    assert _indexed_ids(index, WRITERS * marks_per_thread) == set(
+        range(WRITERS * marks_per_thread)
+    )
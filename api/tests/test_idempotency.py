@@ -0,0 +1,80 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import models
+from app.bootstrap import init_database
+from app.database import default_database
+from app.idempotency import IdempotencyMiddleware, ReplayError, replay_handler
+from app.src.auth.utils import create_access_token
+from app.src.routers import router as api_router
+
+USERS = ("idempotent", "other")
+
+
+@pytest.fixture
+def client() -> TestClient:
+    init_database(default_database.writer)
+    with default_database.write_sessions() as sql:
+        for username in USERS:
+            user = sql.scalar(
+                select(models.User).where(models.User.username == username)
+            )
+            if user is None:
+                sql.add(
+                    models.User(
+                        username=username,
+                        first_name="U",
+                        last_name="U",
+                        email=f"{username}@example.com",
+                        password_hash="secret",
+                        role_id=1,
+                    )
+                )
+        sql.commit()
+
+    app = FastAPI()
+    app.add_middleware(IdempotencyMiddleware)
+    app.add_exception_handler(ReplayError, replay_handler)
+    app.include_router(api_router)
+    return TestClient(app)
+
+
+def _headers(key: str, username: str | None = "idempotent") -> dict[str, str]:
+    headers = {"Idempotency-Key": key}
+    if username is not None:
+        token = create_access_token({"sub": username})
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
+def test_repeat_is_replayed_only_to_the_same_user(client):
+    key = uuid.uuid4().hex
+    body = {"name": f"Category {key}"}
+
+    first = client.post("/categories", json=body, headers=_headers(key))
+    repeat = client.post("/categories", json=body, headers=_headers(key))
+    assert first.status_code == 200
+    assert repeat.json() == first.json()
+    assert repeat.headers["Idempotent-Replayed"] == "true"
+
+    # Authentication runs before the stored response is looked up
+    anonymous = client.post("/categories", json=body, headers=_headers(key, None))
+    assert anonymous.status_code == 401
+    other = client.post("/categories", json=body, headers=_headers(key, "other"))
+    # Ran the controller again, the name is taken now
+    assert "Idempotent-Replayed" not in other.headers
+    assert other.status_code == 400
+
+
+def test_key_reused_for_another_body_is_rejected(client):
+    key = uuid.uuid4().hex
+    client.post("/categories", json={"name": f"First {key}"}, headers=_headers(key))
+
+    response = client.post(
+        "/categories", json={"name": f"Second {key}"}, headers=_headers(key)
+    )
+    assert response.status_code == 422